@@ -0,0 +1,22 @@
+-- =================================
+-- MIGRACIÓN - Clave idempotente para la sincronización diferida
+-- ISILAudit IA - Supabase
+-- =================================
+
+-- Los workers guardan primero en su base local y envían lotes a Supabase.
+-- Un lote reenviado tras un fallo usa la misma audit_key y no duplica filas.
+
+ALTER TABLE validated_urls ADD COLUMN IF NOT EXISTS audit_key TEXT;
+
+-- Necesario para upsert con on_conflict='audit_key' (las filas antiguas quedan en NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_validated_urls_audit_key ON validated_urls(audit_key);
+
+COMMENT ON COLUMN validated_urls.audit_key IS 'Clave idempotente de la ocurrencia (ejecución, archivo, diapositiva, URL, ubicación)';
+
+-- =================================
+-- VERIFICACIÓN
+-- =================================
+
+SELECT column_name, data_type
+FROM information_schema.columns
+WHERE table_name = 'validated_urls' AND column_name = 'audit_key';
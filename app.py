@@ -2,25 +2,26 @@ import streamlit as st
 import os
 import io
 import zipfile
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow, InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import pandas as pd
-from pptx import Presentation
 import re
 from urllib.parse import urlparse
 import tempfile
 import json
-import requests
 import time
-from supabase import create_client, Client
 from datetime import datetime
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2 import service_account
 import traceback
-from pptx_analyzer import PPTXURLExtractor
+import subprocess
+import sys
+from audit_store import AuditStore
+from url_index import URLIndex
+from image_inventory import ImageIndex
+from media_inventory import MediaIndex
+from archive_breakdown import ArchiveIndex
+from template_conformance import TemplateStore
+from slide_index import SlideIndexCache
+from drive_throttle import shared_drive_policy
+from file_profiler import PROFILE_THRESHOLD_SECONDS, list_profiles
+from job_queue import JobQueue
+from batch_checkpoint import CheckpointStore, file_content_key
 
 # Configuración de usuarios
 USERS = {
@@ -113,6 +114,8 @@ def logout():
 # Configuración de Google Drive API
 SCOPES = ['https://www.googleapis.com/auth/drive']
 SERVICE_ACCOUNT_FILE = 'service_account.json'  # tu archivo JSON
+# Endpoint alternativo de la API de Drive (p. ej. el doble local de load_test.py); vacío = Google
+DRIVE_API_ENDPOINT = os.environ.get('DRIVE_API_ENDPOINT', '')
 
 # Configuración de Supabase
 try:
@@ -126,9 +129,13 @@ class GoogleDriveManager:
     def __init__(self):
         self.service = None
         self.credentials = None
+        # Cuota y reintentos comunes a todas las llamadas a Drive del proceso
+        self.policy = shared_drive_policy
     
     def authenticate(self):
         """Autenticación con Service Account desde Streamlit Secrets"""
+        # Las librerías de Google se cargan al conectar, no al mostrar el login
+        from google.oauth2 import service_account
         try:
             # Verificar si tenemos credenciales de Service Account en secrets
             if hasattr(st, 'secrets') and 'GOOGLE_CREDENTIALS' in st.secrets:
@@ -143,9 +150,9 @@ class GoogleDriveManager:
                     credentials_info, scopes=SCOPES
                 )
                 self.credentials = creds
-                self.service = build('drive', 'v3', credentials=creds)
+                self.service = self.build_service(creds)
                 # Verificar que la conexión funcione
-                self.service.files().list(pageSize=1).execute()
+                self.policy.execute(self.service.files().list(pageSize=1))
                 st.success("✅ Conexión con Google Drive establecida (Service Account)")
                 return True
             elif os.path.exists(SERVICE_ACCOUNT_FILE):
@@ -153,8 +160,8 @@ class GoogleDriveManager:
                     SERVICE_ACCOUNT_FILE, scopes=SCOPES
                 )
                 self.credentials = creds
-                self.service = build('drive', 'v3', credentials=creds)
-                self.service.files().list(pageSize=1).execute()
+                self.service = self.build_service(creds)
+                self.policy.execute(self.service.files().list(pageSize=1))
                 st.success("✅ Conexión con Google Drive establecida (Service Account)")
                 return True
             else:
@@ -184,20 +191,20 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
 
             # Buscar carpetas en la raíz
             query_root = "mimeType='application/vnd.google-apps.folder' and 'root' in parents and trashed=false"
-            results_root = self.service.files().list(
+            results_root = self.policy.execute(self.service.files().list(
                 q=query_root,
                 pageSize=1000,
                 fields="nextPageToken, files(id, name, modifiedTime)"
-            ).execute()
+            ))
             folders_root = results_root.get('files', [])
 
             # Buscar carpetas en 'Compartidos conmigo'
             query_shared = "mimeType='application/vnd.google-apps.folder' and sharedWithMe and trashed=false"
-            results_shared = self.service.files().list(
+            results_shared = self.policy.execute(self.service.files().list(
                 q=query_shared,
                 pageSize=1000,
                 fields="nextPageToken, files(id, name, modifiedTime)"
-            ).execute()
+            ))
             folders_shared = results_shared.get('files', [])
 
             # Unir y eliminar duplicados por ID
@@ -210,16 +217,25 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             st.error(f"❌ Error al obtener carpetas: {str(e)}")
             return []
     
-    def find_pptx_files(self, folder_id):
-        """Buscar archivos PPTX en subcarpetas con formato específico y obtener información completa"""
+    def find_pptx_files(self, folder_id, raise_errors=False):
+        """
+        Buscar archivos PPTX en subcarpetas con formato específico y obtener información completa
+
+        Args:
+            folder_id: Carpeta raíz a explorar
+            raise_errors: Propagar los errores de Drive en lugar de mostrarlos y devolver lo encontrado
+                (para los workers, donde st.error no llega a nadie)
+        """
         try:
             if not self.service:
+                if raise_errors:
+                    raise ValueError("Google Drive no está conectado")
                 return []
             
             all_pptx_files = []
             
             # Buscar todas las subcarpetas dentro de la carpeta seleccionada
-            subfolders = self._get_subfolders_recursive(folder_id)
+            subfolders = self._get_subfolders_recursive(folder_id, raise_errors=raise_errors)
             
             # Filtrar subcarpetas que sigan el patrón XXXXX-SESIONXX
             pattern = re.compile(r'^\d{5}-SESION\d{2}$')
@@ -227,7 +243,7 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             
             # Buscar archivos PPTX en las subcarpetas válidas
             for subfolder in valid_subfolders:
-                pptx_files = self._get_pptx_in_folder(subfolder['id'])
+                pptx_files = self._get_pptx_in_folder(subfolder['id'], raise_errors=raise_errors)
                 for file in pptx_files:
                     file['subfolder'] = subfolder['name']
                     file['size_mb'] = round(int(file.get('size', 0)) / (1024 * 1024), 1) if file.get('size') else 0
@@ -236,10 +252,12 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             return all_pptx_files
             
         except Exception as e:
+            if raise_errors:
+                raise
             st.error(f"❌ Error al buscar archivos PPTX: {str(e)}")
             return []
     
-    def _get_subfolders_recursive(self, parent_folder_id, max_depth=3, current_depth=0):
+    def _get_subfolders_recursive(self, parent_folder_id, max_depth=3, current_depth=0, raise_errors=False):
         """Obtener todas las subcarpetas recursivamente"""
         subfolders = []
         
@@ -248,39 +266,45 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
         
         try:
             query = f"mimeType='application/vnd.google-apps.folder' and '{parent_folder_id}' in parents and trashed=false"
-            results = self.service.files().list(
+            results = self.policy.execute(self.service.files().list(
                 q=query,
                 pageSize=100,
                 fields="nextPageToken, files(id, name)"
-            ).execute()
+            ))
             
             folders = results.get('files', [])
             
             for folder in folders:
                 subfolders.append(folder)
                 # Buscar recursivamente en subcarpetas
-                subfolders.extend(self._get_subfolders_recursive(folder['id'], max_depth, current_depth + 1))
+                subfolders.extend(
+                    self._get_subfolders_recursive(folder['id'], max_depth, current_depth + 1, raise_errors)
+                )
             
             return subfolders
             
         except Exception as e:
+            if raise_errors:
+                raise
             st.warning(f"⚠️ Error al buscar en subcarpetas: {str(e)}")
             return subfolders
     
-    def _get_pptx_in_folder(self, folder_id):
+    def _get_pptx_in_folder(self, folder_id, raise_errors=False):
         """Obtener archivos PPTX en una carpeta específica con información completa"""
         try:
             query = f"'{folder_id}' in parents and trashed=false and (name contains '.pptx' or name contains '.ppt')"
-            results = self.service.files().list(
+            results = self.policy.execute(self.service.files().list(
                 q=query,
                 pageSize=100,
-                fields="nextPageToken, files(id, name, size, modifiedTime, parents)"
-            ).execute()
+                fields="nextPageToken, files(id, name, size, modifiedTime, parents, md5Checksum)"
+            ))
             
             files = results.get('files', [])
             return files
             
         except Exception as e:
+            if raise_errors:
+                raise
             st.warning(f"⚠️ Error al buscar archivos PPTX en carpeta: {str(e)}")
             return []
     
@@ -290,12 +314,13 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             if not self.service:
                 return None
             
+            from googleapiclient.http import MediaIoBaseDownload
             request = self.service.files().get_media(fileId=file_id)
             file_io = io.BytesIO()
             downloader = MediaIoBaseDownload(file_io, request)
             done = False
             while done is False:
-                status, done = downloader.next_chunk()
+                status, done = self.policy.call(downloader.next_chunk)
             
             file_io.seek(0)
             return file_io.getvalue()
@@ -304,6 +329,43 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             st.error(f"❌ Error al descargar archivo: {str(e)}")
             return None
 
+    def open_ranged(self, file):
+        """Abrir un archivo de Drive para leerlo por rangos (sin descargarlo completo), p. ej. con zipfile"""
+        from drive_range import DriveRangeFile, RangeReadError
+        size = file.get('size')
+        if size is None:
+            try:
+                size = self.policy.execute(self.service.files().get(fileId=file['id'], fields="size")).get('size', 0)
+            except Exception as e:
+                raise RangeReadError(f"No se pudo obtener el tamaño de {file['id']}: {str(e)}") from e
+        return DriveRangeFile(self.service, file['id'], size, policy=self.policy)
+
+    def get_folder_name(self, folder_id, raise_errors=False):
+        """Nombre de una carpeta de Drive (su ID si no se puede consultar, salvo con raise_errors)"""
+        try:
+            folder = self.policy.execute(self.service.files().get(fileId=folder_id, fields="id, name"))
+            return folder.get('name', folder_id)
+        except Exception as e:
+            if raise_errors:
+                raise
+            st.warning(f"⚠️ No se pudo obtener el nombre de la carpeta {folder_id}: {str(e)}")
+            return folder_id
+
+    def thread_copy(self):
+        """Copia con su propio cliente de Drive para usarla en otro hilo (el cliente HTTP no es seguro entre hilos)"""
+        copy = GoogleDriveManager()
+        copy.policy = self.policy
+        copy.credentials = self.credentials
+        copy.service = self.build_service(self.credentials)
+        return copy
+
+    @staticmethod
+    def build_service(credentials):
+        """Cliente de la API de Drive v3, contra DRIVE_API_ENDPOINT si está configurado"""
+        from googleapiclient.discovery import build
+        client_options = {'api_endpoint': DRIVE_API_ENDPOINT} if DRIVE_API_ENDPOINT else None
+        return build('drive', 'v3', credentials=credentials, client_options=client_options)
+
     def add_folder_to_root(self, folder_id):
         """Añadir una carpeta compartida a la raíz del Service Account"""
         try:
@@ -313,10 +375,10 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             if not folder_id or not isinstance(folder_id, str):
                 st.error("❌ Debes ingresar un ID de carpeta válido.")
                 return False
-            self.service.files().update(
+            self.policy.execute(self.service.files().update(
                 fileId=folder_id,
                 addParents='root'
-            ).execute()
+            ))
             st.success(f"✅ Carpeta añadida a la raíz del Service Account (ID: {folder_id})")
             return True
         except Exception as e:
@@ -325,6 +387,372 @@ GOOGLE_CREDENTIALS = '''{"type": "service_account", "project_id": "agente-101",
             st.code(traceback.format_exc())
             return False
 
+    def add_folders_to_root(self, folder_ids, chunk_size=100):
+        """
+        Añadir varias carpetas a la raíz con solicitudes batch de la API de Drive
+
+        Args:
+            folder_ids: IDs de las carpetas compartidas
+            chunk_size: Operaciones por solicitud batch (la API admite hasta 100)
+
+        Returns:
+            List[dict]: Resultado por carpeta con 'ID', 'Resultado' y 'Detalle'
+        """
+        results = {}
+        errors = {}
+
+        def on_response(request_id, response, exception):
+            if exception is None:
+                errors.pop(request_id, None)
+                results[request_id] = {'ID': request_id, 'Resultado': '✅ Añadida', 'Detalle': response.get('name', '')}
+            else:
+                errors[request_id] = exception
+                results[request_id] = {'ID': request_id, 'Resultado': '❌ Error', 'Detalle': str(exception)}
+
+        folder_ids = list(dict.fromkeys(str(folder_id).strip() for folder_id in folder_ids if str(folder_id).strip()))
+        if not self.service:
+            return [{'ID': folder_id, 'Resultado': '❌ Error', 'Detalle': 'Sin conexión con Google Drive'}
+                    for folder_id in folder_ids]
+
+        for start in range(0, len(folder_ids), chunk_size):
+            pending = folder_ids[start:start + chunk_size]
+            for attempt in range(self.policy.max_retries + 1):
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for folder_id in pending:
+                    batch.add(
+                        self.service.files().update(fileId=folder_id, addParents='root', fields='id, name'),
+                        request_id=folder_id
+                    )
+                try:
+                    # Cada operación del batch cuenta para la cuota
+                    self.policy.execute(batch, cost=len(pending))
+                except Exception as e:
+                    # Un fallo de la solicitud batch completa afecta a todas sus carpetas
+                    for folder_id in pending:
+                        results.setdefault(folder_id, {'ID': folder_id, 'Resultado': '❌ Error', 'Detalle': str(e)})
+                    break
+                # Las operaciones rechazadas por cuota o 5xx se reenvían en un nuevo batch
+                pending = [folder_id for folder_id in pending
+                           if folder_id in errors and self.policy.is_retryable(errors[folder_id])]
+                if not pending or attempt == self.policy.max_retries:
+                    break
+                self.policy.wait_before_retry(attempt)
+
+        return [results.get(folder_id, {'ID': folder_id, 'Resultado': '❌ Error', 'Detalle': 'Sin respuesta'})
+                for folder_id in folder_ids]
+
+@st.cache_resource
+def get_job_queue():
+    """Cola persistente de auditorías compartida por todas las sesiones"""
+    return JobQueue()
+
+@st.cache_resource
+def get_audit_store():
+    """Almacén local de resultados (el mismo en el que escriben los workers)"""
+    return AuditStore()
+
+@st.cache_resource
+def get_url_index():
+    """Índice invertido de URLs entre presentaciones (mantenido por los workers)"""
+    return URLIndex()
+
+@st.cache_resource
+def get_image_index():
+    """Inventario de imágenes entre presentaciones (mantenido por los workers)"""
+    return ImageIndex()
+
+@st.cache_resource
+def get_media_index():
+    """Inventario de videos y audios entre presentaciones (mantenido por los workers)"""
+    return MediaIndex()
+
+@st.cache_resource
+def get_slide_index_cache():
+    """Caché de índices de diapositivas (la llenan las auditorías de URLs de los workers)"""
+    return SlideIndexCache()
+
+@st.cache_resource
+def get_archive_index():
+    """Desglose del peso de las presentaciones por tipo de parte (mantenido por los workers)"""
+    return ArchiveIndex()
+
+@st.cache_resource
+def get_template_store():
+    """Plantillas aprobadas y veredictos de conformidad (compartidos con los workers)"""
+    return TemplateStore()
+
+def ensure_audit_worker(job_queue):
+    """Lanzar un worker en segundo plano si no hay ninguno activo"""
+    if job_queue.active_workers() > 0:
+        return
+    worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audit_worker.py')
+    subprocess.Popen(
+        [sys.executable, worker_script, '--idle-exit', '300'],
+        cwd=os.path.dirname(worker_script),
+        start_new_session=True,
+    )
+
+def export_controls(key, make_chunks, file_name):
+    """Preparar en disco (por bloques) y descargar una exportación CSV o Excel"""
+    from audit_export import EXPORT_FORMATS, EXPORT_MAX_BYTES, ExportTooLarge, export_to_file
+
+    col_format, col_prepare = st.columns([1, 2])
+    with col_format:
+        export_format = st.selectbox("Formato", list(EXPORT_FORMATS), format_func=str.upper, key=f"{key}_format")
+    with col_prepare:
+        if st.button("📦 Preparar exportación", key=f"{key}_prepare"):
+            previous = st.session_state.pop(f"{key}_export", None)
+            if previous and os.path.exists(previous[0]):
+                os.remove(previous[0])
+            try:
+                with st.spinner("📦 Generando archivo..."):
+                    path, count = export_to_file(make_chunks(), export_format, max_bytes=EXPORT_MAX_BYTES)
+                st.session_state[f"{key}_export"] = (path, count, export_format)
+            except ExportTooLarge as e:
+                st.error(f"❌ {str(e)}: filtra los resultados o aumenta EXPORT_MAX_BYTES")
+    export = st.session_state.get(f"{key}_export")
+    if export and os.path.exists(export[0]):
+        path, count, export_format = export
+        mime, suffix = EXPORT_FORMATS[export_format]
+        # st.download_button carga el archivo entero en la memoria del servidor: por eso el límite
+        # EXPORT_MAX_BYTES al prepararlo
+        with open(path, 'rb') as f:
+            st.download_button(
+                f"⬇️ Descargar {count} filas ({export_format.upper()})", f,
+                file_name=f"{file_name}{suffix}", mime=mime, key=f"{key}_download"
+            )
+
+# Filas de un trabajo que se leen de la cola por cada refresco o página de la tabla
+ROWS_PAGE_SIZE = 500
+
+def job_rows_table(job_id, total):
+    """Tabla paginada de las filas de un trabajo: solo se lee de la cola la página visible"""
+    pages = max(1, -(-total // ROWS_PAGE_SIZE))
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Página (de {pages}, {ROWS_PAGE_SIZE} filas cada una)", min_value=1, max_value=pages, value=1,
+            key=f"rows_page_{job_id}"
+        )
+    st.dataframe(get_job_queue().get_rows(job_id, offset=(page - 1) * ROWS_PAGE_SIZE, limit=ROWS_PAGE_SIZE))
+
+def render_audit_result(job_id, result, total):
+    """Mostrar el resultado de una auditoría de URLs terminada"""
+    for level, text in result['messages']:
+        getattr(st, level)(text)
+    summary = result['summary']
+    st.success(f"Extracción y validación completada. Total de URLs: {total}")
+    if result.get('folders'):
+        st.write(f"📂 Resumen por carpeta ({summary['folders']} carpetas, {summary['files']} archivos)")
+        st.dataframe(result['folders'], hide_index=True)
+    st.info(
+        f"🌐 {summary['unique_urls']} URLs únicas validadas para {summary['occurrences']} ocurrencias "
+        f"({summary['requests_saved']} solicitudes ahorradas)"
+    )
+    job_rows_table(job_id, total)
+    export_controls(
+        f"job_{job_id}",
+        lambda: get_job_queue().iter_row_chunks(job_id),
+        f"auditoria_{job_id}",
+    )
+    if result['hosts_down']:
+        st.warning(f"⚠️ {len(result['hosts_down'])} host(s) sin respuesta; sus URLs restantes se marcaron sin reintentar")
+        st.dataframe(result['hosts_down'])
+    if summary.get('profiled_files'):
+        render_profiles(job_id)
+
+def profiling_controls(key):
+    """Opciones del modo de perfilado; devuelve lo que se añade al payload del trabajo"""
+    if not st.checkbox("🩺 Perfilar archivos lentos", key=f"{key}_profile",
+                       help="Guarda un perfil cProfile de cada archivo que tarde más que el umbral"):
+        return {}
+    threshold = st.number_input(
+        "Umbral (segundos)", min_value=0.0, value=float(PROFILE_THRESHOLD_SECONDS), step=1.0,
+        key=f"{key}_profile_threshold"
+    )
+    return {'profile': True, 'profile_threshold': threshold}
+
+def render_profiles(job_id):
+    """Perfiles de los archivos lentos de un trabajo, con sus funciones más costosas"""
+    profiles = list_profiles(job_id)
+    if not profiles:
+        return
+    with st.expander(f"🩺 Perfiles de {len(profiles)} archivo(s) lento(s)"):
+        st.dataframe(
+            [{'Archivo': profile['file_name'], 'Segundos': profile['seconds'],
+              'Perfil': '✅' if profile['profile_path'] else 'solo tiempo (otro archivo en perfilado)'}
+             for profile in profiles],
+            hide_index=True
+        )
+        selected = st.selectbox(
+            "Archivo", options=range(len(profiles)), format_func=lambda index: profiles[index]['file_name'],
+            key=f"profile_select_{job_id}"
+        )
+        profile = profiles[selected]
+        if profile['top']:
+            st.dataframe(profile['top'], hide_index=True)
+            with open(profile['profile_path'], 'rb') as f:
+                st.download_button(
+                    "⬇️ Descargar perfil (.prof)", f, file_name=os.path.basename(profile['profile_path']),
+                    key=f"profile_download_{job_id}"
+                )
+
+# Trabajos de inventario: tipo -> (ícono, elementos, prefijo del archivo exportado)
+INVENTORY_JOB_TYPES = {
+    'image_inventory': ("🖼️", "imágenes", "imagenes"),
+    'media_inventory': ("🎬", "videos y audios", "multimedia"),
+    'archive_breakdown': ("📦", "archivos", "peso_archivos"),
+    'template_conformance': ("📐", "archivos", "plantillas"),
+}
+
+def render_inventory_result(job_id, job_type, result, total):
+    """Mostrar el resultado de un inventario (imágenes, multimedia...) terminado"""
+    _, items, file_prefix = INVENTORY_JOB_TYPES[job_type]
+    for level, text in result['messages']:
+        getattr(st, level)(text)
+    st.success(f"Inventario completado. Total de {items}: {total}")
+    job_rows_table(job_id, total)
+    export_controls(
+        f"job_{job_id}",
+        lambda: get_job_queue().iter_row_chunks(job_id),
+        f"{file_prefix}_{job_id}",
+    )
+
+# Estados en los que un trabajo ya no cambia: su panel deja de refrescarse
+FINISHED_JOB_STATUSES = {'completado', 'error'}
+
+def audit_job_panel(job_id):
+    """Estado de un trabajo de auditoría; se refresca solo mientras no haya terminado"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.warning("No se encontró el trabajo de auditoría")
+    elif job['status'] in FINISHED_JOB_STATUSES:
+        finished_job_panel(job_id)
+    else:
+        live_job_panel(job_id)
+
+@st.fragment(run_every=3)
+def live_job_panel(job_id):
+    """Progreso de un trabajo pendiente o en proceso, refrescado cada pocos segundos"""
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id)
+    if job is None or job['status'] in FINISHED_JOB_STATUSES:
+        # Una ejecución completa reemplaza este fragmento por el panel final, que no se refresca
+        st.rerun()
+    if job['status'] == 'pendiente':
+        st.info(f"⏳ Auditoría #{job_id} en cola, esperando un worker...")
+        return
+    st.progress(job['progress'], text=f"Auditoría #{job_id}: {job['message']}")
+    if job['detail']:
+        st.dataframe(job['detail'], hide_index=True)
+    # Las filas aparecen a medida que el worker procesa cada diapositiva; solo se leen las últimas
+    total = job_queue.count_rows(job_id)
+    if total:
+        if job['job_type'] in INVENTORY_JOB_TYPES:
+            icon, items, _ = INVENTORY_JOB_TYPES[job['job_type']]
+            st.write(f"{icon} {total} {items} inventariados hasta ahora")
+        else:
+            st.write(f"🔗 {total} URLs validadas hasta ahora")
+        if total > ROWS_PAGE_SIZE:
+            st.caption(f"Mostrando las últimas {ROWS_PAGE_SIZE} filas; la tabla completa aparece al terminar")
+        st.dataframe(job_queue.get_rows(job_id, offset=max(0, total - ROWS_PAGE_SIZE)))
+
+@st.fragment
+def finished_job_panel(job_id):
+    """Resultado o error de un trabajo terminado"""
+    job_queue = get_job_queue()
+    job = job_queue.get(job_id)
+    if job['status'] == 'error':
+        st.error(f"❌ La auditoría #{job_id} falló")
+        st.code(job['error'])
+        completed = CheckpointStore().completed_count(job_id)
+        if st.button(f"🔁 Reanudar auditoría ({completed} archivo(s) ya terminados)", key=f"retry_job_{job_id}"):
+            if job_queue.retry(job_id):
+                ensure_audit_worker(job_queue)
+                st.rerun(scope="app")
+    elif job['job_type'] in INVENTORY_JOB_TYPES:
+        render_inventory_result(job_id, job['job_type'], job['result'], job_queue.count_rows(job_id))
+    else:
+        render_audit_result(job_id, job['result'], job_queue.count_rows(job_id))
+
+# Opciones de orden del selector de archivos: (clave, descendente)
+FILE_SORT_OPTIONS = {
+    "Nombre": (lambda file: file['name'].lower(), False),
+    "Tamaño (mayor primero)": (lambda file: int(file.get('size') or 0), True),
+    "Tamaño (menor primero)": (lambda file: int(file.get('size') or 0), False),
+    "Modificación (más reciente)": (lambda file: file.get('modifiedTime', ''), True),
+    "Modificación (más antigua)": (lambda file: file.get('modifiedTime', ''), False),
+}
+
+def file_selection_table(pptx_files):
+    """Selector de archivos en una sola tabla: su costo no crece con el número de archivos"""
+    import pandas as pd
+
+    selected_ids = {file['id'] for file in st.session_state.get('selected_files', [])}
+    st.session_state.setdefault('file_table_version', 0)
+
+    col_search, col_folder, col_sort = st.columns([3, 2, 2])
+    with col_search:
+        search = st.text_input("🔎 Buscar por nombre", key="file_search")
+    with col_folder:
+        subfolder_options = sorted({file.get('subfolder', 'N/A') for file in pptx_files})
+        subfolders = st.multiselect("📁 Subcarpetas", subfolder_options, key="file_subfolders")
+    with col_sort:
+        sort_option = st.selectbox("↕️ Ordenar por", list(FILE_SORT_OPTIONS), key="file_sort")
+
+    matching = [
+        file for file in pptx_files
+        if search.lower() in file['name'].lower()
+        and (not subfolders or file.get('subfolder', 'N/A') in subfolders)
+    ]
+    sort_key, descending = FILE_SORT_OPTIONS[sort_option]
+    matching.sort(key=sort_key, reverse=descending)
+
+    col_all, col_none, col_count = st.columns([2, 2, 3])
+    with col_all:
+        select_all = st.button(f"☑️ Seleccionar coincidentes ({len(matching)})")
+    with col_none:
+        clear_matching = st.button("✖️ Quitar coincidentes")
+    if select_all or clear_matching:
+        matching_ids = {file['id'] for file in matching}
+        selected_ids = selected_ids | matching_ids if select_all else selected_ids - matching_ids
+        st.session_state.selected_files = [file for file in pptx_files if file['id'] in selected_ids]
+        st.session_state.file_table_version += 1
+    with col_count:
+        st.write(f"**{len(selected_ids)}** de {len(pptx_files)} archivo(s) seleccionados")
+
+    table = pd.DataFrame(
+        {
+            'Seleccionar': [file['id'] in selected_ids for file in matching],
+            'Archivo': [file['name'] for file in matching],
+            'Carpeta': [file.get('subfolder', 'N/A') for file in matching],
+            'Tamaño (MB)': [file.get('size_mb', 0) for file in matching],
+            'Modificado': [file.get('modifiedTime', '')[:16].replace('T', ' ') for file in matching],
+        },
+        index=[file['id'] for file in matching],
+    )
+    with st.form("file_selection_form"):
+        # La clave cambia con los filtros y con cada selección masiva para partir de un estado limpio
+        edited = st.data_editor(
+            table,
+            key=f"file_table_{st.session_state.file_table_version}_{search}_{subfolders}_{sort_option}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=['Archivo', 'Carpeta', 'Tamaño (MB)', 'Modificado'],
+            column_config={'Seleccionar': st.column_config.CheckboxColumn("Seleccionar")},
+        )
+        submitted = st.form_submit_button("✅ Confirmar Selección", type="primary")
+    if submitted:
+        # Solo cambian las filas visibles; la selección fuera del filtro se conserva
+        for file_id, checked in edited['Seleccionar'].items():
+            if checked:
+                selected_ids.add(file_id)
+            else:
+                selected_ids.discard(file_id)
+        st.session_state.selected_files = [file for file in pptx_files if file['id'] in selected_ids]
+        st.session_state.file_table_version += 1
+        st.success(f"✅ {len(selected_ids)} archivo(s) seleccionado(s) para análisis")
+
 def main():
     # Verificar autenticación antes de mostrar la aplicación
     check_authentication()
@@ -411,19 +839,52 @@ def main():
             csv_file = st.file_uploader("Sube un archivo CSV con una columna 'folder_id'", type=["csv"])
             if csv_file is not None:
                 try:
+                    import pandas as pd
                     df = pd.read_csv(csv_file)
                     if 'folder_id' in df.columns:
                         if st.button("Añadir todas las carpetas del CSV a la raíz"):
-                            resultados = []
-                            for folder_id in df['folder_id'].dropna().astype(str):
-                                resultado = st.session_state.drive_manager.add_folder_to_root(folder_id)
-                                resultados.append((folder_id, resultado))
-                            exitos = sum(1 for _, ok in resultados if ok)
-                            st.success(f"Se añadieron {exitos} carpetas a la raíz correctamente.")
+                            with st.spinner("➕ Añadiendo carpetas a la raíz..."):
+                                resultados = st.session_state.drive_manager.add_folders_to_root(
+                                    df['folder_id'].dropna().astype(str)
+                                )
+                            exitos = sum(1 for resultado in resultados if resultado['Resultado'] == '✅ Añadida')
+                            st.success(f"Se añadieron {exitos} de {len(resultados)} carpetas a la raíz correctamente.")
+                            st.dataframe(resultados, hide_index=True)
+                        st.markdown("**🚀 Auditoría en lote de las carpetas del CSV**")
+                        folder_ids = df['folder_id'].dropna().astype(str).str.strip().unique().tolist()
+                        col_batch1, col_batch2 = st.columns(2)
+                        with col_batch1:
+                            max_concurrent_folders = st.number_input(
+                                "Carpetas en paralelo", min_value=1, max_value=16, value=4,
+                                help="Límite global de carpetas (y descargas) simultáneas"
+                            )
+                        with col_batch2:
+                            max_files = st.number_input(
+                                "Máximo de archivos (0 = sin límite)", min_value=0, value=0,
+                                help="Presupuesto total de archivos a auditar entre todas las carpetas"
+                            )
+                        batch_fast_mode = st.checkbox("⚡ Modo rápido (solo hipervínculos)", key="batch_fast_mode")
+                        batch_profiling = profiling_controls("batch")
+                        if st.button(f"🚀 Auditar las {len(folder_ids)} carpetas del CSV", type="primary"):
+                            job_queue = get_job_queue()
+                            st.session_state.batch_job_id = job_queue.submit(
+                                'multi_root_audit',
+                                {
+                                    'folder_ids': folder_ids,
+                                    'max_concurrent_folders': int(max_concurrent_folders),
+                                    'max_files': int(max_files) or None,
+                                    'fast_mode': batch_fast_mode,
+                                    **batch_profiling,
+                                },
+                                submitted_by=st.session_state.current_user,
+                            )
+                            ensure_audit_worker(job_queue)
                     else:
                         st.error("El CSV debe tener una columna llamada 'folder_id'")
                 except Exception as e:
                     st.error(f"Error al procesar el archivo CSV: {e}")
+            if st.session_state.get('batch_job_id'):
+                audit_job_panel(st.session_state.batch_job_id)
             st.markdown("---")
             if st.button("🔄 Actualizar lista de carpetas"):
                 st.session_state.folders_cache = st.session_state.drive_manager.get_folders()
@@ -453,118 +914,230 @@ def main():
                         st.subheader("📋 Archivos PPTX Encontrados")
                         st.markdown("*Solo se muestran archivos en subcarpetas con formato XXXXX-SESIONXX*")
                         st.info(f"📊 Encontrados **{len(pptx_files)}** archivos PPTX")
-                        with st.form("file_selection_form"):
-                            st.write("**Selecciona los archivos a analizar:**")
-                            col_header1, col_header2, col_header3, col_header4 = st.columns([1, 4, 2, 1.5])
-                            with col_header1:
-                                st.write("**Seleccionar**")
-                            with col_header2:
-                                st.write("**Archivo PPT**")
-                            with col_header3:
-                                st.write("**Carpeta**")
-                            with col_header4:
-                                st.write("**Tamaño**")
-                            st.markdown("---")
-                            selected_indices = []
-                            for i, file in enumerate(pptx_files):
-                                col_check, col_name, col_folder, col_size = st.columns([1, 4, 2, 1.5])
-                                with col_check:
-                                    checkbox_value = st.checkbox("", key=f"form_file_{i}", label_visibility="collapsed")
-                                    if checkbox_value:
-                                        selected_indices.append(i)
-                                with col_name:
-                                    st.write(f"📄 {file['name']}")
-                                with col_folder:
-                                    st.write(f"📁 {file.get('subfolder', 'N/A')}")
-                                with col_size:
-                                    st.write(f"💾 {file.get('size_mb', 0)} MB")
-                            submitted = st.form_submit_button("✅ Confirmar Selección", type="primary")
-                            if submitted and selected_indices:
-                                st.session_state.selected_files = [pptx_files[i] for i in selected_indices]
-                                st.success(f"✅ {len(selected_indices)} archivo(s) seleccionado(s) para análisis")
+                        st.write("**Selecciona los archivos a analizar:**")
+                        file_selection_table(pptx_files)
                         if hasattr(st.session_state, 'selected_files') and st.session_state.selected_files:
-                            st.write("**Archivos seleccionados para análisis:**")
-                            for file in st.session_state.selected_files:
-                                st.write(f"• {file['name']} ({file.get('subfolder', 'N/A')})")
+                            fast_mode = st.checkbox(
+                                "⚡ Modo rápido (solo hipervínculos)",
+                                help="Lee solo las relaciones de cada archivo: útil para revisar muchas carpetas "
+                                     "antes de decidir qué archivos requieren el análisis completo"
+                            )
+                            profiling = profiling_controls("url_audit")
                             extract_button = st.button("🔍 Extraer URLs", type="primary", help=f"Extraer URLs de {len(st.session_state.selected_files)} archivo(s) seleccionado(s)")
                             if extract_button:
-                                st.subheader("🌐 URLs Encontradas")
-                                extractor = PPTXURLExtractor()
-                                all_results = []
-                                supabase = None
-                                if SUPABASE_URL and SUPABASE_KEY:
-                                    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-                                progress = st.progress(0)
-                                for idx, file in enumerate(st.session_state.selected_files):
-                                    st.info(f"Descargando y analizando: {file['name']}")
-                                    pptx_bytes = st.session_state.drive_manager.download_file(file['id'])
-                                    if not pptx_bytes:
-                                        st.warning(f"No se pudo descargar {file['name']}")
-                                        continue
-                                    urls = extractor.extract_urls_from_file(pptx_bytes)
-                                    st.write(f"🔗 {len(urls)} URLs extraídas de {file['name']}")
-                                    for url_info in urls:
-                                        url = url_info['url']
-                                        # Validar estado HTTP
-                                        try:
-                                            resp = requests.head(url, allow_redirects=True, timeout=5)
-                                            status = resp.status_code
-                                            status_desc = resp.reason
-                                        except Exception as e:
-                                            status = None
-                                            status_desc = str(e)
-                                        # Dominio
-                                        try:
-                                            url_domain = urlparse(url).netloc
-                                        except Exception:
-                                            url_domain = ''
-                                        # Insertar en Supabase
-                                        if supabase:
-                                            data = {
-                                                'filename': file['name'],
-                                                'slide_number': url_info.get('slide_number', 1),
-                                                'url': url,
-                                                'url_domain': url_domain,
-                                                'location_context': url_info.get('location', ''),
-                                                'text_context': url_info.get('context', ''),
-                                                'status': str(status) if status else 'Error',
-                                                'status_description': status_desc,
-                                                'checked_at': datetime.utcnow().isoformat(),
-                                                'subfolder': file.get('subfolder', ''),
-                                                'processed_by': st.session_state.current_user,
-                                            }
-                                            try:
-                                                result = supabase.table('validated_urls').insert(data).execute()
-                                                if not result.data:
-                                                    st.warning(f"⚠️ Supabase: Inserción sin datos para URL: {url[:50]}...")
-                                            except Exception as e:
-                                                st.error(f"❌ Error Supabase: {str(e)}")
-                                                st.error(f"🔍 Datos que causaron error: {data}")
-                                                # Continuar con el procesamiento sin detener todo
-                                        # Guardar para mostrar
-                                        all_results.append({
-                                            'Archivo': file['name'],
-                                            'URL': url,
-                                            'Dominio': url_domain,
-                                            'Estado': status,
-                                            'Descripción': status_desc,
-                                            'Ubicación': url_info.get('location', ''),
-                                            'Contexto': url_info.get('context', ''),
-                                        })
-                                    progress.progress((idx + 1) / len(st.session_state.selected_files))
-                                st.success(f"Extracción y validación completada. Total de URLs: {len(all_results)}")
-                                st.dataframe(all_results)
+                                # La auditoría se encola y la procesa un worker en segundo plano
+                                job_queue = get_job_queue()
+                                st.session_state.current_job_id = job_queue.submit(
+                                    'url_audit',
+                                    {'files': st.session_state.selected_files, 'fast_mode': fast_mode, **profiling},
+                                    submitted_by=st.session_state.current_user,
+                                )
+                                ensure_audit_worker(job_queue)
+                        if st.session_state.get('current_job_id'):
+                            st.subheader("🌐 URLs Encontradas")
+                            audit_job_panel(st.session_state.current_job_id)
                     else:
                         st.info("👆 No se encontraron archivos PPTX en las subcarpetas con formato XXXXX-SESIONXX")
             else:
                 st.warning("No se encontraron carpetas en la raíz de Google Drive.")
         else:
             st.info("👆 Conéctate primero en la pestaña 'Conexión Drive'")
-    # Pestañas vacías (2-9)
-    for i in range(2, 10):
+    # Pestaña 2: Conformidad con las plantillas institucionales
+    with tabs[2]:
+        st.header("📐 Conformidad de Plantillas")
+        template_store = get_template_store()
+        st.subheader("Plantillas aprobadas")
+        approved_file = st.file_uploader("Sube una plantilla aprobada (.pptx o .potx)", type=["pptx", "potx"])
+        if approved_file is not None and st.button("✅ Aprobar plantilla"):
+            try:
+                parts = template_store.register_template(os.path.splitext(approved_file.name)[0], approved_file.getvalue())
+                st.success(f"Plantilla '{approved_file.name}' aprobada ({parts} patrones y diseños)")
+            except Exception as e:
+                st.error(f"❌ No se pudo aprobar la plantilla: {str(e)}")
+        approved_templates = template_store.approved_templates()
+        st.dataframe(approved_templates, hide_index=True)
+        if approved_templates:
+            template_to_remove = st.selectbox("Retirar una plantilla", [t['plantilla'] for t in approved_templates],
+                                              index=None, placeholder="Elige una plantilla...")
+            if template_to_remove and st.button("🗑️ Retirar plantilla"):
+                template_store.remove_template(template_to_remove)
+                st.rerun()
+        selected_files = st.session_state.get('selected_files', [])
+        if st.session_state.get('connected', False) and selected_files:
+            if st.button(f"📐 Revisar la plantilla de {len(selected_files)} archivo(s) seleccionado(s)", type="primary",
+                         help="Cada plantilla distinta se analiza una sola vez; el resto de archivos reutiliza su veredicto"):
+                job_queue = get_job_queue()
+                st.session_state.template_job_id = job_queue.submit(
+                    'template_conformance',
+                    {'files': selected_files},
+                    submitted_by=st.session_state.current_user,
+                )
+                ensure_audit_worker(job_queue)
+        else:
+            st.info("👆 Selecciona archivos en la pestaña 'URL' para revisar su plantilla")
+        if st.session_state.get('template_job_id'):
+            audit_job_panel(st.session_state.template_job_id)
+        st.subheader("Plantillas encontradas")
+        st.dataframe(template_store.template_summary(), hide_index=True)
+        st.subheader("Presentaciones fuera de la plantilla")
+        st.dataframe(template_store.non_conforming_decks(), hide_index=True)
+    # Pestaña 4: Inventario de imágenes
+    with tabs[4]:
+        st.header("🖼️ Inventario de Imágenes")
+        selected_files = st.session_state.get('selected_files', [])
+        if st.session_state.get('connected', False) and selected_files:
+            if st.button(f"🖼️ Inventariar imágenes de {len(selected_files)} archivo(s) seleccionado(s)", type="primary"):
+                job_queue = get_job_queue()
+                st.session_state.image_job_id = job_queue.submit(
+                    'image_inventory',
+                    {'files': selected_files},
+                    submitted_by=st.session_state.current_user,
+                )
+                ensure_audit_worker(job_queue)
+        else:
+            st.info("👆 Selecciona archivos en la pestaña 'URL' para inventariar sus imágenes")
+        if st.session_state.get('image_job_id'):
+            audit_job_panel(st.session_state.image_job_id)
+        image_index = get_image_index()
+        image_summary = image_index.summary()
+        col_images, col_files, col_heavy, col_low = st.columns(4)
+        col_images.metric("Imágenes inventariadas", image_summary['imagenes'])
+        col_files.metric("Presentaciones", image_summary['archivos'])
+        col_heavy.metric("Pesadas o sobredimensionadas", image_summary['sobredimensionadas'])
+        col_low.metric("Baja resolución", image_summary['baja_resolucion'])
+        st.subheader("Imágenes repetidas entre presentaciones")
+        max_distance = st.slider(
+            "Tolerancia de similitud", min_value=0, max_value=12, value=4,
+            help="Bits distintos permitidos entre hashes perceptuales (0 = idénticas a la vista)"
+        )
+        st.dataframe(image_index.duplicate_groups(max_distance), hide_index=True)
+        issue = st.selectbox("Observación", ["pesada", "sobredimensionada", "baja resolución", "sin uso en diapositivas"])
+        st.dataframe(image_index.images_with_issue(issue), hide_index=True)
+    # Pestaña 5: Peso de las presentaciones por tipo de parte
+    with tabs[5]:
+        st.header("📦 Peso de los Archivos")
+        selected_files = st.session_state.get('selected_files', [])
+        if st.session_state.get('connected', False) and selected_files:
+            if st.button(f"📦 Analizar el peso de {len(selected_files)} archivo(s) seleccionado(s)", type="primary",
+                         help="Lee solo el índice del ZIP de cada archivo, sin descargarlo completo"):
+                job_queue = get_job_queue()
+                st.session_state.archive_job_id = job_queue.submit(
+                    'archive_breakdown',
+                    {'files': selected_files},
+                    submitted_by=st.session_state.current_user,
+                )
+                ensure_audit_worker(job_queue)
+        else:
+            st.info("👆 Selecciona archivos en la pestaña 'URL' para analizar su peso")
+        if st.session_state.get('archive_job_id'):
+            audit_job_panel(st.session_state.archive_job_id)
+        archive_index = get_archive_index()
+        st.subheader("Peso por tipo de parte")
+        st.dataframe(archive_index.category_totals(), hide_index=True)
+        st.subheader("Presentaciones más pesadas")
+        st.dataframe(archive_index.ranking(), hide_index=True)
+    # Pestaña 8: Inventario de videos y audios
+    with tabs[8]:
+        st.header("🎬 Videos y Audios")
+        selected_files = st.session_state.get('selected_files', [])
+        if st.session_state.get('connected', False) and selected_files:
+            if st.button(f"🎬 Inventariar multimedia de {len(selected_files)} archivo(s) seleccionado(s)", type="primary"):
+                job_queue = get_job_queue()
+                st.session_state.media_job_id = job_queue.submit(
+                    'media_inventory',
+                    {'files': selected_files},
+                    submitted_by=st.session_state.current_user,
+                )
+                ensure_audit_worker(job_queue)
+        else:
+            st.info("👆 Selecciona archivos en la pestaña 'URL' para inventariar sus videos y audios")
+        if st.session_state.get('media_job_id'):
+            audit_job_panel(st.session_state.media_job_id)
+        media_index = get_media_index()
+        st.subheader("Formatos encontrados")
+        st.dataframe(media_index.format_summary(), hide_index=True)
+        st.subheader("Videos y audios con observaciones")
+        st.dataframe(media_index.items_with_issues(), hide_index=True)
+    # Pestaña 7: Secuencia de diapositivas leída del índice compartido (sin descargar lo ya indexado)
+    with tabs[7]:
+        st.header("🧭 Secuencia de Diapositivas")
+        selected_files = st.session_state.get('selected_files', [])
+        if st.session_state.get('connected', False) and selected_files:
+            selected = st.selectbox(
+                "Presentación", options=range(len(selected_files)),
+                format_func=lambda index: selected_files[index]['name'], key="sequence_file"
+            )
+            file = selected_files[selected]
+            slide_index_cache = get_slide_index_cache()
+            # Leer el índice cacheado es inmediato; descargar y analizar solo a pedido
+            slide_index = slide_index_cache.get(file_content_key(file))
+            if slide_index is None and st.button("🧭 Indexar presentación", key="sequence_build"):
+                from pptx_analyzer import ExtractionLimitExceeded
+                try:
+                    with st.spinner(f"🧭 Descargando y analizando {file['name']}..."):
+                        slide_index = slide_index_cache.get_or_build(
+                            file, lambda: st.session_state.drive_manager.download_file(file['id'])
+                        )
+                    if slide_index is None:
+                        st.warning(f"⚠️ No se pudo descargar {file['name']}")
+                except ExtractionLimitExceeded as e:
+                    st.warning(f"⚠️ {file['name']} supera los límites de análisis: {str(e)}")
+                except Exception as e:
+                    st.error(f"❌ No se pudo indexar {file['name']}: {str(e)}")
+            elif slide_index is None:
+                st.info("Esta presentación aún no está indexada: las auditorías completas la indexan al procesarla")
+            if slide_index:
+                untitled = [slide['number'] for slide in slide_index['slides'] if not slide['title'].strip()]
+                if untitled:
+                    st.warning(f"⚠️ {len(untitled)} diapositiva(s) sin título: {', '.join(map(str, untitled))}")
+                st.dataframe(
+                    [{'Diapositiva': slide['number'], 'Título': slide['title'], 'Diseño': slide['layout'],
+                      'Formas con texto': len(slide['shapes']), 'Notas': '✅' if slide['notes'].strip() else ''}
+                     for slide in slide_index['slides']],
+                    hide_index=True
+                )
+        else:
+            st.info("👆 Selecciona archivos en la pestaña 'URL' para ver la secuencia de sus diapositivas")
+    # Pestañas vacías
+    for i in (3, 6):
         with tabs[i]:
             st.header(f"🚧 {tab_names[i]}")
             st.info("Esta sección estará disponible próximamente.")
+    # Pestaña 9: Historial de auditorías desde el almacén local
+    with tabs[9]:
+        st.header("📊 Datos de Auditorías")
+        audit_store = get_audit_store()
+        sync_status = audit_store.sync_status()
+        col_total, col_synced, col_pending, col_errors = st.columns(4)
+        col_total.metric("Ocurrencias", sync_status['total'])
+        col_synced.metric("Sincronizadas", sync_status['sincronizadas'])
+        col_pending.metric("Pendientes de Supabase", sync_status['pendientes'])
+        col_errors.metric("Con error de envío", sync_status['con_error'])
+        st.subheader("🔎 ¿Dónde se usa esta URL o dominio?")
+        url_query = st.text_input(
+            "URL o dominio",
+            placeholder="https://recurso.com/pagina o recurso.com",
+            help="Un dominio incluye sus subdominios (p. ej. 'google.com' encuentra 'docs.google.com')"
+        )
+        if url_query:
+            references = get_url_index().lookup(url_query)
+            st.write(f"**{len(references)}** referencia(s) en "
+                     f"**{len({reference['file_id'] for reference in references})}** presentación(es)")
+            st.dataframe(references, hide_index=True)
+        only_mine = st.checkbox("Solo mis auditorías", value=False)
+        processed_by = st.session_state.current_user if only_mine else None
+        st.subheader("Estados de validación")
+        st.dataframe(audit_store.status_summary(processed_by), hide_index=True)
+        st.subheader("Dominios más frecuentes")
+        st.dataframe(audit_store.domain_summary(processed_by), hide_index=True)
+        st.subheader("Archivos con URLs rotas")
+        st.dataframe(audit_store.problematic_files(processed_by), hide_index=True)
+        st.subheader("📤 Exportar historial")
+        export_controls(
+            "store",
+            lambda: audit_store.iter_chunks(processed_by),
+            f"historial_{processed_by}" if processed_by else "historial",
+        )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Módulo con el desglose del peso de las presentaciones por tipo de parte, usando solo los metadatos del ZIP
+"""
+
+import io
+import json
+import sqlite3
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from audit_store import AUDIT_STORE_DB_PATH
+from drive_range import RangeReadError
+
+# Prefijo de la parte -> categoría; el resto de partes cuenta como 'otros'
+PART_CATEGORIES = (
+    ('ppt/media/', 'multimedia'),
+    ('ppt/embeddings/', 'incrustados'),
+    ('ppt/fonts/', 'fuentes'),
+    ('ppt/slides/', 'diapositivas'),
+    ('ppt/notesSlides/', 'notas'),
+    ('ppt/slideLayouts/', 'diseños'),
+    ('ppt/slideMasters/', 'patrones'),
+    ('ppt/theme/', 'temas'),
+)
+
+CATEGORIES = tuple(category for _, category in PART_CATEGORIES) + ('otros',)
+
+
+def part_category(name):
+    for prefix, category in PART_CATEGORIES:
+        if name.startswith(prefix):
+            return category
+    return 'otros'
+
+
+def archive_breakdown(source, top_parts=5):
+    """
+    Peso comprimido y descomprimido de una presentación por categoría de parte
+
+    Solo se lee el directorio central del ZIP: con un DriveRangeFile son una o dos
+    lecturas por rango aunque la presentación pese varios GB
+
+    Args:
+        source: Ruta, contenido en bytes u objeto de archivo con seek
+        top_parts: Partes más pesadas que se incluyen en el resultado
+
+    Returns:
+        dict: 'parts', 'compressed', 'uncompressed', 'categories' (categoría -> 'parts',
+        'compressed', 'uncompressed') y 'largest' (lista de (parte, comprimido, descomprimido))
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    categories = {category: {'parts': 0, 'compressed': 0, 'uncompressed': 0} for category in CATEGORIES}
+    with zipfile.ZipFile(source, 'r') as zip_file:
+        infos = [info for info in zip_file.infolist() if not info.is_dir()]
+    for info in infos:
+        totals = categories[part_category(info.filename)]
+        totals['parts'] += 1
+        totals['compressed'] += info.compress_size
+        totals['uncompressed'] += info.file_size
+
+    largest = sorted(infos, key=lambda info: info.compress_size, reverse=True)[:top_parts]
+    return {
+        'parts': len(infos),
+        'compressed': sum(info.compress_size for info in infos),
+        'uncompressed': sum(info.file_size for info in infos),
+        'categories': categories,
+        'largest': [(info.filename, info.compress_size, info.file_size) for info in largest],
+    }
+
+
+class ArchiveIndex:
+    """Desglose persistente del peso de cada presentación, para ordenarlas por exceso de peso"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or AUDIT_STORE_DB_PATH
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS archive_breakdown (
+                    file_id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    subfolder TEXT,
+                    parts INTEGER,
+                    compressed_bytes INTEGER,
+                    uncompressed_bytes INTEGER,
+                    media_bytes INTEGER,
+                    embeddings_bytes INTEGER,
+                    fonts_bytes INTEGER,
+                    categories TEXT,
+                    largest_part TEXT,
+                    fetched_bytes INTEGER,
+                    analyzed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_archive_breakdown_size ON archive_breakdown(compressed_bytes);
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, file, breakdown, fetched_bytes):
+        """Guardar (o reemplazar) el desglose de un archivo"""
+        categories = breakdown['categories']
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archive_breakdown (file_id, filename, subfolder, parts, compressed_bytes, "
+                "uncompressed_bytes, media_bytes, embeddings_bytes, fonts_bytes, categories, largest_part, "
+                "fetched_bytes, analyzed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file['id'], file['name'], file.get('subfolder', ''), breakdown['parts'],
+                    breakdown['compressed'], breakdown['uncompressed'], categories['multimedia']['compressed'],
+                    categories['incrustados']['compressed'], categories['fuentes']['compressed'],
+                    json.dumps(categories), breakdown['largest'][0][0] if breakdown['largest'] else '',
+                    fetched_bytes, datetime.utcnow().isoformat(),
+                )
+            )
+
+    def ranking(self, limit=200):
+        """Presentaciones más pesadas, con la proporción de multimedia, incrustados y fuentes"""
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT filename AS archivo, subfolder AS carpeta, parts AS partes,
+                       ROUND(compressed_bytes / 1048576.0, 1) AS mb,
+                       ROUND(uncompressed_bytes / 1048576.0, 1) AS mb_descomprimido,
+                       ROUND(100.0 * media_bytes / MAX(compressed_bytes, 1), 1) AS pct_multimedia,
+                       ROUND(100.0 * embeddings_bytes / MAX(compressed_bytes, 1), 1) AS pct_incrustados,
+                       ROUND(100.0 * fonts_bytes / MAX(compressed_bytes, 1), 1) AS pct_fuentes,
+                       largest_part AS parte_mas_pesada
+                FROM archive_breakdown ORDER BY compressed_bytes DESC LIMIT ?
+            """, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def category_totals(self):
+        """Peso total por categoría de parte entre todas las presentaciones analizadas"""
+        totals = {category: {'parts': 0, 'compressed': 0, 'uncompressed': 0} for category in CATEGORIES}
+        with self._connection() as conn:
+            for row in conn.execute("SELECT categories FROM archive_breakdown"):
+                for category, values in json.loads(row['categories']).items():
+                    for key in ('parts', 'compressed', 'uncompressed'):
+                        totals[category][key] += values[key]
+        return [
+            {'categoria': category, 'partes': values['parts'],
+             'mb': round(values['compressed'] / 1048576, 1),
+             'mb_descomprimido': round(values['uncompressed'] / 1048576, 1)}
+            for category, values in sorted(totals.items(), key=lambda item: -item[1]['compressed'])
+        ]
+
+
+class ArchiveAnalysisRun:
+    """Desglose del peso de un lote de archivos de Drive leyendo solo el directorio central de cada ZIP"""
+
+    def __init__(self, drive_manager, archive_index, progress_callback=None, rows_callback=None, max_workers=8):
+        """
+        Args:
+            drive_manager: GoogleDriveManager autenticado (cada hilo usa su propia copia)
+            archive_index: ArchiveIndex donde se guardan los desgloses
+            progress_callback: Función (fracción 0-1, mensaje) para informar avance
+            rows_callback: Función que recibe la fila de cada archivo en cuanto está lista
+            max_workers: Archivos analizados a la vez (cada uno son pocas lecturas por rango pequeñas)
+        """
+        self.drive_manager = drive_manager
+        self.archive_index = archive_index
+        self.progress_callback = progress_callback
+        self.rows_callback = rows_callback
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._done = 0
+
+    def run(self, files):
+        """
+        Analizar una lista de archivos
+
+        Returns:
+            dict: 'summary' y 'messages'
+        """
+        self._done = 0
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            results = list(executor.map(lambda file: self._analyze(file, len(files)), files))
+
+        messages = [message for _, _, message in results if message]
+        analyzed = [(breakdown, fetched) for breakdown, fetched, _ in results if breakdown]
+        total_bytes = sum(breakdown['compressed'] for breakdown, _ in analyzed)
+        fetched_bytes = sum(fetched for _, fetched in analyzed)
+        self._report(1.0, "Análisis de archivos completado")
+        messages.append(('info', f"📦 {len(analyzed)} archivo(s) analizados: {total_bytes / 1048576:.1f} MB en total, "
+                                 f"leyendo solo {fetched_bytes / 1048576:.1f} MB de Drive"))
+        return {
+            'summary': {'files': len(analyzed), 'total_bytes': total_bytes, 'fetched_bytes': fetched_bytes},
+            'messages': messages,
+        }
+
+    def _analyze(self, file, total):
+        """(desglose, bytes leídos de Drive, mensaje) de un archivo"""
+        breakdown, fetched, message = None, 0, None
+        try:
+            drive_manager = self._thread_drive_manager()
+            try:
+                range_file = drive_manager.open_ranged(file)
+                breakdown = archive_breakdown(range_file)
+                fetched = range_file.bytes_fetched
+            except RangeReadError as e:
+                # Sin lectura por rangos (p. ej. un proxy que la ignora): se descarga el archivo completo;
+                # los errores del contenido (ZIP inválido...) no se repiten con otra descarga
+                print(f"Lectura por rangos no disponible para {file['name']}: {str(e)}")
+                content = drive_manager.download_file(file['id'])
+                if not content:
+                    raise ValueError("no se pudo descargar")
+                breakdown = archive_breakdown(content)
+                fetched = len(content)
+            self.archive_index.record(file, breakdown, fetched)
+            if self.rows_callback:
+                self.rows_callback([self._build_row(file, breakdown)])
+        except zipfile.BadZipFile:
+            message = ('warning', f"⚠️ {file['name']} no es un archivo ZIP (¿.ppt binario?): sin desglose por partes")
+        except Exception as e:
+            message = ('error', f"❌ No se pudo analizar {file['name']}: {str(e)}")
+        with self._lock:
+            self._done += 1
+            done = self._done
+        self._report(done / max(total, 1), f"{done}/{total} archivos analizados")
+        return breakdown, fetched, message
+
+    def _thread_drive_manager(self):
+        """Cliente de Drive propio del hilo actual"""
+        if getattr(self._local, 'drive_manager', None) is None:
+            self._local.drive_manager = self.drive_manager.thread_copy()
+        return self._local.drive_manager
+
+    @staticmethod
+    def _build_row(file, breakdown):
+        categories = breakdown['categories']
+        row = {
+            'Archivo': file['name'],
+            'Subcarpeta': file.get('subfolder', ''),
+            'Partes': breakdown['parts'],
+            'Tamaño (MB)': round(breakdown['compressed'] / 1048576, 2),
+            'Descomprimido (MB)': round(breakdown['uncompressed'] / 1048576, 2),
+        }
+        for category in ('multimedia', 'incrustados', 'fuentes', 'diapositivas', 'diseños'):
+            row[f"{category.capitalize()} (MB)"] = round(categories[category]['compressed'] / 1048576, 2)
+        row['Parte más pesada'] = breakdown['largest'][0][0] if breakdown['largest'] else ''
+        return row
+
+    def _report(self, fraction, message):
+        if self.progress_callback:
+            self.progress_callback(fraction, message)
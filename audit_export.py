@@ -0,0 +1,118 @@
+"""
+Módulo con la exportación de resultados de auditoría a CSV y Excel en streaming (memoria acotada)
+"""
+
+import csv
+import os
+import tempfile
+
+# Filas máximas de datos por hoja de Excel (la hoja admite 1.048.576 contando el encabezado)
+XLSX_MAX_ROWS_PER_SHEET = 1_048_575
+
+# Tamaño máximo de un archivo exportado: st.download_button lo carga entero en la memoria del servidor
+EXPORT_MAX_BYTES = int(os.environ.get('EXPORT_MAX_BYTES', 200 * 1024 * 1024))
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+}
+
+
+class ExportTooLarge(Exception):
+    """El archivo exportado supera el tamaño máximo de descarga"""
+
+
+def write_csv(chunks, path, max_bytes=None):
+    """
+    Escribir bloques de filas (listas de dict) en un CSV, bloque a bloque
+
+    Args:
+        max_bytes: Se deja de escribir en cuanto el archivo lo supera (ExportTooLarge)
+
+    Returns:
+        int: Filas escritas
+    """
+    written = 0
+    writer = None
+    # utf-8-sig para que Excel reconozca los acentos al abrir el CSV
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        for chunk in chunks:
+            for row in chunk:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row), extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(row)
+                written += 1
+            if max_bytes and f.tell() > max_bytes:
+                raise ExportTooLarge(f"La exportación supera el límite de {max_bytes / 1048576:.0f} MB")
+    return written
+
+
+def write_xlsx(chunks, path, sheet_name='Resultados'):
+    """
+    Escribir bloques de filas en un Excel con xlsxwriter en modo constant_memory
+
+    En ese modo cada fila se vuelca al disco al pasar a la siguiente, así que la
+    memoria no depende del número de filas; al llenarse una hoja se abre otra
+
+    Returns:
+        int: Filas escritas
+    """
+    import xlsxwriter
+
+    written = 0
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+    try:
+        header_format = workbook.add_format({'bold': True})
+        worksheet = None
+        columns = None
+        sheet_row = 0
+        for chunk in chunks:
+            for row in chunk:
+                if columns is None:
+                    columns = list(row)
+                if worksheet is None or sheet_row > XLSX_MAX_ROWS_PER_SHEET:
+                    sheet_number = len(workbook.worksheets()) + 1
+                    worksheet = workbook.add_worksheet(sheet_name if sheet_number == 1 else f"{sheet_name} {sheet_number}")
+                    worksheet.write_row(0, 0, columns, header_format)
+                    sheet_row = 1
+                worksheet.write_row(sheet_row, 0, ['' if row.get(column) is None else row.get(column) for column in columns])
+                sheet_row += 1
+                written += 1
+        if worksheet is None:
+            workbook.add_worksheet(sheet_name)
+    finally:
+        workbook.close()
+    return written
+
+
+def export_to_file(chunks, export_format, max_bytes=None):
+    """
+    Exportar bloques de filas a un archivo temporal
+
+    Args:
+        chunks: Iterable de listas de filas (dict), p. ej. AuditStore.iter_chunks()
+        export_format: 'csv' o 'xlsx'
+        max_bytes: Tamaño máximo del archivo; si lo supera se borra y se lanza ExportTooLarge
+
+    Returns:
+        tuple: (ruta del archivo, filas escritas); quien llama borra el archivo
+    """
+    _, suffix = EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(prefix='isilaudit_export_', suffix=suffix)
+    os.close(fd)
+    try:
+        if export_format == 'csv':
+            written = write_csv(chunks, path, max_bytes)
+        else:
+            # constant_memory no permite saber el tamaño del Excel hasta cerrarlo
+            written = write_xlsx(chunks, path)
+        size = os.path.getsize(path)
+        if max_bytes and size > max_bytes:
+            raise ExportTooLarge(
+                f"La exportación ocupa {size / 1048576:.1f} MB y supera el límite de {max_bytes / 1048576:.0f} MB"
+            )
+        return path, written
+    except Exception:
+        os.remove(path)
+        raise
@@ -0,0 +1,273 @@
+"""
+Módulo con el pipeline de auditoría de URLs (descarga, extracción, validación y guardado)
+"""
+
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import groupby
+from urllib.parse import urlparse
+
+from audit_store import audit_key
+from batch_checkpoint import file_content_key
+from hyperlink_index import index_external_hyperlinks
+from link_validator import LinkValidator, ValidationCache, canonicalize_url
+from ppt_legacy import is_legacy_ppt
+from pptx_analyzer import PPTXURLExtractor
+from url_index import slide_and_shape
+
+
+class URLAuditPipeline:
+    """Ejecuta la auditoría de URLs de un lote de archivos, sin depender de la interfaz"""
+
+    def __init__(self, drive_manager, processed_by, supabase=None, extractor=None,
+                 validator=None, progress_callback=None, checkpoints=None, run_id=None,
+                 rows_callback=None, fast_mode=False, store=None, url_index=None,
+                 slide_index_cache=None, profiler=None):
+        """
+        Args:
+            drive_manager: GoogleDriveManager autenticado
+            processed_by: Usuario que solicitó la auditoría
+            supabase: Cliente Supabase opcional para guardar los resultados (solo si no hay store)
+            extractor: PPTXURLExtractor a usar (por defecto uno nuevo)
+            validator: LinkValidator a usar (por defecto uno nuevo)
+            progress_callback: Función (fracción 0-1, mensaje) para informar avance
+            checkpoints: CheckpointStore para reanudar la ejecución run_id desde el último archivo terminado
+            run_id: Identificador de la ejecución (p. ej. el ID del trabajo en la cola)
+            rows_callback: Función que recibe cada grupo de filas en cuanto está listo
+            fast_mode: Solo hipervínculos externos del índice de relaciones (sin python-pptx),
+                para una primera revisión rápida de muchos archivos
+            store: AuditStore local donde se guardan los resultados; SupabaseSync los envía después
+            url_index: URLIndex que se actualiza con las URLs de cada archivo auditado
+            slide_index_cache: SlideIndexCache donde se deja el índice de diapositivas de cada
+                archivo descargado, para que otras auditorías no vuelvan a descargarlo
+            profiler: FileProfiler opcional; guarda el perfil (descarga, extracción y validación)
+                de cada archivo que tarde más que su umbral
+        """
+        self.drive_manager = drive_manager
+        self.processed_by = processed_by
+        self.supabase = supabase
+        self.extractor = extractor or PPTXURLExtractor()
+        self.validator = validator or LinkValidator()
+        self.progress_callback = progress_callback
+        self.checkpoints = checkpoints
+        self.run_id = run_id
+        self.rows_callback = rows_callback
+        self.fast_mode = fast_mode
+        self.store = store
+        self.url_index = url_index
+        self.slide_index_cache = slide_index_cache
+        self.profiler = profiler
+        self._run_key = run_id
+        self.messages = []  # (nivel, texto) con nivel 'info', 'warning' o 'error'
+
+    def run(self, files, validations=None):
+        """
+        Auditar las URLs de una lista de archivos de Drive
+
+        Args:
+            files: Archivos de Drive a auditar
+            validations: ValidationCache compartida con otras ejecuciones (p. ej. varias
+                carpetas auditadas a la vez); por defecto una nueva para el lote
+
+        Returns:
+            dict: 'rows' (filas de resultados), 'summary', 'messages' y 'hosts_down'
+        """
+        self.messages = []
+        # Sin run_id cada ejecución tiene claves propias: repetir la auditoría genera historial nuevo
+        self._run_key = self.run_id if self.run_id is not None else uuid.uuid4().hex
+        rows = []
+        validations = ValidationCache() if validations is None else validations  # Compartida por todo el lote
+        occurrences = 0
+        resumed_files = 0
+
+        for idx, file in enumerate(files):
+            self._report(idx / max(len(files), 1), f"Descargando y analizando: {file['name']}")
+
+            # Archivos ya terminados en una ejecución anterior: sin descargar ni validar de nuevo
+            checkpoint = self.checkpoints.get(self.run_id, file) if self.checkpoints else None
+            if checkpoint is not None:
+                rows.extend(checkpoint['rows'])
+                self._emit_rows(checkpoint['rows'])
+                self.messages.extend(tuple(message) for message in checkpoint['messages'])
+                occurrences += len(checkpoint['rows'])
+                resumed_files += 1
+                continue
+
+            with self.profiler.profile(file['id'], file['name']) if self.profiler else nullcontext():
+                file_result = self._process_file(file, validations)
+            rows.extend(file_result['rows'])
+            self.messages.extend(file_result['messages'])
+            occurrences += len(file_result['rows'])
+            # Un archivo que no se pudo descargar no cuenta como terminado
+            if self.checkpoints and file_result['downloaded']:
+                self.checkpoints.save(self.run_id, file, file_result)
+
+        self._report(1.0, "Auditoría completada")
+        if resumed_files:
+            self.messages.append(('info', f"🔁 {resumed_files} archivo(s) reanudados desde checkpoint"))
+
+        return {
+            'rows': rows,
+            'summary': {
+                'files': len(files),
+                'resumed_files': resumed_files,
+                'occurrences': occurrences,
+                'unique_urls': len(validations),
+                'requests_saved': occurrences - len(validations),
+            },
+            'messages': self.messages,
+            'hosts_down': [h for h in self.validator.get_host_summary() if h['circuito_abierto']],
+        }
+
+    def _process_file(self, file, validations):
+        """Extraer, validar y guardar un archivo; valida solo las URLs canónicas aún no vistas en el lote"""
+        file_messages = []
+        pptx_bytes = self.drive_manager.download_file(file['id'])
+        if not pptx_bytes:
+            file_messages.append(('warning', f"No se pudo descargar {file['name']}"))
+            return {'rows': [], 'messages': file_messages, 'downloaded': False}
+
+        # Los .ppt binarios no tienen relaciones OOXML: siempre usan el análisis completo
+        if self.fast_mode and not is_legacy_ppt(pptx_bytes):
+            url_batches, status = self._fast_url_batches(pptx_bytes)
+        else:
+            url_batches, status = self.extractor.iter_url_batches(pptx_bytes), None
+
+        # Cada diapositiva se valida y publica en cuanto se extrae
+        rows = []
+        index_entries = []
+        for slide_num, url_batch in url_batches:
+            # URLs que otra carpeta ya está validando se esperan en lugar de pedirse otra vez
+            results = validations.validate_many(self.validator, [url_info['url'] for url_info in url_batch])
+            records = [
+                self._build_record(file, url_info, results[canonicalize_url(url_info['url'])], slide_num)
+                for url_info in url_batch
+            ]
+            self._save_records(records, file_messages)
+            index_entries.extend(
+                (dict(url_info, slide_number=record['slide_number']), results[canonicalize_url(url_info['url'])][0])
+                for url_info, record in zip(url_batch, records)
+            )
+            batch_rows = [
+                self._build_row(file, record, results[canonicalize_url(record['url'])][0])
+                for record in records
+            ]
+            rows.extend(batch_rows)
+            self._emit_rows(batch_rows)
+
+        # El modo rápido evita python-pptx, así que no construye el índice de diapositivas
+        if self.slide_index_cache and not self.fast_mode:
+            self._index_slides(file, pptx_bytes, file_messages)
+
+        if self.url_index:
+            try:
+                self.url_index.replace_file(file, index_entries)
+            except Exception as e:
+                file_messages.append(('error', f"❌ Error al actualizar el índice de URLs: {str(e)}"))
+
+        file_messages.append(('info', f"🔗 {len(rows)} URLs extraídas de {file['name']}"))
+        status = status or self.extractor.last_status
+        if status['status'] == 'parcial':
+            file_messages.append(('warning', f"⚠️ Resultado parcial para {file['name']}: {status['reason']}"))
+        elif status['status'] == 'error':
+            file_messages.append(('error', f"❌ No se pudo analizar {file['name']}: {status['reason']}"))
+        return {'rows': rows, 'messages': file_messages, 'downloaded': True}
+
+    def _index_slides(self, file, pptx_bytes, messages):
+        """Guardar el índice de diapositivas a partir de la presentación que ya abrió (con sus límites) el extractor"""
+        prs, self.extractor.last_presentation = self.extractor.last_presentation, None
+        # Sin presentación el extractor rechazó el archivo por sus límites: no se vuelve a abrir
+        if prs is None and not is_legacy_ppt(pptx_bytes):
+            return
+        try:
+            self.slide_index_cache.ensure(file_content_key(file), pptx_bytes, prs=prs)
+        except Exception as e:
+            messages.append(('warning', f"⚠️ No se pudo indexar el texto de {file['name']}: {str(e)}"))
+
+    def _fast_url_batches(self, pptx_bytes):
+        """Hipervínculos externos del índice de relaciones agrupados por diapositiva, con su estado"""
+        try:
+            hyperlinks = index_external_hyperlinks(pptx_bytes)
+        except Exception as e:
+            return [], {'status': 'error', 'reason': str(e)}
+        batches = [
+            (slide_num, list(links))
+            for slide_num, links in groupby(hyperlinks, key=lambda link: link['slide_number'])
+        ]
+        return batches, {'status': 'completo', 'reason': ''}
+
+    def _build_record(self, file, url_info, validation, slide_num=0):
+        """
+        Ocurrencia con el formato de la tabla validated_urls
+
+        slide_num es la diapositiva del lote; los lotes del ZIP completo (0) la toman de la
+        ubicación ('Diapositiva N - ...') y, si tampoco está, quedan con 0 (fuera de las diapositivas)
+        """
+        url = url_info['url']
+        status, status_desc = validation
+        # Dominio
+        try:
+            url_domain = urlparse(url).netloc
+        except Exception:
+            url_domain = ''
+
+        record = {
+            'filename': file['name'],
+            'slide_number': url_info.get('slide_number') or slide_num or slide_and_shape(url_info)[0],
+            'url': url,
+            'url_domain': url_domain,
+            'location_context': url_info.get('location', ''),
+            'text_context': url_info.get('context', ''),
+            'status': str(status) if status else 'Error',
+            'status_description': status_desc,
+            'checked_at': datetime.utcnow().isoformat(),
+            'subfolder': file.get('subfolder', ''),
+            'processed_by': self.processed_by,
+        }
+        record['audit_key'] = audit_key(self._run_key, file.get('id', file['name']), record)
+        return record
+
+    def _save_records(self, records, messages):
+        """Guardar ocurrencias en el almacén local o, sin él, directamente en Supabase"""
+        if not records:
+            return
+        if self.store:
+            # Escritura local inmediata: la lentitud o caída de Supabase no frena la auditoría
+            try:
+                self.store.record(records)
+            except Exception as e:
+                messages.append(('error', f"❌ Error al guardar en el almacén local: {str(e)}"))
+            return
+
+        if not self.supabase:
+            return
+        for record in records:
+            data = {key: value for key, value in record.items() if key != 'audit_key'}
+            try:
+                result = self.supabase.table('validated_urls').insert(data).execute()
+                if not result.data:
+                    messages.append(('warning', f"⚠️ Supabase: Inserción sin datos para URL: {record['url'][:50]}..."))
+            except Exception as e:
+                # Continuar con el procesamiento sin detener todo
+                messages.append(('error', f"❌ Error Supabase: {str(e)}"))
+
+    def _build_row(self, file, record, status):
+        """Fila de resultados para la interfaz a partir de una ocurrencia"""
+        return {
+            'Archivo': file['name'],
+            'URL': record['url'],
+            'Dominio': record['url_domain'],
+            'Estado': status,
+            'Descripción': record['status_description'],
+            'Ubicación': record['location_context'],
+            'Contexto': record['text_context'],
+        }
+
+    def _emit_rows(self, rows):
+        if self.rows_callback and rows:
+            self.rows_callback(rows)
+
+    def _report(self, fraction, message):
+        if self.progress_callback:
+            self.progress_callback(fraction, message)
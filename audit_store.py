@@ -0,0 +1,234 @@
+"""
+Módulo con el almacén local de auditorías (SQLite) y su sincronización diferida con Supabase
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Ruta de la base de datos local de resultados
+AUDIT_STORE_DB_PATH = os.environ.get('AUDIT_STORE_DB', 'audit_store.db')
+
+# Columnas de validated_urls que se envían a Supabase
+SYNC_COLUMNS = (
+    'audit_key', 'filename', 'slide_number', 'url', 'url_domain', 'location_context',
+    'text_context', 'status', 'status_description', 'checked_at', 'subfolder', 'processed_by',
+)
+
+# Condición SQL de una URL rota (sin respuesta o con código de error)
+BROKEN_CONDITION = "(status = 'Error' OR CAST(status AS INTEGER) >= 400)"
+
+
+def audit_key(run_id, file_id, data):
+    """Clave idempotente de una ocurrencia: reenviarla nunca la duplica en Supabase"""
+    parts = (str(run_id), str(file_id), str(data.get('slide_number', '')),
+             data.get('url', ''), data.get('location_context', ''))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class AuditStore:
+    """Resultados de auditoría guardados primero en local; Supabase se sincroniza después"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or AUDIT_STORE_DB_PATH
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS validated_urls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    audit_key TEXT NOT NULL UNIQUE,
+                    filename TEXT NOT NULL,
+                    slide_number INTEGER NOT NULL DEFAULT 1,
+                    url TEXT NOT NULL,
+                    url_domain TEXT,
+                    location_context TEXT,
+                    text_context TEXT,
+                    status TEXT,
+                    status_description TEXT,
+                    checked_at TEXT,
+                    subfolder TEXT,
+                    processed_by TEXT,
+                    synced_at TEXT,
+                    sync_attempts INTEGER NOT NULL DEFAULT 0,
+                    next_sync_at REAL NOT NULL DEFAULT 0,
+                    last_sync_error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_local_urls_pending ON validated_urls(synced_at, next_sync_at);
+                CREATE INDEX IF NOT EXISTS idx_local_urls_domain ON validated_urls(url_domain);
+                CREATE INDEX IF NOT EXISTS idx_local_urls_filename ON validated_urls(filename);
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, records):
+        """Guardar ocurrencias (mismo formato que validated_urls, con audit_key); las repetidas se ignoran"""
+        if not records:
+            return
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO validated_urls ({', '.join(SYNC_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in SYNC_COLUMNS)})",
+                [tuple(record.get(column) for column in SYNC_COLUMNS) for record in records]
+            )
+
+    def pending(self, limit=500):
+        """Ocurrencias aún no sincronizadas cuyo próximo intento ya corresponde"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(SYNC_COLUMNS)} FROM validated_urls "
+                "WHERE synced_at IS NULL AND next_sync_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_synced(self, keys):
+        with self._connection() as conn:
+            conn.executemany(
+                "UPDATE validated_urls SET synced_at = ?, last_sync_error = NULL WHERE audit_key = ?",
+                [(datetime.utcnow().isoformat(), key) for key in keys]
+            )
+
+    def mark_failed(self, keys, error, base_delay=5.0, max_delay=600.0):
+        """Registrar un intento fallido y programar el siguiente con backoff exponencial"""
+        with self._connection() as conn:
+            conn.executemany(
+                "UPDATE validated_urls SET sync_attempts = sync_attempts + 1, last_sync_error = ?, "
+                "next_sync_at = ? + MIN(?, ? * (1 << MIN(sync_attempts, 16))) WHERE audit_key = ?",
+                [(error, time.time(), max_delay, base_delay, key) for key in keys]
+            )
+
+    def iter_chunks(self, processed_by=None, chunk_size=5000):
+        """Recorrer las ocurrencias guardadas en bloques (paginación por id, memoria acotada)"""
+        columns = [column for column in SYNC_COLUMNS if column != 'audit_key']
+        where = "AND processed_by = ?" if processed_by else ""
+        last_id = 0
+        while True:
+            params = (last_id,) + ((processed_by,) if processed_by else ()) + (chunk_size,)
+            with self._connection() as conn:
+                chunk = conn.execute(
+                    f"SELECT id, {', '.join(columns)} FROM validated_urls WHERE id > ? {where} ORDER BY id LIMIT ?",
+                    params
+                ).fetchall()
+            if not chunk:
+                return
+            last_id = chunk[-1]['id']
+            yield [{column: row[column] for column in columns} for row in chunk]
+
+    def sync_status(self):
+        """Conteo de ocurrencias sincronizadas, pendientes y con error de sincronización"""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) AS total,
+                       COUNT(synced_at) AS sincronizadas,
+                       SUM(CASE WHEN synced_at IS NULL THEN 1 ELSE 0 END) AS pendientes,
+                       SUM(CASE WHEN synced_at IS NULL AND last_sync_error IS NOT NULL THEN 1 ELSE 0 END) AS con_error
+                FROM validated_urls
+            """).fetchone()
+        return {key: row[key] or 0 for key in row.keys()}
+
+    def status_summary(self, processed_by=None):
+        """Ocurrencias por estado de validación"""
+        return self._query(
+            "SELECT COALESCE(status, 'Error') AS estado, COUNT(*) AS ocurrencias, "
+            "COUNT(DISTINCT url) AS urls_unicas FROM validated_urls {where} "
+            "GROUP BY estado ORDER BY ocurrencias DESC",
+            processed_by
+        )
+
+    def domain_summary(self, processed_by=None, limit=50):
+        """Dominios más frecuentes con su proporción de URLs rotas"""
+        return self._query(
+            "SELECT url_domain AS dominio, COUNT(*) AS ocurrencias, COUNT(DISTINCT filename) AS archivos, "
+            f"SUM(CASE WHEN {BROKEN_CONDITION} THEN 1 ELSE 0 END) AS rotas "
+            "FROM validated_urls {where} GROUP BY url_domain ORDER BY ocurrencias DESC LIMIT ?",
+            processed_by, (limit,)
+        )
+
+    def problematic_files(self, processed_by=None, limit=50):
+        """Archivos con más URLs rotas"""
+        return self._query(
+            "SELECT filename AS archivo, subfolder AS carpeta, COUNT(*) AS urls, "
+            f"SUM(CASE WHEN {BROKEN_CONDITION} THEN 1 ELSE 0 END) AS rotas, MAX(checked_at) AS ultima_revision "
+            "FROM validated_urls {where} GROUP BY filename, subfolder "
+            "HAVING rotas > 0 ORDER BY rotas DESC LIMIT ?",
+            processed_by, (limit,)
+        )
+
+    def _query(self, sql, processed_by, params=()):
+        where = "WHERE processed_by = ?" if processed_by else ""
+        values = ((processed_by,) if processed_by else ()) + tuple(params)
+        with self._connection() as conn:
+            return [dict(row) for row in conn.execute(sql.format(where=where), values).fetchall()]
+
+
+class SupabaseSync:
+    """Sincronización diferida (write-behind) del almacén local con la tabla validated_urls de Supabase"""
+
+    def __init__(self, store, supabase, batch_size=500, interval=5.0):
+        """
+        Args:
+            store: AuditStore de origen
+            supabase: Cliente Supabase
+            batch_size: Ocurrencias por solicitud a Supabase
+            interval: Segundos entre rondas de sincronización
+        """
+        self.store = store
+        self.supabase = supabase
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sync_once(self):
+        """Enviar todos los lotes pendientes; devuelve el número de ocurrencias sincronizadas"""
+        synced = 0
+        while True:
+            batch = self.store.pending(self.batch_size)
+            if not batch:
+                return synced
+            keys = [record['audit_key'] for record in batch]
+            try:
+                # upsert sobre audit_key: un lote reenviado tras un fallo no duplica filas
+                self.supabase.table('validated_urls').upsert(
+                    batch, on_conflict='audit_key', ignore_duplicates=True
+                ).execute()
+            except Exception as e:
+                self.store.mark_failed(keys, f"{type(e).__name__}: {str(e)}")
+                return synced
+            self.store.mark_synced(keys)
+            synced += len(batch)
+
+    def start(self):
+        """Sincronizar en un hilo de fondo hasta llamar a stop()"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self, flush=True):
+        """Detener el hilo de fondo, enviando antes lo pendiente si flush es True"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.sync_once()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"Error en la sincronización con Supabase: {str(e)}")
@@ -0,0 +1,264 @@
+"""
+Worker de auditorías en segundo plano: procesa los trabajos de la cola persistente
+
+Uso:
+    python audit_worker.py [--workers N] [--idle-exit SEGUNDOS]
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+from archive_breakdown import ArchiveAnalysisRun, ArchiveIndex
+from audit_store import AuditStore, SupabaseSync
+from file_profiler import FileProfiler
+from image_inventory import ImageIndex, ImageInventoryRun
+from job_queue import JobQueue
+from media_inventory import MediaIndex, MediaInventoryRun
+from slide_index import SlideIndexCache
+from template_conformance import TemplateConformanceRun, TemplateStore
+from url_index import URLIndex
+
+# Segundos entre consultas a la cola cuando no hay trabajos
+POLL_INTERVAL_SECONDS = 2
+
+# Segundos entre latidos de un trabajo en curso
+JOB_HEARTBEAT_SECONDS = 10
+
+
+class AuditWorker:
+    """Proceso worker: toma trabajos de la cola y ejecuta el pipeline de auditoría"""
+
+    def __init__(self, worker_id=None, queue=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.queue = queue or JobQueue()
+        self.drive_manager = None
+        self.supabase = None
+        # Los resultados se guardan en local; la sincronización con Supabase corre en segundo plano
+        self.store = AuditStore()
+        self.url_index = URLIndex()
+        self.slide_index_cache = SlideIndexCache()
+        self.image_index = ImageIndex()
+        self.media_index = MediaIndex()
+        self.archive_index = ArchiveIndex()
+        self.template_store = TemplateStore()
+        self.sync = None
+        self.handlers = {
+            'url_audit': self._run_url_audit,
+            'multi_root_audit': self._run_multi_root_audit,
+            'image_inventory': self._run_image_inventory,
+            'media_inventory': self._run_media_inventory,
+            'archive_breakdown': self._run_archive_breakdown,
+            'template_conformance': self._run_template_conformance,
+        }
+
+    def run(self, idle_exit=None):
+        """Bucle principal; termina tras idle_exit segundos sin trabajos (None = nunca)"""
+        last_job_at = time.monotonic()
+        try:
+            while True:
+                self.queue.worker_heartbeat(self.worker_id, os.getpid())
+                self.queue.requeue_stale()
+                job = self.queue.claim(self.worker_id)
+                if job is None:
+                    if idle_exit is not None and time.monotonic() - last_job_at > idle_exit:
+                        return
+                    time.sleep(POLL_INTERVAL_SECONDS)
+                    continue
+                self.process(job)
+                last_job_at = time.monotonic()
+        finally:
+            self.queue.remove_worker(self.worker_id)
+            if self.sync:
+                self.sync.stop()
+
+    def process(self, job):
+        """Ejecutar un trabajo ya reclamado y registrar su resultado"""
+        handler = self.handlers.get(job['job_type'])
+        if handler is None:
+            self.queue.fail(job['id'], f"Tipo de trabajo desconocido: {job['job_type']}")
+            return
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job['id'], stop_heartbeat), daemon=True)
+        heartbeat.start()
+        try:
+            result = handler(job)
+            self.queue.complete(job['id'], result)
+        except Exception as e:
+            self.queue.fail(job['id'], f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}")
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+    def _heartbeat_loop(self, job_id, stop_event):
+        # Evita que un trabajo largo sin avance visible se considere abandonado
+        while not stop_event.wait(JOB_HEARTBEAT_SECONDS):
+            self.queue.heartbeat(job_id)
+            self.queue.worker_heartbeat(self.worker_id, os.getpid())
+
+    def _get_clients(self):
+        """Inicializar (una vez por proceso) Google Drive y Supabase con la misma configuración que la app"""
+        if self.drive_manager is None:
+            from app import GoogleDriveManager, SUPABASE_URL, SUPABASE_KEY
+            drive_manager = GoogleDriveManager()
+            if not drive_manager.authenticate():
+                raise RuntimeError("No se pudo autenticar con Google Drive")
+            self.drive_manager = drive_manager
+            if SUPABASE_URL and SUPABASE_KEY:
+                from supabase import create_client
+                self.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+                self.sync = SupabaseSync(self.store, self.supabase)
+                self.sync.start()
+        return self.drive_manager, self.supabase
+
+    def _run_url_audit(self, job):
+        from audit_pipeline import URLAuditPipeline
+        from batch_checkpoint import CheckpointStore
+
+        drive_manager, supabase = self._get_clients()
+        # Un reintento vuelve a publicar las filas de los archivos ya terminados desde sus checkpoints
+        self.queue.clear_rows(job['id'])
+        pipeline = URLAuditPipeline(
+            drive_manager,
+            processed_by=job['submitted_by'],
+            supabase=supabase,
+            progress_callback=lambda fraction, message: self.queue.update_progress(job['id'], fraction, message),
+            # El ID del trabajo identifica la ejecución: un reintento reanuda sus checkpoints
+            checkpoints=CheckpointStore(self.queue.db_path),
+            run_id=job['id'],
+            rows_callback=lambda rows: self.queue.append_rows(job['id'], rows),
+            fast_mode=job['payload'].get('fast_mode', False),
+            store=self.store,
+            url_index=self.url_index,
+            slide_index_cache=self.slide_index_cache,
+            profiler=self._profiler(job),
+        )
+        result = pipeline.run(job['payload']['files'])
+        # Las filas ya quedaron publicadas en job_rows a medida que se generaban
+        del result['rows']
+        return self._with_profiles(result, pipeline.profiler)
+
+    def _run_multi_root_audit(self, job):
+        from batch_checkpoint import CheckpointStore
+        from multi_root_audit import MultiRootAudit
+
+        drive_manager, supabase = self._get_clients()
+        self.queue.clear_rows(job['id'])
+        payload = job['payload']
+        audit = MultiRootAudit(
+            drive_manager,
+            processed_by=job['submitted_by'],
+            supabase=supabase,
+            max_concurrent_folders=payload.get('max_concurrent_folders', 4),
+            max_files=payload.get('max_files'),
+            fast_mode=payload.get('fast_mode', False),
+            progress_callback=lambda fraction, message, folders: self.queue.update_progress(
+                job['id'], fraction, message, detail=folders
+            ),
+            rows_callback=lambda rows: self.queue.append_rows(job['id'], rows),
+            checkpoints=CheckpointStore(self.queue.db_path),
+            run_id=job['id'],
+            store=self.store,
+            url_index=self.url_index,
+            slide_index_cache=self.slide_index_cache,
+            profiler=self._profiler(job),
+        )
+        result = audit.run(payload['folder_ids'])
+        del result['rows']
+        return self._with_profiles(result, audit.profiler)
+
+    @staticmethod
+    def _profiler(job):
+        """FileProfiler del trabajo si se pidió el modo de perfilado; los perfiles quedan bajo su ID"""
+        if not job['payload'].get('profile'):
+            return None
+        return FileProfiler(job['id'], threshold_seconds=job['payload'].get('profile_threshold'))
+
+    @staticmethod
+    def _with_profiles(result, profiler):
+        if profiler and profiler.saved:
+            result['summary']['profiled_files'] = len(profiler.saved)
+            result['messages'].append((
+                'info', f"🩺 {len(profiler.saved)} archivo(s) superaron {profiler.threshold_seconds:g} s: "
+                        "perfil guardado"
+            ))
+        return result
+
+    def _run_image_inventory(self, job):
+        drive_manager, _ = self._get_clients()
+        self.queue.clear_rows(job['id'])
+        inventory = ImageInventoryRun(
+            drive_manager,
+            self.image_index,
+            progress_callback=lambda fraction, message: self.queue.update_progress(job['id'], fraction, message),
+            rows_callback=lambda rows: self.queue.append_rows(job['id'], rows),
+        )
+        return inventory.run(job['payload']['files'])
+
+    def _run_media_inventory(self, job):
+        drive_manager, _ = self._get_clients()
+        self.queue.clear_rows(job['id'])
+        inventory = MediaInventoryRun(
+            drive_manager,
+            self.media_index,
+            progress_callback=lambda fraction, message: self.queue.update_progress(job['id'], fraction, message),
+            rows_callback=lambda rows: self.queue.append_rows(job['id'], rows),
+        )
+        return inventory.run(job['payload']['files'])
+
+    def _run_archive_breakdown(self, job):
+        drive_manager, _ = self._get_clients()
+        self.queue.clear_rows(job['id'])
+        analysis = ArchiveAnalysisRun(
+            drive_manager,
+            self.archive_index,
+            progress_callback=lambda fraction, message: self.queue.update_progress(job['id'], fraction, message),
+            rows_callback=lambda rows: self.queue.append_rows(job['id'], rows),
+        )
+        return analysis.run(job['payload']['files'])
+
+    def _run_template_conformance(self, job):
+        drive_manager, _ = self._get_clients()
+        self.queue.clear_rows(job['id'])
+        conformance = TemplateConformanceRun(
+            drive_manager,
+            self.template_store,
+            progress_callback=lambda fraction, message: self.queue.update_progress(job['id'], fraction, message),
+            rows_callback=lambda rows: self.queue.append_rows(job['id'], rows),
+        )
+        return conformance.run(job['payload']['files'])
+
+
+def _worker_main(idle_exit):
+    AuditWorker().run(idle_exit=idle_exit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de auditorías ISILAudit IA")
+    parser.add_argument('--workers', type=int, default=1, help="Número de procesos worker")
+    parser.add_argument('--idle-exit', type=float, default=None,
+                        help="Terminar tras N segundos sin trabajos (por defecto nunca)")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        _worker_main(args.idle_exit)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(args.idle_exit,))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Módulo con los checkpoints por archivo de las auditorías en lote (SQLite)
+"""
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+from job_queue import JOBS_DB_PATH
+
+
+def file_content_key(file):
+    """Huella del contenido de un archivo de Drive sin descargarlo (md5 o, en su defecto, fecha de modificación)"""
+    return file.get('md5Checksum') or f"mtime:{file.get('modifiedTime', '')}:{file.get('size', '')}"
+
+
+class CheckpointStore:
+    """Registro de los archivos ya terminados en cada ejecución, para poder reanudarla"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or JOBS_DB_PATH
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS batch_checkpoints (
+                    run_id TEXT NOT NULL,
+                    file_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    completed_at TEXT NOT NULL,
+                    PRIMARY KEY (run_id, file_id)
+                )
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, run_id, file):
+        """Resultado guardado de un archivo si ya se completó con el mismo contenido; None si no"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT content_hash, result FROM batch_checkpoints WHERE run_id = ? AND file_id = ?",
+                (str(run_id), file['id'])
+            ).fetchone()
+        if row is None or row[0] != file_content_key(file):
+            return None
+        return json.loads(row[1])
+
+    def save(self, run_id, file, result):
+        """Registrar un archivo como completado con su resultado"""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO batch_checkpoints (run_id, file_id, content_hash, result, completed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (str(run_id), file['id'], file_content_key(file),
+                 json.dumps(result, default=str), datetime.utcnow().isoformat())
+            )
+
+    def completed_count(self, run_id):
+        """Número de archivos terminados en una ejecución"""
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM batch_checkpoints WHERE run_id = ?", (str(run_id),)
+            ).fetchone()[0]
@@ -0,0 +1,136 @@
+"""
+Módulo con la limitación de cuota y la política de reintentos de las llamadas a la API de Google Drive
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+
+# Cuota de la API de Drive del proyecto (consultas por minuto); por defecto la cuota estándar
+DRIVE_QUOTA_PER_MINUTE = int(os.environ.get('DRIVE_QUOTA_PER_MINUTE', '12000'))
+
+# Motivos de un 403 que indican límite de cuota (reintentables), no falta de permisos
+RATE_LIMIT_REASONS = {'userRateLimitExceeded', 'rateLimitExceeded', 'quotaExceeded'}
+
+
+class TokenBucket:
+    """Cubeta de fichas: permite ráfagas de hasta capacity y un ritmo sostenido de rate por segundo"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Esperar hasta disponer de tokens fichas y consumirlas"""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryBudget:
+    """Presupuesto de reintentos: cada éxito aporta ratio reintentos, con un mínimo de reserva"""
+
+    def __init__(self, ratio=0.2, min_reserve=20):
+        self.ratio = ratio
+        self.min_reserve = min_reserve
+        self._balance = float(min_reserve)
+        self._lock = threading.Lock()
+
+    def record_success(self):
+        with self._lock:
+            # El saldo no crece sin límite durante periodos largos sin errores
+            self._balance = min(self._balance + self.ratio, self.min_reserve * 10)
+
+    def try_spend(self):
+        """Consumir un reintento; False si el presupuesto se agotó"""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class DrivePolicy:
+    """Capa común de las llamadas a Drive: cuota compartida, backoff exponencial con jitter y reintentos acotados"""
+
+    def __init__(self, quota_per_minute=DRIVE_QUOTA_PER_MINUTE, burst=None, max_retries=6,
+                 base_delay=1.0, max_delay=64.0, retry_budget=None):
+        """
+        Args:
+            quota_per_minute: Consultas por minuto permitidas a este proceso
+            burst: Consultas que pueden enviarse de golpe (por defecto un segundo de cuota)
+            max_retries: Reintentos máximos por llamada
+            base_delay: Espera inicial del backoff (segundos)
+            max_delay: Espera máxima entre reintentos (segundos)
+            retry_budget: RetryBudget compartido (por defecto uno nuevo)
+        """
+        rate = quota_per_minute / 60.0
+        self.bucket = TokenBucket(rate, burst or max(1, int(rate)))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget or RetryBudget()
+
+    def execute(self, request, cost=1):
+        """Ejecutar una solicitud de googleapiclient (o una solicitud batch de cost operaciones)"""
+        return self.call(request.execute, cost=cost)
+
+    def call(self, func, *args, cost=1, **kwargs):
+        """Llamar a func respetando la cuota y reintentando los errores transitorios"""
+        attempt = 0
+        while True:
+            self.bucket.acquire(cost)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not self.is_retryable(e) or attempt >= self.max_retries or not self.retry_budget.try_spend():
+                    raise
+                self.wait_before_retry(attempt)
+                attempt += 1
+                continue
+            self.retry_budget.record_success()
+            return result
+
+    def wait_before_retry(self, attempt):
+        """Backoff exponencial con jitter completo"""
+        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    @staticmethod
+    def is_retryable(error):
+        """Errores de cuota (403 por límite, 429), 5xx y fallos de red"""
+        status = getattr(getattr(error, 'resp', None), 'status', None)
+        if status is not None:
+            status = int(status)
+            if status == 429 or status >= 500:
+                return True
+            if status == 403:
+                return bool(RATE_LIMIT_REASONS & _error_reasons(error))
+            return False
+        return isinstance(error, (socket.timeout, ConnectionError, TimeoutError))
+
+
+def _error_reasons(error):
+    """Motivos ('reason') declarados en el cuerpo de un HttpError de Google"""
+    try:
+        details = getattr(error, 'error_details', None) or []
+        reasons = {detail.get('reason') for detail in details if isinstance(detail, dict)}
+        return reasons | {reason for reason in RATE_LIMIT_REASONS if reason in str(error)}
+    except Exception:
+        return set()
+
+
+# Política compartida por todos los GoogleDriveManager del proceso (y sus copias por hilo)
+shared_drive_policy = DrivePolicy()
@@ -0,0 +1,141 @@
+"""
+Módulo con el perfilado opcional (cProfile) de los archivos que tardan más de un umbral en procesarse
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Directorio donde se guardan los perfiles, una subcarpeta por ejecución
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+# Segundos a partir de los cuales se guarda el perfil de un archivo
+PROFILE_THRESHOLD_SECONDS = float(os.environ.get('PROFILE_THRESHOLD_SECONDS', '10'))
+
+# cProfile admite un solo perfilador activo por proceso (Python 3.12+): los archivos que se procesan
+# en otros hilos mientras tanto solo se cronometran
+_profiling_lock = threading.Lock()
+
+
+def _safe_name(value):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(value))
+
+
+def top_functions(stats_source, limit=25, sort='cumulative'):
+    """
+    Funciones con más tiempo de un perfil
+
+    Args:
+        stats_source: Ruta de un archivo .prof o un cProfile.Profile
+        limit: Funciones a devolver
+        sort: 'cumulative' (tiempo incluyendo llamadas internas) o 'tottime' (tiempo propio)
+
+    Returns:
+        List[dict]: 'funcion', 'ubicacion', 'llamadas', 'tiempo_propio' y 'tiempo_acumulado'
+    """
+    stats = pstats.Stats(stats_source)
+    key = 3 if sort == 'cumulative' else 2
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+    return [
+        {
+            'funcion': function,
+            'ubicacion': f"{os.path.basename(path)}:{line}" if path != '~' else 'integrada',
+            'llamadas': calls,
+            'tiempo_propio': round(own_time, 4),
+            'tiempo_acumulado': round(cumulative_time, 4),
+        }
+        for (path, line, function), (_, calls, own_time, cumulative_time, _) in entries
+    ]
+
+
+def list_profiles(run_id=None, profile_dir=None):
+    """Resúmenes de los perfiles guardados (de una ejecución o de todas), los más lentos primero"""
+    profile_dir = profile_dir or PROFILE_DIR
+    run_dirs = [os.path.join(profile_dir, _safe_name(run_id))] if run_id is not None else [
+        os.path.join(profile_dir, name) for name in sorted(os.listdir(profile_dir))
+    ] if os.path.isdir(profile_dir) else []
+
+    summaries = []
+    for run_dir in run_dirs:
+        if not os.path.isdir(run_dir):
+            continue
+        for name in os.listdir(run_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(run_dir, name), encoding='utf-8') as f:
+                    summaries.append(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Resumen de perfil ilegible {name}: {str(e)}")
+    return sorted(summaries, key=lambda summary: summary['seconds'], reverse=True)
+
+
+class FileProfiler:
+    """Perfila cada archivo y guarda el perfil solo si su procesamiento superó el umbral"""
+
+    def __init__(self, run_id, threshold_seconds=None, profile_dir=None, top_limit=25):
+        """
+        Args:
+            run_id: Identificador de la ejecución (nombre de la subcarpeta de perfiles)
+            threshold_seconds: Duración mínima para guardar el perfil de un archivo
+            profile_dir: Directorio base de los perfiles
+            top_limit: Funciones incluidas en el resumen de cada perfil
+        """
+        self.run_id = run_id
+        self.threshold_seconds = PROFILE_THRESHOLD_SECONDS if threshold_seconds is None else threshold_seconds
+        self.profile_dir = profile_dir or PROFILE_DIR
+        self.top_limit = top_limit
+        self.saved = []  # Resúmenes de los perfiles guardados en esta ejecución
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self, file_id, file_name=''):
+        """Perfilar el bloque que procesa un archivo"""
+        profiler = None
+        if _profiling_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Otra herramienta de perfilado activa en el proceso: solo se cronometra
+                _profiling_lock.release()
+                profiler = None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+                _profiling_lock.release()
+            if seconds >= self.threshold_seconds:
+                self._save(file_id, file_name, seconds, profiler)
+
+    def _save(self, file_id, file_name, seconds, profiler):
+        run_dir = os.path.join(self.profile_dir, _safe_name(self.run_id))
+        os.makedirs(run_dir, exist_ok=True)
+        base = os.path.join(run_dir, _safe_name(file_id))
+        summary = {
+            'run_id': self.run_id,
+            'file_id': file_id,
+            'file_name': file_name,
+            'seconds': round(seconds, 3),
+            'profiled_at': datetime.utcnow().isoformat(),
+            'profile_path': None,
+            'top': [],
+        }
+        if profiler is not None:
+            # El .prof se abre con pstats, snakeviz o similares para reproducir el análisis en local
+            profiler.dump_stats(f"{base}.prof")
+            summary['profile_path'] = f"{base}.prof"
+            summary['top'] = top_functions(profiler, self.top_limit)
+        with open(f"{base}.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False)
+        with self._lock:
+            self.saved.append(summary)
@@ -0,0 +1,232 @@
+"""
+Módulo con el índice rápido de hipervínculos externos de archivos PPTX (solo relaciones)
+"""
+
+import io
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Namespaces OOXML usados por el índice
+NS_PACKAGE_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NS_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PRESENTATION = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+NS_DRAWING = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+# Elementos de una diapositiva que delimitan una forma
+SHAPE_TAGS = {f'{{{NS_PRESENTATION}}}{tag}' for tag in ('sp', 'pic', 'graphicFrame', 'grpSp', 'cxnSp')}
+
+# Elementos que referencian un hipervínculo mediante r:id
+HYPERLINK_TAGS = {f'{{{NS_DRAWING}}}hlinkClick', f'{{{NS_DRAWING}}}hlinkHover'}
+
+# Tamaño máximo de una parte de relaciones o de diapositiva que se lee (descomprimida)
+MAX_PART_BYTES = 5 * 1024 * 1024
+
+SLIDE_PART_RE = re.compile(r'^ppt/slides/slide(\d+)\.xml$')
+NOTES_PART_RE = re.compile(r'^ppt/notesSlides/notesSlide(\d+)\.xml$')
+
+
+class OOXMLPackage:
+    """Lectura de partes y relaciones de un paquete OOXML abierto con zipfile, sin python-pptx"""
+
+    def _read_part(self, zip_file, name, sizes):
+        """Leer una parte pequeña del ZIP; None si no existe o supera MAX_PART_BYTES"""
+        if sizes.get(name, MAX_PART_BYTES + 1) > MAX_PART_BYTES:
+            return None
+        return zip_file.read(name)
+
+    def _parse_relationships(self, zip_file, rels_name, sizes):
+        """Relaciones de una parte .rels como (id, tipo, destino, modo)"""
+        content = self._read_part(zip_file, rels_name, sizes)
+        if content is None:
+            return []
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            print(f"Error al leer relaciones {rels_name}: {str(e)}")
+            return []
+        return [
+            (rel.get('Id', ''), rel.get('Type', ''), rel.get('Target', ''), rel.get('TargetMode', ''))
+            for rel in root.iter(f'{{{NS_PACKAGE_RELS}}}Relationship')
+        ]
+
+    def _slide_order(self, zip_file, sizes):
+        """Número de diapositiva (orden de presentación) de cada parte ppt/slides/slideN.xml"""
+        order = {}
+        relationships = {
+            rel_id: self._resolve_target('ppt/presentation.xml', target)
+            for rel_id, _, target, _ in self._parse_relationships(
+                zip_file, 'ppt/_rels/presentation.xml.rels', sizes
+            )
+        }
+        content = self._read_part(zip_file, 'ppt/presentation.xml', sizes)
+        if content is not None:
+            try:
+                root = ET.fromstring(content)
+                for position, slide_id in enumerate(root.iter(f'{{{NS_PRESENTATION}}}sldId'), 1):
+                    part_name = relationships.get(slide_id.get(f'{{{NS_RELS}}}id'))
+                    if part_name:
+                        order[part_name] = position
+            except ET.ParseError as e:
+                print(f"Error al leer ppt/presentation.xml: {str(e)}")
+
+        # Sin lista de diapositivas legible se usa el número del nombre de la parte
+        if not order:
+            for name in sizes:
+                match = SLIDE_PART_RE.match(name)
+                if match:
+                    order[name] = int(match.group(1))
+        return order
+
+    def _slide_for_part(self, zip_file, part_name, sizes, slide_order):
+        """(número de diapositiva o 0, tipo de parte) de la parte que origina las relaciones"""
+        if SLIDE_PART_RE.match(part_name):
+            return slide_order.get(part_name, 0), 'slide'
+        if NOTES_PART_RE.match(part_name):
+            # Las notas apuntan a su diapositiva desde sus propias relaciones
+            rels_name = self._rels_name(part_name)
+            for _, rel_type, target, mode in self._parse_relationships(zip_file, rels_name, sizes):
+                if mode != 'External' and rel_type.endswith('/slide'):
+                    return slide_order.get(self._resolve_target(part_name, target), 0), 'notes'
+            return 0, 'notes'
+        if part_name.startswith(('ppt/slideLayouts/', 'ppt/slideMasters/')):
+            return 0, 'pattern'
+        return 0, 'other'
+
+    @staticmethod
+    def _source_part(rels_name):
+        """ppt/slides/_rels/slide1.xml.rels -> ppt/slides/slide1.xml"""
+        directory, file_name = posixpath.split(rels_name)
+        return posixpath.join(posixpath.dirname(directory), file_name[:-len('.rels')])
+
+    @staticmethod
+    def _rels_name(part_name):
+        """ppt/slides/slide1.xml -> ppt/slides/_rels/slide1.xml.rels"""
+        directory, file_name = posixpath.split(part_name)
+        return posixpath.join(directory, '_rels', f'{file_name}.rels')
+
+    @staticmethod
+    def _resolve_target(part_name, target):
+        """Ruta dentro del paquete de un destino de relación interno"""
+        if target.startswith('/'):
+            return target.lstrip('/')
+        return posixpath.normpath(posixpath.join(posixpath.dirname(part_name), target))
+
+
+class HyperlinkIndex(OOXMLPackage):
+    """Índice de hipervínculos externos leyendo solo el directorio ZIP y las partes .rels, sin python-pptx"""
+
+    def __init__(self, file_path_or_content, resolve_shapes=True):
+        """
+        Args:
+            file_path_or_content: Ruta del archivo o contenido en bytes
+            resolve_shapes: Leer las diapositivas con hipervínculos para identificar la forma que los usa
+        """
+        self.file_path_or_content = file_path_or_content
+        self.resolve_shapes = resolve_shapes
+
+    def build(self):
+        """
+        Construir el índice de hipervínculos externos
+
+        Returns:
+            List[dict]: Hipervínculos con el mismo formato que PPTXURLExtractor, más
+            'slide_number', 'shape', 'relationship_id' y 'part'
+        """
+        source = self.file_path_or_content
+        if not isinstance(source, str):
+            source = io.BytesIO(source)
+
+        with zipfile.ZipFile(source, 'r') as zip_file:
+            # Solo se consulta el directorio central: ninguna parte se descomprime salvo las necesarias
+            sizes = {info.filename: info.file_size for info in zip_file.infolist()}
+            slide_order = self._slide_order(zip_file, sizes)
+
+            hyperlinks = []
+            for rels_name in sorted(name for name in sizes if name.endswith('.rels')):
+                part_name = self._source_part(rels_name)
+                if not part_name.startswith('ppt/'):
+                    continue
+                external = self._external_relationships(zip_file, rels_name, sizes)
+                if not external:
+                    continue
+
+                slide_num, kind = self._slide_for_part(zip_file, part_name, sizes, slide_order)
+                shapes = {}
+                if self.resolve_shapes and kind in ('slide', 'notes'):
+                    shapes = self._shapes_by_relationship(zip_file, part_name, sizes)
+
+                for rel_id, target in external:
+                    shape_name = shapes.get(rel_id, '')
+                    hyperlinks.append({
+                        'url': target,
+                        'location': self._location(slide_num, kind, shape_name, part_name),
+                        'context': f'Hipervínculo externo {rel_id} desde {rels_name}',
+                        'slide_number': slide_num,
+                        'shape': shape_name,
+                        'relationship_id': rel_id,
+                        'part': part_name,
+                    })
+
+        hyperlinks.sort(key=lambda link: (link['slide_number'] or float('inf'), link['part']))
+        return hyperlinks
+
+    def _external_relationships(self, zip_file, rels_name, sizes):
+        """Relaciones externas con destino web de una parte .rels"""
+        return [
+            (rel_id, target)
+            for rel_id, rel_type, target, mode in self._parse_relationships(zip_file, rels_name, sizes)
+            if mode == 'External' and rel_type.endswith('/hyperlink')
+            and not target.lower().startswith(('file:', '#'))
+        ]
+
+    def _shapes_by_relationship(self, zip_file, part_name, sizes):
+        """Nombre de la forma que referencia cada r:id de hipervínculo en una diapositiva o notas"""
+        content = self._read_part(zip_file, part_name, sizes)
+        if content is None:
+            return {}
+
+        shapes = {}
+        shape_names = []  # Pila de formas abiertas (las agrupadas quedan dentro de su grupo)
+        try:
+            for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+                if element.tag in SHAPE_TAGS:
+                    if event == 'start':
+                        shape_names.append('')
+                    else:
+                        shape_names.pop()
+                        element.clear()
+                elif event == 'start' and element.tag == f'{{{NS_PRESENTATION}}}cNvPr' and shape_names:
+                    shape_names[-1] = element.get('name', '')
+                elif event == 'start' and element.tag in HYPERLINK_TAGS:
+                    rel_id = element.get(f'{{{NS_RELS}}}id')
+                    if rel_id and rel_id not in shapes:
+                        shapes[rel_id] = shape_names[-1] if shape_names else ''
+        except ET.ParseError as e:
+            print(f"Error al leer {part_name}: {str(e)}")
+        return shapes
+
+    def _location(self, slide_num, kind, shape_name, part_name):
+        if kind == 'slide':
+            shape = f' - {shape_name}' if shape_name else ''
+            return f'Diapositiva {slide_num}{shape} - Hipervínculo'
+        if kind == 'notes':
+            return f'Diapositiva {slide_num} - Notas - Hipervínculo'
+        if kind == 'pattern':
+            return f'Patrón {posixpath.basename(part_name)} - Hipervínculo'
+        return 'Archivo de relaciones'
+
+
+def index_external_hyperlinks(file_path_or_content, resolve_shapes=True):
+    """
+    Función de conveniencia para indexar los hipervínculos externos de un PPTX
+
+    Args:
+        file_path_or_content: Ruta del archivo o contenido en bytes
+        resolve_shapes: Identificar también la forma que usa cada hipervínculo
+
+    Returns:
+        List[dict]: Hipervínculos externos encontrados
+    """
+    return HyperlinkIndex(file_path_or_content, resolve_shapes=resolve_shapes).build()
@@ -0,0 +1,624 @@
+"""
+Módulo con el inventario de imágenes de presentaciones (dimensiones, peso, resolución efectiva y duplicados)
+"""
+
+import io
+import os
+import sqlite3
+import struct
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from audit_store import AUDIT_STORE_DB_PATH
+from hyperlink_index import NS_DRAWING, NS_PRESENTATION, NS_RELS, OOXMLPackage, SHAPE_TAGS
+
+MEDIA_PREFIX = 'ppt/media/'
+
+# Formatos de mapa de bits: se les lee el tamaño de la cabecera y se les calcula el hash perceptual
+RASTER_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.jpe', '.gif', '.bmp', '.tif', '.tiff', '.webp'}
+
+# Formatos vectoriales: no tienen resolución propia
+VECTOR_EXTENSIONS = {'.emf', '.wmf', '.svg'}
+
+EMU_PER_INCH = 914400
+
+# Umbrales de la auditoría: por debajo de MIN_DPI la imagen se ve pixelada al proyectarse,
+# por encima de MAX_DPI (o de OVERSIZED_BYTES) pesa más de lo que aporta
+MIN_DPI = 96
+MAX_DPI = 300
+OVERSIZED_BYTES = int(os.environ.get('IMAGE_OVERSIZED_BYTES', 1024 * 1024))
+
+# Distancia de Hamming máxima (sobre 64 bits) para considerar dos imágenes iguales a la vista
+DUPLICATE_DISTANCE = 4
+
+# Imágenes que se inventarían sin hash perceptual para acotar la memoria: más pesadas que
+# MAX_HASH_IMAGE_BYTES, con un ratio de compresión sospechoso (como en PPTXURLExtractor) o con más píxeles
+MAX_HASH_IMAGE_BYTES = int(os.environ.get('IMAGE_MAX_HASH_BYTES', 20 * 1024 * 1024))
+MAX_HASH_RATIO = 200
+MAX_HASH_PIXELS = 50_000_000
+
+# Bytes de imágenes pendientes de hash que se acumulan como máximo antes de enviarlas al pool
+HASH_BATCH_BYTES = 32 * 1024 * 1024
+
+# Bytes máximos que se leen buscando las dimensiones en la cabecera de un JPEG
+MAX_HEADER_BYTES = 512 * 1024
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_image_size(stream):
+    """
+    Leer formato y dimensiones de la cabecera de una imagen sin decodificarla
+
+    Args:
+        stream: Objeto tipo archivo posicionado al inicio de la imagen
+
+    Returns:
+        tuple: (formato, ancho, alto); ancho y alto son None si la cabecera no los tiene
+    """
+    header = stream.read(32)
+    if header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', header[16:24])
+        return 'PNG', width, height
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', header[6:10])
+        return 'GIF', width, height
+    if header.startswith(b'BM') and len(header) >= 26:
+        header_size = struct.unpack('<I', header[14:18])[0]
+        if header_size == 12:
+            width, height = struct.unpack('<HH', header[18:22])
+        else:
+            width, height = struct.unpack('<ii', header[18:26])
+        return 'BMP', width, abs(height)
+    if header.startswith(b'\xff\xd8'):
+        return ('JPEG',) + _jpeg_size(header[2:], stream)
+    return None, None, None
+
+
+def _jpeg_size(data, stream):
+    """Recorrer los segmentos JPEG hasta el marcador SOF (las miniaturas EXIF se saltan sin leerlas)"""
+    read = len(data) + 2
+    while read < MAX_HEADER_BYTES:
+        while len(data) < 4:
+            chunk = stream.read(4096)
+            if not chunk:
+                return None, None
+            data += chunk
+            read += len(chunk)
+        if data[0] != 0xFF:
+            return None, None
+        marker = data[1]
+        if marker == 0xFF:
+            data = data[1:]
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            data = data[2:]
+            continue
+        length = struct.unpack('>H', data[2:4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            while len(data) < 9:
+                chunk = stream.read(4096)
+                if not chunk:
+                    return None, None
+                data += chunk
+            height, width = struct.unpack('>HH', data[5:9])
+            return width, height
+        # Saltar el segmento completo: lo que falte se consume del stream sin guardarlo
+        skip = 2 + length
+        if skip <= len(data):
+            data = data[skip:]
+        else:
+            remaining = skip - len(data)
+            skipped = stream.read(remaining)
+            read += len(skipped)
+            if len(skipped) < remaining:
+                return None, None
+            data = b''
+    return None, None
+
+
+def perceptual_hash(data):
+    """
+    Hash de diferencias (dHash) de 64 bits; se ejecuta en un proceso aparte
+
+    Returns:
+        tuple: (hash entero o None, ancho, alto) con las dimensiones vistas por Pillow
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None, None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            # En JPEG decodifica directamente a escala reducida: mucho menos trabajo que la imagen completa
+            image.draft('L', (64, 64))
+            pixels = image.convert('L').resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+    except Exception:
+        return None, None, None
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | int(pixels[row * 9 + col] < pixels[row * 9 + col + 1])
+    return bits, width, height
+
+
+def hamming_distance(first, second):
+    return bin(first ^ second).count('1')
+
+
+class DeckImageInventory(OOXMLPackage):
+    """Imágenes de ppt/media/* de una presentación con su uso en las diapositivas, sin python-pptx"""
+
+    def __init__(self, file_path_or_content):
+        """
+        Args:
+            file_path_or_content: Ruta del archivo o contenido en bytes
+        """
+        self.file_path_or_content = file_path_or_content
+
+    def build(self, known_hashes=None, hash_executor=None):
+        """
+        Construir el inventario de imágenes
+
+        Args:
+            known_hashes: Dict huella de contenido -> hash perceptual ya calculado (no se recalcula)
+            hash_executor: Executor donde calcular los hashes perceptuales (por defecto en este proceso)
+
+        Returns:
+            List[dict]: Una entrada por imagen con 'part', 'format', 'bytes', 'compressed_bytes',
+            'width', 'height', 'content_key', 'phash', 'hash_skipped' (sin hash por los límites de
+            memoria), 'placements', 'min_dpi', 'max_dpi' e 'issues'
+        """
+        known_hashes = known_hashes or {}
+        source = self.file_path_or_content
+        if not isinstance(source, str):
+            source = io.BytesIO(source)
+
+        with zipfile.ZipFile(source, 'r') as zip_file:
+            infos = [info for info in zip_file.infolist()
+                     if info.filename.startswith(MEDIA_PREFIX) and not info.is_dir()]
+            if not infos:
+                return []
+            sizes = {info.filename: info.file_size for info in zip_file.infolist()}
+            placements = self._placements(zip_file, sizes)
+
+            images = []
+            hashes = {}
+            pending = {}  # huella -> contenido cuyo hash perceptual falta (como mucho HASH_BATCH_BYTES)
+            pending_bytes = 0
+            for info in infos:
+                extension = os.path.splitext(info.filename)[1].lower()
+                if extension not in RASTER_EXTENSIONS | VECTOR_EXTENSIONS:
+                    continue
+                # CRC-32 y tamaño del directorio central identifican el contenido sin descomprimirlo
+                content_key = f"{info.CRC:08x}:{info.file_size}"
+                image_format, width, height = None, None, None
+                hash_skipped = False
+                if extension in RASTER_EXTENSIONS:
+                    with zip_file.open(info) as stream:
+                        image_format, width, height = read_image_size(stream)
+                    hash_skipped = not self._hashable(info, width, height)
+                    if (not hash_skipped and content_key not in known_hashes
+                            and content_key not in pending and content_key not in hashes):
+                        pending[content_key] = zip_file.read(info)
+                        pending_bytes += info.file_size
+                        if pending_bytes >= HASH_BATCH_BYTES:
+                            hashes.update(self._hash_all(pending, hash_executor))
+                            pending, pending_bytes = {}, 0
+                images.append({
+                    'part': info.filename,
+                    'format': image_format or extension.lstrip('.').upper(),
+                    'bytes': info.file_size,
+                    'compressed_bytes': info.compress_size,
+                    'width': width,
+                    'height': height,
+                    'content_key': content_key,
+                    'phash': known_hashes.get(content_key),
+                    'hash_skipped': hash_skipped,
+                    'placements': placements.get(info.filename, []),
+                })
+            hashes.update(self._hash_all(pending, hash_executor))
+
+        for image in images:
+            if image['content_key'] in hashes:
+                image['phash'], width, height = hashes[image['content_key']]
+                # Formatos cuya cabecera no se interpreta aquí (TIFF, WebP): dimensiones de Pillow
+                if image['width'] is None:
+                    image['width'], image['height'] = width, height
+            self._evaluate(image)
+        return images
+
+    @staticmethod
+    def _hashable(info, width, height):
+        """Si la imagen se puede leer completa para el hash (según el directorio ZIP y la cabecera)"""
+        if info.file_size > MAX_HASH_IMAGE_BYTES:
+            return False
+        if info.file_size > 1024 * 1024 and info.file_size / max(info.compress_size, 1) > MAX_HASH_RATIO:
+            return False
+        return not (width and height and width * height > MAX_HASH_PIXELS)
+
+    def _hash_all(self, pending, hash_executor):
+        if not pending:
+            return {}
+        keys = list(pending)
+        if hash_executor is None:
+            results = map(perceptual_hash, (pending[key] for key in keys))
+        else:
+            results = hash_executor.map(perceptual_hash, (pending[key] for key in keys))
+        return dict(zip(keys, results))
+
+    def _placements(self, zip_file, sizes):
+        """Parte de imagen -> lista de usos (diapositiva, forma, ancho y alto mostrados en EMU)"""
+        placements = {}
+        for part_name, slide_num in sorted(self._slide_order(zip_file, sizes).items(), key=lambda item: item[1]):
+            images_by_rel = {
+                rel_id: self._resolve_target(part_name, target)
+                for rel_id, rel_type, target, mode in self._parse_relationships(
+                    zip_file, self._rels_name(part_name), sizes
+                )
+                if mode != 'External' and rel_type.endswith('/image')
+            }
+            if not images_by_rel:
+                continue
+            for rel_id, shape_name, cx, cy in self._pictures(zip_file, part_name, sizes):
+                media = images_by_rel.get(rel_id)
+                if media:
+                    placements.setdefault(media, []).append(
+                        {'slide': slide_num, 'shape': shape_name, 'cx': cx, 'cy': cy}
+                    )
+        return placements
+
+    def _pictures(self, zip_file, part_name, sizes):
+        """(r:embed, forma, ancho, alto) de cada imagen dibujada en una diapositiva"""
+        content = self._read_part(zip_file, part_name, sizes)
+        if content is None:
+            return []
+
+        pictures = []
+        stack = []  # Formas abiertas: [nombre, r:embed, cx, cy]
+        try:
+            for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+                if element.tag in SHAPE_TAGS:
+                    if event == 'start':
+                        stack.append(['', None, 0, 0])
+                    else:
+                        name, rel_id, cx, cy = stack.pop()
+                        if rel_id:
+                            pictures.append((rel_id, name, cx, cy))
+                        element.clear()
+                elif event != 'start' or not stack:
+                    continue
+                elif element.tag == f'{{{NS_PRESENTATION}}}cNvPr':
+                    stack[-1][0] = element.get('name', '')
+                elif element.tag == f'{{{NS_DRAWING}}}blip':
+                    stack[-1][1] = element.get(f'{{{NS_RELS}}}embed') or stack[-1][1]
+                elif element.tag == f'{{{NS_DRAWING}}}ext' and not stack[-1][2]:
+                    # El primer a:ext de la forma es el de su xfrm (tamaño mostrado)
+                    stack[-1][2] = int(element.get('cx', 0) or 0)
+                    stack[-1][3] = int(element.get('cy', 0) or 0)
+        except (ET.ParseError, ValueError) as e:
+            print(f"Error al leer {part_name}: {str(e)}")
+        return pictures
+
+    @staticmethod
+    def _evaluate(image):
+        """Resolución efectiva en cada uso y observaciones de la auditoría"""
+        dpis = []
+        if image['width'] and image['height']:
+            for placement in image['placements']:
+                if placement['cx'] > 0 and placement['cy'] > 0:
+                    dpis.append(min(image['width'] * EMU_PER_INCH / placement['cx'],
+                                    image['height'] * EMU_PER_INCH / placement['cy']))
+        image['min_dpi'] = round(min(dpis)) if dpis else None
+        image['max_dpi'] = round(max(dpis)) if dpis else None
+
+        issues = []
+        if image['bytes'] > OVERSIZED_BYTES:
+            issues.append('pesada')
+        if image['max_dpi'] is not None and image['max_dpi'] > MAX_DPI:
+            issues.append('sobredimensionada')
+        if image['min_dpi'] is not None and image['min_dpi'] < MIN_DPI:
+            issues.append('baja resolución')
+        if not image['placements']:
+            issues.append('sin uso en diapositivas')
+        image['issues'] = issues
+
+
+class BKTree:
+    """Árbol BK sobre distancia de Hamming: búsquedas por radio sin comparar contra todos los hashes"""
+
+    def __init__(self):
+        self.root = None  # [hash, {distancia: nodo hijo}]
+        self.size = 0
+
+    def add(self, value):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [value, {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """Hashes a distancia <= radius de value, como lista de (distancia, hash)"""
+        results = []
+        candidates = [self.root] if self.root is not None else []
+        while candidates:
+            node = candidates.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius:
+                results.append((distance, node[0]))
+            # Desigualdad triangular: solo pueden estar en rango los hijos en [d - r, d + r]
+            for child_distance, child in node[1].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    candidates.append(child)
+        return sorted(results)
+
+
+class ImageIndex:
+    """Inventario persistente de imágenes entre presentaciones, con búsqueda de duplicados por hash perceptual"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or AUDIT_STORE_DB_PATH
+        self._tree = None
+        self._tree_version = None
+        self._groups = {}  # (versión, parámetros) -> grupos de duplicados ya calculados
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS image_inventory (
+                    file_id TEXT NOT NULL,
+                    filename TEXT,
+                    subfolder TEXT,
+                    part TEXT NOT NULL,
+                    format TEXT,
+                    bytes INTEGER,
+                    compressed_bytes INTEGER,
+                    width INTEGER,
+                    height INTEGER,
+                    content_key TEXT NOT NULL,
+                    phash TEXT,
+                    slides TEXT,
+                    min_dpi INTEGER,
+                    max_dpi INTEGER,
+                    issues TEXT,
+                    indexed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_image_inventory_file ON image_inventory(file_id);
+                CREATE INDEX IF NOT EXISTS idx_image_inventory_key ON image_inventory(content_key);
+                CREATE INDEX IF NOT EXISTS idx_image_inventory_phash ON image_inventory(phash);
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def known_hashes(self):
+        """Huella de contenido -> hash perceptual de las imágenes ya inventariadas"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT content_key, phash FROM image_inventory WHERE phash IS NOT NULL"
+            ).fetchall()
+        return {row['content_key']: int(row['phash'], 16) for row in rows}
+
+    def replace_file(self, file, images):
+        """Reemplazar el inventario de un archivo por el de su último análisis"""
+        indexed_at = datetime.utcnow().isoformat()
+        rows = [
+            (
+                file['id'], file['name'], file.get('subfolder', ''), image['part'], image['format'],
+                image['bytes'], image['compressed_bytes'], image['width'], image['height'],
+                image['content_key'], f"{image['phash']:016x}" if image['phash'] is not None else None,
+                ','.join(str(slide) for slide in sorted({p['slide'] for p in image['placements']})),
+                image['min_dpi'], image['max_dpi'], ', '.join(image['issues']), indexed_at,
+            )
+            for image in images
+        ]
+        with self._connection() as conn:
+            conn.execute("DELETE FROM image_inventory WHERE file_id = ?", (file['id'],))
+            conn.executemany(
+                "INSERT INTO image_inventory (file_id, filename, subfolder, part, format, bytes, "
+                "compressed_bytes, width, height, content_key, phash, slides, min_dpi, max_dpi, issues, "
+                "indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def summary(self):
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) AS imagenes,
+                       COUNT(DISTINCT file_id) AS archivos,
+                       COUNT(DISTINCT content_key) AS contenidos_distintos,
+                       SUM(CASE WHEN issues LIKE '%pesada%' OR issues LIKE '%sobredimensionada%' THEN 1 ELSE 0 END)
+                           AS sobredimensionadas,
+                       SUM(CASE WHEN issues LIKE '%baja resolución%' THEN 1 ELSE 0 END) AS baja_resolucion
+                FROM image_inventory
+            """).fetchone()
+        return {key: row[key] or 0 for key in row.keys()}
+
+    def images_with_issue(self, issue, limit=500):
+        """Imágenes con una observación ('pesada', 'sobredimensionada', 'baja resolución'...)"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT filename, subfolder, part, format, bytes, width, height, slides, min_dpi, max_dpi, issues "
+                "FROM image_inventory WHERE issues LIKE ? ORDER BY bytes DESC LIMIT ?",
+                (f'%{issue}%', limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def duplicate_groups(self, max_distance=DUPLICATE_DISTANCE, min_files=2, limit=200):
+        """
+        Grupos de imágenes iguales o casi iguales usadas en varias presentaciones
+
+        El resultado se reutiliza mientras el inventario no cambie: la interfaz lo pide en cada rerun
+
+        Returns:
+            List[dict]: 'grupo', 'archivos', 'apariciones', 'bytes_totales' y 'ejemplo'
+        """
+        with self._connection() as conn:
+            version = self._version(conn)
+        key = (version, max_distance, min_files, limit)
+        if key not in self._groups:
+            # Solo se conservan los resultados de la versión actual del inventario
+            self._groups = {cached: groups for cached, groups in self._groups.items() if cached[0] == version}
+            self._groups[key] = self._duplicate_groups(max_distance, min_files, limit)
+        return self._groups[key]
+
+    def _duplicate_groups(self, max_distance, min_files, limit):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT phash, file_id, filename, part, bytes FROM image_inventory WHERE phash IS NOT NULL"
+            ).fetchall()
+        by_hash = {}
+        for row in rows:
+            by_hash.setdefault(int(row['phash'], 16), []).append(row)
+
+        # Unión de hashes a distancia <= max_distance usando el árbol BK (sin comparar todos contra todos)
+        tree = self._bk_tree()
+        parent = {value: value for value in by_hash}
+
+        def find(value):
+            while parent[value] != value:
+                parent[value] = parent[parent[value]]
+                value = parent[value]
+            return value
+
+        for value in by_hash:
+            for _, neighbour in tree.search(value, max_distance):
+                if neighbour in parent:
+                    parent[find(neighbour)] = find(value)
+
+        groups = {}
+        for value, members in by_hash.items():
+            groups.setdefault(find(value), []).extend(members)
+
+        results = []
+        for members in groups.values():
+            files = {member['file_id'] for member in members}
+            if len(files) < min_files:
+                continue
+            results.append({
+                'grupo': f"{members[0]['phash']}",
+                'archivos': len(files),
+                'apariciones': len(members),
+                'bytes_totales': sum(member['bytes'] or 0 for member in members),
+                'ejemplo': f"{members[0]['filename']} · {members[0]['part']}",
+            })
+        return sorted(results, key=lambda group: (-group['archivos'], -group['bytes_totales']))[:limit]
+
+    @staticmethod
+    def _version(conn):
+        """Versión del inventario: cambia con cada archivo reemplazado o borrado"""
+        return tuple(conn.execute("SELECT COUNT(*), MAX(indexed_at) FROM image_inventory").fetchone())
+
+    def _bk_tree(self):
+        """Árbol BK de los hashes guardados; se reconstruye solo si el inventario cambió"""
+        with self._connection() as conn:
+            version = self._version(conn)
+            if self._tree is not None and self._tree_version == version:
+                return self._tree
+            tree = BKTree()
+            for row in conn.execute("SELECT DISTINCT phash FROM image_inventory WHERE phash IS NOT NULL"):
+                tree.add(int(row['phash'], 16))
+        self._tree, self._tree_version = tree, version
+        return tree
+
+
+class ImageInventoryRun:
+    """Inventario de imágenes de un lote de archivos de Drive"""
+
+    def __init__(self, drive_manager, image_index, progress_callback=None, rows_callback=None, max_workers=None):
+        """
+        Args:
+            drive_manager: GoogleDriveManager autenticado
+            image_index: ImageIndex donde se guarda el inventario
+            progress_callback: Función (fracción 0-1, mensaje) para informar avance
+            rows_callback: Función que recibe las filas de cada archivo en cuanto está listo
+            max_workers: Procesos para los hashes perceptuales (por defecto, uno por CPU)
+        """
+        self.drive_manager = drive_manager
+        self.image_index = image_index
+        self.progress_callback = progress_callback
+        self.rows_callback = rows_callback
+        self.max_workers = max_workers
+
+    def run(self, files):
+        """
+        Inventariar las imágenes de una lista de archivos
+
+        Returns:
+            dict: 'summary' y 'messages'
+        """
+        messages = []
+        known_hashes = self.image_index.known_hashes()
+        totals = {'files': 0, 'images': 0, 'hashed': 0, 'unhashed': 0, 'issues': 0}
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for idx, file in enumerate(files):
+                self._report(idx / max(len(files), 1), f"Inventariando imágenes de {file['name']}")
+                content = self.drive_manager.download_file(file['id'])
+                if not content:
+                    messages.append(('warning', f"No se pudo descargar {file['name']}"))
+                    continue
+                try:
+                    images = DeckImageInventory(content).build(known_hashes, executor)
+                except (zipfile.BadZipFile, KeyError, ValueError) as e:
+                    messages.append(('error', f"❌ No se pudo inventariar {file['name']}: {str(e)}"))
+                    continue
+                self.image_index.replace_file(file, images)
+
+                for image in images:
+                    if image['phash'] is not None and image['content_key'] not in known_hashes:
+                        known_hashes[image['content_key']] = image['phash']
+                        totals['hashed'] += 1
+                totals['files'] += 1
+                totals['images'] += len(images)
+                totals['unhashed'] += sum(1 for image in images if image['hash_skipped'])
+                totals['issues'] += sum(1 for image in images if image['issues'])
+                if self.rows_callback and images:
+                    self.rows_callback([self._build_row(file, image) for image in images])
+
+        self._report(1.0, "Inventario de imágenes completado")
+        messages.append(('info', f"🖼️ {totals['images']} imágenes en {totals['files']} archivo(s); "
+                                 f"{totals['hashed']} hashes perceptuales nuevos"))
+        if totals['unhashed']:
+            messages.append(('warning', f"⚠️ {totals['unhashed']} imagen(es) demasiado grandes se inventariaron "
+                                        "sin hash perceptual (no se comparan como duplicadas)"))
+        return {'summary': totals, 'messages': messages}
+
+    @staticmethod
+    def _build_row(file, image):
+        return {
+            'Archivo': file['name'],
+            'Subcarpeta': file.get('subfolder', ''),
+            'Imagen': image['part'][len(MEDIA_PREFIX):],
+            'Formato': image['format'],
+            'Dimensiones': f"{image['width']}x{image['height']}" if image['width'] else '',
+            'Tamaño (KB)': round(image['bytes'] / 1024, 1),
+            'Diapositivas': ', '.join(str(slide) for slide in sorted({p['slide'] for p in image['placements']})),
+            'DPI efectivo': image['min_dpi'],
+            'Observaciones': ', '.join(image['issues']),
+        }
+
+    def _report(self, fraction, message):
+        if self.progress_callback:
+            self.progress_callback(fraction, message)
@@ -0,0 +1,247 @@
+"""
+Módulo con la cola persistente de trabajos de auditoría (SQLite)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Ruta de la base de datos de la cola (compartida por la interfaz y los workers)
+JOBS_DB_PATH = os.environ.get('AUDIT_JOBS_DB', 'audit_jobs.db')
+
+# Un worker sin latido durante este tiempo se considera caído
+WORKER_TIMEOUT_SECONDS = 60
+
+
+class JobQueue:
+    """Cola de trabajos duradera; cada operación abre su propia conexión (segura entre procesos)"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or JOBS_DB_PATH
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pendiente',
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT DEFAULT '',
+                    result TEXT,
+                    error TEXT,
+                    submitted_by TEXT,
+                    worker_id TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    heartbeat REAL,
+                    detail TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+                CREATE TABLE IF NOT EXISTS job_rows (
+                    job_id INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    row TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                );
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    pid INTEGER,
+                    heartbeat REAL NOT NULL
+                );
+            """)
+            # Bases creadas antes de existir la columna de detalle
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'detail' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN detail TEXT")
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, job_type, payload, submitted_by=None):
+        """Encolar un trabajo y devolver su ID"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (job_type, payload, submitted_by, created_at) VALUES (?, ?, ?, ?)",
+                (job_type, json.dumps(payload), submitted_by, datetime.utcnow().isoformat())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id):
+        """Tomar de forma atómica el trabajo pendiente más antiguo; None si no hay"""
+        with self._connection() as conn:
+            # BEGIN IMMEDIATE bloquea escrituras: dos workers nunca toman el mismo trabajo
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pendiente' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'en_proceso', worker_id = ?, started_at = ?, heartbeat = ? WHERE id = ?",
+                (worker_id, datetime.utcnow().isoformat(), time.time(), row['id'])
+            )
+        return self._to_dict(row)
+
+    def update_progress(self, job_id, progress, message='', detail=None):
+        """Registrar avance (también sirve de latido del trabajo); detail es un avance desglosado opcional"""
+        with self._connection() as conn:
+            if detail is None:
+                conn.execute(
+                    "UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ?",
+                    (progress, message, time.time(), job_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET progress = ?, message = ?, detail = ?, heartbeat = ? WHERE id = ?",
+                    (progress, message, json.dumps(detail, default=str), time.time(), job_id)
+                )
+
+    def heartbeat(self, job_id):
+        """Indicar que el trabajo sigue en proceso aunque no haya avance visible"""
+        with self._connection() as conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def complete(self, job_id, result):
+        """Marcar un trabajo como completado con su resultado"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'completado', progress = 1, result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result, default=str), datetime.utcnow().isoformat(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        """Marcar un trabajo como fallido"""
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'error', error = ?, finished_at = ? WHERE id = ?",
+                (error, datetime.utcnow().isoformat(), job_id)
+            )
+
+    def append_rows(self, job_id, rows):
+        """Publicar filas de resultado de un trabajo en curso"""
+        with self._connection() as conn:
+            # Varios hilos pueden publicar filas del mismo trabajo a la vez
+            conn.execute('BEGIN IMMEDIATE')
+            next_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM job_rows WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO job_rows (job_id, seq, row) VALUES (?, ?, ?)",
+                [(job_id, next_seq + i, json.dumps(row, default=str)) for i, row in enumerate(rows, 1)]
+            )
+
+    def get_rows(self, job_id, offset=0, limit=None):
+        """Filas publicadas por un trabajo a partir de la posición offset (como mucho limit)"""
+        query = "SELECT row FROM job_rows WHERE job_id = ? AND seq > ? ORDER BY seq"
+        params = [job_id, offset]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connection() as conn:
+            return [json.loads(row[0]) for row in conn.execute(query, params)]
+
+    def count_rows(self, job_id):
+        """Número de filas publicadas por un trabajo"""
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM job_rows WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+    def iter_row_chunks(self, job_id, chunk_size=5000):
+        """Recorrer las filas de un trabajo en bloques, sin cargarlas todas en memoria"""
+        last_seq = 0
+        while True:
+            with self._connection() as conn:
+                chunk = conn.execute(
+                    "SELECT seq, row FROM job_rows WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (job_id, last_seq, chunk_size)
+                ).fetchall()
+            if not chunk:
+                return
+            last_seq = chunk[-1]['seq']
+            yield [json.loads(row['row']) for row in chunk]
+
+    def clear_rows(self, job_id):
+        """Descartar las filas de un intento anterior del trabajo"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+
+    def retry(self, job_id):
+        """Volver a encolar un trabajo fallido; sus checkpoints permiten continuar donde se detuvo"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pendiente', error = NULL, worker_id = NULL, finished_at = NULL "
+                "WHERE id = ? AND status = 'error'",
+                (job_id,)
+            )
+            return cursor.rowcount > 0
+
+    def get(self, job_id):
+        """Obtener un trabajo por ID"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, submitted_by=None, limit=20):
+        """Listar los trabajos más recientes (sin el resultado completo)"""
+        query = ("SELECT id, job_type, status, progress, message, error, submitted_by, "
+                 "created_at, started_at, finished_at FROM jobs")
+        params = []
+        if submitted_by:
+            query += " WHERE submitted_by = ?"
+            params.append(submitted_by)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._connection() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def requeue_stale(self, timeout=WORKER_TIMEOUT_SECONDS):
+        """Devolver a la cola los trabajos cuyo worker dejó de dar señales"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pendiente', worker_id = NULL "
+                "WHERE status = 'en_proceso' AND heartbeat < ?",
+                (time.time() - timeout,)
+            )
+            return cursor.rowcount
+
+    def worker_heartbeat(self, worker_id, pid):
+        """Registrar que un worker sigue vivo"""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO workers (worker_id, pid, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET pid = excluded.pid, heartbeat = excluded.heartbeat",
+                (worker_id, pid, time.time())
+            )
+
+    def remove_worker(self, worker_id):
+        """Eliminar el registro de un worker que termina"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def active_workers(self, timeout=WORKER_TIMEOUT_SECONDS):
+        """Número de workers con latido reciente"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE heartbeat >= ?", (time.time() - timeout,)
+            ).fetchone()
+        return row[0]
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job['payload'] = json.loads(job['payload']) if job.get('payload') else {}
+        job['result'] = json.loads(job['result']) if job.get('result') else None
+        job['detail'] = json.loads(job['detail']) if job.get('detail') else None
+        return job
@@ -0,0 +1,407 @@
+"""
+Módulo para validación de estado HTTP de URLs con control de salud por host
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse, urlsplit, urlunsplit
+
+
+def canonicalize_url(url):
+    """Forma canónica de una URL: ocurrencias equivalentes generan la misma petición HTTP"""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {'http': ':80', 'https': ':443'}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    # El fragmento (#...) nunca se envía al servidor
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+class HostHealth:
+    """Estado de salud de un host durante una ejecución de validación"""
+
+    def __init__(self):
+        self.consecutive_failures = 0
+        self.latency = None  # Latencia media observada (segundos, EWMA)
+        self.circuit_open = False
+        self.opened_at = None  # Momento (monotónico) en que se abrió el circuito
+        self.probing = False  # Hay una petición de prueba en curso con el circuito semiabierto
+        self.last_error = ''
+
+
+class DNSCache:
+    """Caché DNS positiva y negativa con TTL, compartida entre hilos"""
+
+    # Errores de getaddrinfo que indican que el dominio no existe (NXDOMAIN)
+    NXDOMAIN_ERRORS = {
+        getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA')
+        if hasattr(socket, name)
+    }
+
+    def __init__(self, positive_ttl=300.0, negative_ttl=60.0):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}  # host -> (expira, direcciones | None, error)
+        self._lock = threading.Lock()
+
+    def resolve(self, host):
+        """
+        Resolver un host usando la caché
+
+        Returns:
+            tuple: (lista de (familia, ip) o None si no existe, mensaje de error)
+        """
+        if not host:
+            return None, 'Host vacío'
+        entry = self._get_entry(host)
+        if entry is not None:
+            return entry[1], entry[2]
+
+        try:
+            infos = socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno in self.NXDOMAIN_ERRORS:
+                self._store(host, None, f'Dominio inexistente (DNS): {host}', self.negative_ttl)
+                return None, f'Dominio inexistente (DNS): {host}'
+            # Fallos transitorios (EAI_AGAIN, etc.) no se cachean
+            return [], str(e)
+
+        addresses = []
+        for family, _, _, _, sockaddr in infos:
+            if (family, sockaddr[0]) not in addresses:
+                addresses.append((family, sockaddr[0]))
+        self._store(host, addresses, '', self.positive_ttl)
+        return addresses, ''
+
+    def resolve_many(self, hosts, max_workers=32):
+        """Pre-resolver concurrentemente un conjunto de hosts únicos"""
+        pending = [h for h in set(hosts) if h and self._get_entry(h) is None]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            list(pool.map(self.resolve, pending))
+
+    def pin(self, host, ip):
+        """Fijar la resolución de un host sin consultar DNS (como una entrada de /etc/hosts)"""
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+        self._store(host, [(family, ip)], '', float('inf'))
+
+    def adapter(self):
+        """
+        Adaptador de transporte de requests que conecta a las IPs ya resueltas en esta caché
+
+        Solo afecta a las sesiones donde se monta: socket.getaddrinfo del proceso no se modifica,
+        y los hosts sin entrada (o resueltos sin direcciones) pasan por la resolución normal
+        """
+        # requests se importa al validar la primera URL, no al cargar la app
+        from requests.adapters import HTTPAdapter
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+        from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+        dns_cache = self
+
+        def pinned(connection_cls):
+            class PinnedConnection(connection_cls):
+                def _new_conn(self):
+                    entry = dns_cache._get_entry(self._dns_host)
+                    if entry is None or not entry[1]:
+                        return super()._new_conn()
+                    # El host original se restaura antes del TLS: SNI y cabecera Host no cambian
+                    dns_host, error = self._dns_host, None
+                    try:
+                        for _, ip in entry[1]:
+                            self._dns_host = ip
+                            try:
+                                return super()._new_conn()
+                            except (ConnectTimeoutError, NewConnectionError) as e:
+                                error = e
+                    finally:
+                        self._dns_host = dns_host
+                    raise error
+            return PinnedConnection
+
+        class PinnedHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = pinned(HTTPConnection)
+
+        class PinnedHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = pinned(HTTPSConnection)
+
+        class PinnedDNSAdapter(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                self.poolmanager.pool_classes_by_scheme = {
+                    'http': PinnedHTTPConnectionPool,
+                    'https': PinnedHTTPSConnectionPool,
+                }
+
+        return PinnedDNSAdapter()
+
+    def _get_entry(self, host):
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[host]
+                return None
+            return entry
+
+    def _store(self, host, addresses, error, ttl):
+        with self._lock:
+            self._entries[host] = (time.monotonic() + ttl, addresses, error)
+
+
+# Caché compartida por todos los validadores del proceso
+shared_dns_cache = DNSCache()
+
+
+class ValidationCache:
+    """Resultados por URL canónica compartidos entre hilos: cada URL se valida una sola vez"""
+
+    def __init__(self):
+        self._futures = {}  # URL canónica -> Future con (código de estado o None, descripción)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._futures)
+
+    def validate_many(self, validator, urls):
+        """
+        Validar las URLs que ningún otro hilo reservó y esperar el resultado de las demás
+
+        Returns:
+            dict: URL canónica -> (código de estado o None, descripción)
+        """
+        own = {}  # URL canónica -> URL original que valida este hilo
+        futures = {}
+        with self._lock:
+            for url in urls:
+                key = canonicalize_url(url)
+                if key in futures:
+                    continue
+                if key not in self._futures:
+                    self._futures[key] = Future()
+                    own[key] = url
+                futures[key] = self._futures[key]
+
+        # Primero las URLs propias: un hilo nunca espera mientras retiene reservas sin resolver
+        try:
+            results = validator.validate_many(list(own.values())) if own else {}
+        except BaseException as e:
+            with self._lock:
+                for key in own:
+                    del self._futures[key]
+            for key in own:
+                futures[key].set_exception(e)
+            raise
+        for key in own:
+            futures[key].set_result(results[key])
+        return {key: future.result() for key, future in futures.items()}
+
+
+class LinkValidator:
+    """Validador de URLs con circuit breaker por host (con prueba tras un enfriamiento) y timeouts adaptativos"""
+
+    # Códigos con los que algunos servidores rechazan HEAD pero aceptan GET
+    HEAD_REJECTED_CODES = {400, 403, 405, 501}
+
+    def __init__(self, max_failures=3, base_timeout=5.0, min_timeout=1.0,
+                 max_timeout=10.0, latency_factor=4.0, latency_alpha=0.3,
+                 dns_cache=None, cooldown=30.0):
+        """
+        Args:
+            max_failures: Fallos de conexión/timeouts consecutivos para abrir el circuito de un host
+            base_timeout: Timeout inicial (segundos) mientras no haya latencia observada
+            min_timeout: Límite inferior del timeout adaptativo
+            max_timeout: Límite superior del timeout adaptativo
+            latency_factor: Multiplicador sobre la latencia media del host
+            latency_alpha: Peso de la última medición en la media móvil exponencial
+            dns_cache: Caché DNS a usar (por defecto la compartida del proceso)
+            cooldown: Segundos con el circuito abierto antes de dejar pasar una petición de prueba
+        """
+        self.max_failures = max_failures
+        self.base_timeout = base_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.latency_factor = latency_factor
+        self.latency_alpha = latency_alpha
+        self.cooldown = cooldown
+        self.hosts = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.dns_cache = dns_cache or shared_dns_cache
+
+    def prepare(self, urls):
+        """Pre-resolver en paralelo los hosts únicos de un lote de URLs"""
+        self.dns_cache.resolve_many(self._hostname(url) for url in urls)
+
+    def validate_many(self, urls, max_workers=8):
+        """
+        Validar una sola vez cada URL canónica distinta de un lote
+
+        Returns:
+            dict: URL canónica -> (código de estado o None, descripción)
+        """
+        unique = {}
+        for url in urls:
+            unique.setdefault(canonicalize_url(url), url)
+        if not unique:
+            return {}
+
+        self.prepare(unique.values())
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as pool:
+            return dict(zip(unique, pool.map(self.validate, unique.values())))
+
+    def validate(self, url):
+        """
+        Validar el estado HTTP de una URL
+
+        Returns:
+            tuple: (código de estado o None, descripción)
+        """
+        host = self._host_key(url)
+        health = self._get_health(host)
+
+        if not self._allow_request(health):
+            return None, (
+                f'Host omitido tras {self.max_failures} fallos consecutivos '
+                f'(último error: {health.last_error})'
+            )
+
+        # Dominios inexistentes fallan de inmediato, sin abrir sockets
+        addresses, dns_error = self.dns_cache.resolve(self._hostname(url))
+        if addresses is None:
+            self._release_probe(health)
+            return None, dns_error
+
+        # requests se importa al validar la primera URL, no al cargar la app
+        import requests
+
+        timeout = self.get_timeout(host)
+        start = time.monotonic()
+        try:
+            resp = self._check(url, timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self._record_failure(health, str(e))
+            return None, str(e)
+        except Exception as e:
+            # Errores propios de la URL (esquema inválido, etc.) no penalizan al host
+            self._release_probe(health)
+            return None, str(e)
+
+        self._record_success(health, time.monotonic() - start)
+        return resp.status_code, resp.reason
+
+    def get_timeout(self, host):
+        """Timeout adaptado a la latencia observada del host"""
+        health = self._get_health(host)
+        if health.latency is None:
+            return self.base_timeout
+        timeout = health.latency * self.latency_factor
+        return max(self.min_timeout, min(self.max_timeout, timeout))
+
+    def get_host_summary(self):
+        """Resumen del estado de cada host consultado"""
+        with self._lock:
+            return [
+                {
+                    'host': host,
+                    'latencia_ms': round(health.latency * 1000) if health.latency is not None else None,
+                    'fallos_consecutivos': health.consecutive_failures,
+                    'circuito_abierto': health.circuit_open,
+                    'ultimo_error': health.last_error,
+                }
+                for host, health in sorted(self.hosts.items())
+            ]
+
+    def _check(self, url, timeout):
+        """HEAD con respaldo a GET por rangos para servidores que rechazan HEAD"""
+        session = self._get_session()
+        resp = session.head(url, allow_redirects=True, timeout=timeout)
+        if resp.status_code in self.HEAD_REJECTED_CODES:
+            resp = session.get(
+                url, allow_redirects=True, timeout=timeout,
+                headers={'Range': 'bytes=0-0'}, stream=True
+            )
+            resp.close()
+        return resp
+
+    def _allow_request(self, health):
+        """Si el circuito deja pasar la petición; tras el enfriamiento pasa una sola de prueba"""
+        with self._lock:
+            if not health.circuit_open:
+                return True
+            if health.probing or time.monotonic() - health.opened_at < self.cooldown:
+                return False
+            health.probing = True
+            return True
+
+    def _release_probe(self, health):
+        # La prueba no llegó a contactar al host: la siguiente petición vuelve a probar
+        with self._lock:
+            health.probing = False
+
+    def _record_success(self, health, elapsed):
+        with self._lock:
+            health.consecutive_failures = 0
+            health.circuit_open = False
+            health.probing = False
+            if health.latency is None:
+                health.latency = elapsed
+            else:
+                health.latency = (self.latency_alpha * elapsed +
+                                  (1 - self.latency_alpha) * health.latency)
+
+    def _record_failure(self, health, error):
+        with self._lock:
+            health.consecutive_failures += 1
+            health.last_error = error
+            # Una prueba fallida vuelve a abrir el circuito por otro periodo de enfriamiento
+            if health.consecutive_failures >= self.max_failures or health.probing:
+                health.circuit_open = True
+                health.opened_at = time.monotonic()
+                health.probing = False
+
+    def _get_health(self, host):
+        with self._lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostHealth()
+            return self.hosts[host]
+
+    def _get_session(self):
+        # requests.Session no es seguro entre hilos: una sesión por hilo
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            # Las conexiones usan las IPs pre-resueltas de la caché DNS del validador
+            adapter = self.dns_cache.adapter()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    @staticmethod
+    def _host_key(url):
+        try:
+            return urlparse(url).netloc.lower()
+        except Exception:
+            return ''
+
+    @staticmethod
+    def _hostname(url):
+        try:
+            return urlparse(url).hostname or ''
+        except Exception:
+            return ''
@@ -0,0 +1,437 @@
+"""
+Módulo con el inventario de videos y audios de presentaciones, leído solo del directorio ZIP y de las relaciones
+"""
+
+import io
+import os
+import posixpath
+import sqlite3
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from audit_store import AUDIT_STORE_DB_PATH
+from drive_range import RANGED_READ_MIN_BYTES
+from hyperlink_index import NS_DRAWING, NS_PRESENTATION, NS_RELS, OOXMLPackage, SHAPE_TAGS
+
+NS_P14 = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
+
+# Elementos de una diapositiva que enlazan un video o audio (r:link o r:embed)
+MEDIA_TAGS = {
+    f'{{{NS_DRAWING}}}videoFile': 'video',
+    f'{{{NS_DRAWING}}}quickTimeFile': 'video',
+    f'{{{NS_DRAWING}}}audioFile': 'audio',
+    f'{{{NS_DRAWING}}}wavAudioFile': 'audio',
+    f'{{{NS_P14}}}media': None,  # Tipo según la extensión del destino
+}
+
+# Sufijos de los tipos de relación de video y audio (OOXML y extensión de Office 2010)
+MEDIA_RELATIONSHIP_SUFFIXES = ('/video', '/audio', '/media')
+
+# Extensión -> (tipo, contenedor, códec habitual, reproducible en navegadores y apps móviles)
+MEDIA_FORMATS = {
+    '.mp4': ('video', 'MPEG-4', 'H.264 / AAC', True),
+    '.m4v': ('video', 'MPEG-4', 'H.264 / AAC', True),
+    '.mov': ('video', 'QuickTime', 'H.264 / ProRes', False),
+    '.webm': ('video', 'WebM', 'VP8 / VP9', True),
+    '.wmv': ('video', 'Windows Media', 'WMV', False),
+    '.asf': ('video', 'Windows Media', 'WMV', False),
+    '.avi': ('video', 'AVI', 'Variable (DivX, Xvid, MJPEG...)', False),
+    '.mpg': ('video', 'MPEG', 'MPEG-1 / MPEG-2', False),
+    '.mpeg': ('video', 'MPEG', 'MPEG-1 / MPEG-2', False),
+    '.mkv': ('video', 'Matroska', 'Variable', False),
+    '.flv': ('video', 'Flash Video', 'Sorenson / VP6', False),
+    '.swf': ('video', 'Flash', 'Flash (obsoleto)', False),
+    '.mp3': ('audio', 'MPEG', 'MP3', True),
+    '.m4a': ('audio', 'MPEG-4', 'AAC', True),
+    '.aac': ('audio', 'ADTS', 'AAC', True),
+    '.wav': ('audio', 'WAVE', 'PCM', True),
+    '.ogg': ('audio', 'Ogg', 'Vorbis / Opus', True),
+    '.wma': ('audio', 'Windows Media', 'WMA', False),
+    '.mid': ('audio', 'MIDI', 'MIDI', False),
+    '.midi': ('audio', 'MIDI', 'MIDI', False),
+    '.aif': ('audio', 'AIFF', 'PCM', False),
+    '.aiff': ('audio', 'AIFF', 'PCM', False),
+}
+
+# Servicios de video enlazados que se reconocen por dominio
+STREAMING_DOMAINS = {
+    'youtube.com': 'YouTube', 'youtu.be': 'YouTube', 'vimeo.com': 'Vimeo',
+    'drive.google.com': 'Google Drive', 'dailymotion.com': 'Dailymotion',
+}
+
+# Videos incrustados más pesados que esto se marcan para comprimir o enlazar
+HEAVY_MEDIA_BYTES = int(os.environ.get('HEAVY_MEDIA_BYTES', 50 * 1024 * 1024))
+
+
+def describe_format(target):
+    """(tipo, contenedor, códec, compatible) según la extensión de un destino; tipo None si no es multimedia"""
+    path = urlsplit(target).path if '://' in target else target
+    return MEDIA_FORMATS.get(posixpath.splitext(path.lower())[1], (None, '', '', False))
+
+
+def streaming_service(url):
+    """Nombre del servicio de video de una URL externa ('' si no es uno conocido)"""
+    host = urlsplit(url).netloc.lower().split(':', 1)[0]
+    for domain, service in STREAMING_DOMAINS.items():
+        if host == domain or host.endswith(f'.{domain}'):
+            return service
+    return ''
+
+
+class DeckMediaInventory(OOXMLPackage):
+    """Videos y audios de una presentación sin descomprimir su contenido"""
+
+    def __init__(self, file_path_or_content):
+        """
+        Args:
+            file_path_or_content: Ruta, contenido en bytes u objeto de archivo con seek (p. ej. una lectura
+                por rangos): del ZIP solo se leen el directorio central, las .rels y las diapositivas con multimedia
+        """
+        self.file_path_or_content = file_path_or_content
+
+    def build(self):
+        """
+        Construir el inventario multimedia
+
+        Returns:
+            List[dict]: Una entrada por video o audio con 'target', 'origin' ('incrustado', 'enlazado'
+            o 'archivo local'), 'kind', 'container', 'codec', 'compatible', 'bytes', 'compressed_bytes',
+            'service', 'slides', 'patterns' (diseños y patrones que lo usan), 'shapes' e 'issues'
+        """
+        source = self.file_path_or_content
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+
+        with zipfile.ZipFile(source, 'r') as zip_file:
+            infos = {info.filename: info for info in zip_file.infolist()}
+            sizes = {name: info.file_size for name, info in infos.items()}
+            slide_order = self._slide_order(zip_file, sizes)
+            relationships = {
+                part_name: self._parse_relationships(zip_file, self._rels_name(part_name), sizes)
+                for part_name in slide_order
+            }
+            # Un video del diseño o del patrón se reproduce en todas las diapositivas que lo heredan
+            pattern_slides = self._pattern_slides(zip_file, slide_order, relationships, sizes)
+
+            media = {}
+            slides_in_order = sorted(slide_order.items(), key=lambda item: item[1])
+            parts = [(part_name, [slide_num]) for part_name, slide_num in slides_in_order]
+            parts += sorted(pattern_slides.items())
+            for part_name, slides in parts:
+                if part_name not in relationships:
+                    relationships[part_name] = self._parse_relationships(zip_file, self._rels_name(part_name), sizes)
+                media_rels = {
+                    rel_id: (target, mode)
+                    for rel_id, rel_type, target, mode in relationships[part_name]
+                    if rel_type.endswith(MEDIA_RELATIONSHIP_SUFFIXES)
+                }
+                if not media_rels:
+                    continue
+                shapes = self._media_shapes(zip_file, part_name, sizes)
+                for rel_id, (target, mode) in media_rels.items():
+                    if mode == 'External':
+                        key = target
+                    else:
+                        key = self._resolve_target(part_name, target)
+                    entry = media.setdefault(key, self._new_entry(key, mode, infos))
+                    if part_name in pattern_slides and part_name not in entry['patterns']:
+                        entry['patterns'].append(part_name)
+                    for slide_num in slides:
+                        if slide_num not in entry['slides']:
+                            entry['slides'].append(slide_num)
+                    shape_name, tag_kind = shapes.get(rel_id, ('', None))
+                    if shape_name and shape_name not in entry['shapes']:
+                        entry['shapes'].append(shape_name)
+                    if entry['kind'] is None:
+                        entry['kind'] = tag_kind
+
+            # Multimedia incrustada que ninguna diapositiva ni plantilla usa (p. ej. tras borrar la diapositiva)
+            for name, info in infos.items():
+                if name.startswith('ppt/media/') and name not in media and describe_format(name)[0]:
+                    media[name] = self._new_entry(name, '', infos)
+
+        items = list(media.values())
+        for item in items:
+            item['slides'].sort()
+            self._evaluate(item)
+        return items
+
+    def _new_entry(self, target, mode, infos):
+        kind, container, codec, compatible = describe_format(target)
+        info = infos.get(target) if mode != 'External' else None
+        if mode != 'External':
+            origin = 'incrustado'
+        elif target.lower().startswith('file:') or not urlsplit(target).scheme or len(urlsplit(target).scheme) == 1:
+            # file:///C:/... o rutas de Windows (C:\...): solo existen en el equipo del autor
+            origin = 'archivo local'
+        else:
+            origin = 'enlazado'
+        return {
+            'target': target,
+            'origin': origin,
+            'kind': kind,
+            'container': container,
+            'codec': codec,
+            'compatible': compatible,
+            'bytes': info.file_size if info else None,
+            'compressed_bytes': info.compress_size if info else None,
+            'service': streaming_service(target) if origin == 'enlazado' else '',
+            'slides': [],
+            'patterns': [],
+            'shapes': [],
+        }
+
+    def _pattern_slides(self, zip_file, slide_order, relationships, sizes):
+        """
+        Diapositivas que heredan cada diseño (ppt/slideLayouts) y patrón (ppt/slideMasters)
+
+        Completa relationships con las relaciones de los diseños y patrones que usan las diapositivas
+        """
+        pattern_slides = {
+            name: [] for name in sizes
+            if name.startswith(('ppt/slideLayouts/', 'ppt/slideMasters/')) and name.count('/') == 2
+            and name.endswith('.xml')
+        }
+
+        def related(part_name, suffix):
+            if part_name not in relationships:
+                relationships[part_name] = self._parse_relationships(zip_file, self._rels_name(part_name), sizes)
+            for _, rel_type, target, mode in relationships[part_name]:
+                if mode != 'External' and rel_type.endswith(suffix):
+                    return self._resolve_target(part_name, target)
+            return None
+
+        for part_name, slide_num in sorted(slide_order.items(), key=lambda item: item[1]):
+            layout = related(part_name, '/slideLayout')
+            master = related(layout, '/slideMaster') if layout in pattern_slides else None
+            for pattern in (layout, master):
+                if pattern in pattern_slides and slide_num not in pattern_slides[pattern]:
+                    pattern_slides[pattern].append(slide_num)
+        return pattern_slides
+
+    def _media_shapes(self, zip_file, part_name, sizes):
+        """r:id -> (nombre de la forma, tipo) de los videos y audios dibujados en una diapositiva"""
+        content = self._read_part(zip_file, part_name, sizes)
+        if content is None:
+            return {}
+
+        shapes = {}
+        shape_names = []
+        try:
+            for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+                if element.tag in SHAPE_TAGS:
+                    if event == 'start':
+                        shape_names.append('')
+                    else:
+                        shape_names.pop()
+                        element.clear()
+                elif event == 'start' and element.tag == f'{{{NS_PRESENTATION}}}cNvPr' and shape_names:
+                    shape_names[-1] = element.get('name', '')
+                elif event == 'start' and element.tag in MEDIA_TAGS:
+                    rel_id = element.get(f'{{{NS_RELS}}}link') or element.get(f'{{{NS_RELS}}}embed')
+                    if rel_id and rel_id not in shapes:
+                        shapes[rel_id] = (shape_names[-1] if shape_names else '', MEDIA_TAGS[element.tag])
+        except ET.ParseError as e:
+            print(f"Error al leer {part_name}: {str(e)}")
+        return shapes
+
+    @staticmethod
+    def _evaluate(item):
+        issues = []
+        if item['origin'] == 'archivo local':
+            issues.append('enlace a archivo local')
+        if item['origin'] != 'enlazado' and item['kind'] and not item['compatible']:
+            issues.append('formato poco compatible')
+        if item['bytes'] and item['bytes'] > HEAVY_MEDIA_BYTES:
+            issues.append('pesado')
+        if not item['slides'] and not item['patterns']:
+            issues.append('sin uso en diapositivas')
+        item['kind'] = item['kind'] or ('video' if item['service'] else 'desconocido')
+        item['issues'] = issues
+
+
+class MediaIndex:
+    """Inventario persistente de videos y audios entre presentaciones"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or AUDIT_STORE_DB_PATH
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS media_inventory (
+                    file_id TEXT NOT NULL,
+                    filename TEXT,
+                    subfolder TEXT,
+                    target TEXT NOT NULL,
+                    origin TEXT,
+                    kind TEXT,
+                    container TEXT,
+                    codec TEXT,
+                    compatible INTEGER,
+                    bytes INTEGER,
+                    compressed_bytes INTEGER,
+                    service TEXT,
+                    slides TEXT,
+                    issues TEXT,
+                    indexed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_media_inventory_file ON media_inventory(file_id);
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def replace_file(self, file, items):
+        """Reemplazar el inventario de un archivo por el de su último análisis"""
+        indexed_at = datetime.utcnow().isoformat()
+        rows = [
+            (
+                file['id'], file['name'], file.get('subfolder', ''), item['target'], item['origin'], item['kind'],
+                item['container'], item['codec'], int(item['compatible']), item['bytes'], item['compressed_bytes'],
+                item['service'], ','.join(str(slide) for slide in item['slides']), ', '.join(item['issues']),
+                indexed_at,
+            )
+            for item in items
+        ]
+        with self._connection() as conn:
+            conn.execute("DELETE FROM media_inventory WHERE file_id = ?", (file['id'],))
+            conn.executemany(
+                "INSERT INTO media_inventory (file_id, filename, subfolder, target, origin, kind, container, codec, "
+                "compatible, bytes, compressed_bytes, service, slides, issues, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def format_summary(self):
+        """Videos y audios por tipo, origen y contenedor"""
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT kind AS tipo, origin AS origen, COALESCE(NULLIF(service, ''), container) AS formato,
+                       COUNT(*) AS elementos, COUNT(DISTINCT file_id) AS archivos,
+                       ROUND(SUM(COALESCE(bytes, 0)) / 1048576.0, 1) AS mb
+                FROM media_inventory GROUP BY tipo, origen, formato ORDER BY elementos DESC
+            """).fetchall()
+        return [dict(row) for row in rows]
+
+    def items_with_issues(self, limit=500):
+        """Elementos con alguna observación, los más pesados primero"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT filename, subfolder, target, origin, kind, container, bytes, slides, issues "
+                "FROM media_inventory WHERE issues != '' ORDER BY COALESCE(bytes, 0) DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class MediaInventoryRun:
+    """Inventario de videos y audios de un lote de archivos de Drive, varios archivos a la vez"""
+
+    def __init__(self, drive_manager, media_index, progress_callback=None, rows_callback=None, max_workers=8):
+        """
+        Args:
+            drive_manager: GoogleDriveManager autenticado (cada hilo usa su propia copia)
+            media_index: MediaIndex donde se guarda el inventario
+            progress_callback: Función (fracción 0-1, mensaje) para informar avance
+            rows_callback: Función que recibe las filas de cada archivo en cuanto está listo
+            max_workers: Archivos inventariados a la vez
+        """
+        self.drive_manager = drive_manager
+        self.media_index = media_index
+        self.progress_callback = progress_callback
+        self.rows_callback = rows_callback
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._done = 0
+
+    def run(self, files):
+        """
+        Inventariar los videos y audios de una lista de archivos
+
+        Returns:
+            dict: 'summary' y 'messages'
+        """
+        self._done = 0
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            results = list(executor.map(lambda file: self._inventory(file, len(files)), files))
+
+        messages = [message for _, message in results if message]
+        inventories = [items for items, _ in results if items is not None]
+        totals = {
+            'files': len(inventories),
+            'items': sum(len(items) for items in inventories),
+            'embedded_bytes': sum(item['bytes'] or 0 for items in inventories for item in items),
+            'issues': sum(1 for items in inventories for item in items if item['issues']),
+        }
+        self._report(1.0, "Inventario multimedia completado")
+        messages.append(('info', f"🎬 {totals['items']} videos y audios en {totals['files']} archivo(s); "
+                                 f"{totals['embedded_bytes'] / 1048576:.1f} MB incrustados"))
+        return {'summary': totals, 'messages': messages}
+
+    def _inventory(self, file, total):
+        """(elementos o None si falló, mensaje) de un archivo"""
+        items, message = None, None
+        try:
+            items = DeckMediaInventory(self._open(file)).build()
+            self.media_index.replace_file(file, items)
+            if self.rows_callback and items:
+                self.rows_callback([self._build_row(file, item) for item in items])
+        except FileNotFoundError:
+            items, message = None, ('warning', f"No se pudo descargar {file['name']}")
+        except Exception as e:
+            items, message = None, ('error', f"❌ No se pudo inventariar {file['name']}: {str(e)}")
+        with self._lock:
+            self._done += 1
+            done = self._done
+        self._report(done / max(total, 1), f"{done}/{total} archivos inventariados")
+        return items, message
+
+    def _thread_drive_manager(self):
+        """Cliente de Drive propio del hilo actual"""
+        if getattr(self._local, 'drive_manager', None) is None:
+            self._local.drive_manager = self.drive_manager.thread_copy()
+        return self._local.drive_manager
+
+    def _open(self, file):
+        """Contenido del archivo: las presentaciones grandes se leen por rangos, sin bajar sus videos"""
+        drive_manager = self._thread_drive_manager()
+        if int(file.get('size') or 0) >= RANGED_READ_MIN_BYTES:
+            return drive_manager.open_ranged(file)
+        content = drive_manager.download_file(file['id'])
+        if not content:
+            raise FileNotFoundError(file['id'])
+        return content
+
+    @staticmethod
+    def _build_row(file, item):
+        return {
+            'Archivo': file['name'],
+            'Subcarpeta': file.get('subfolder', ''),
+            'Tipo': item['kind'],
+            'Origen': item['origin'],
+            'Destino': item['target'],
+            'Formato': item['service'] or item['container'],
+            'Códec habitual': item['codec'],
+            'Tamaño (MB)': round(item['bytes'] / 1048576, 2) if item['bytes'] else None,
+            'Diapositivas': ', '.join(str(slide) for slide in item['slides']),
+            'Diseños y patrones': ', '.join(posixpath.basename(pattern) for pattern in item['patterns']),
+            'Observaciones': ', '.join(item['issues']),
+        }
+
+    def _report(self, fraction, message):
+        if self.progress_callback:
+            self.progress_callback(fraction, message)
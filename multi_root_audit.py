@@ -0,0 +1,186 @@
+"""
+Módulo con la auditoría en lote de varias carpetas raíz de Google Drive
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from audit_pipeline import URLAuditPipeline
+from link_validator import LinkValidator, ValidationCache
+
+
+class MultiRootAudit:
+    """Audita varias carpetas raíz a la vez bajo un presupuesto global de concurrencia y de archivos"""
+
+    def __init__(self, drive_manager, processed_by, supabase=None, max_concurrent_folders=4,
+                 max_files=None, fast_mode=False, progress_callback=None, rows_callback=None,
+                 checkpoints=None, run_id=None, store=None, url_index=None,
+                 slide_index_cache=None, profiler=None):
+        """
+        Args:
+            drive_manager: GoogleDriveManager autenticado (cada hilo usa su propia copia)
+            processed_by: Usuario que solicitó la auditoría
+            supabase: Cliente Supabase opcional para guardar los resultados
+            max_concurrent_folders: Carpetas auditadas a la vez; como cada carpeta descarga
+                un archivo por vez, también limita las descargas simultáneas
+            max_files: Archivos máximos a auditar entre todas las carpetas (None = sin límite)
+            fast_mode: Usar el índice rápido de hipervínculos (ver URLAuditPipeline)
+            progress_callback: Función (fracción 0-1, mensaje, avance por carpeta)
+            rows_callback: Función que recibe cada grupo de filas en cuanto está listo
+            checkpoints: CheckpointStore para reanudar la ejecución run_id
+            run_id: Identificador de la ejecución (p. ej. el ID del trabajo en la cola)
+            store: AuditStore local donde se guardan los resultados
+            url_index: URLIndex que se actualiza con las URLs de cada archivo auditado
+            slide_index_cache: SlideIndexCache donde se guarda el índice de diapositivas de cada archivo
+            profiler: FileProfiler compartido por todas las carpetas (ver URLAuditPipeline)
+        """
+        self.drive_manager = drive_manager
+        self.processed_by = processed_by
+        self.supabase = supabase
+        self.max_concurrent_folders = max_concurrent_folders
+        self.max_files = max_files
+        self.fast_mode = fast_mode
+        self.progress_callback = progress_callback
+        self.rows_callback = rows_callback
+        self.checkpoints = checkpoints
+        self.run_id = run_id
+        self.store = store
+        self.url_index = url_index
+        self.slide_index_cache = slide_index_cache
+        self.profiler = profiler
+        # Un único validador: hosts caídos y latencias se comparten entre carpetas
+        self.validator = LinkValidator()
+        self.folders = {}  # ID de carpeta -> avance (filas del resumen por carpeta)
+        self._fractions = {}
+        self._files_left = max_files
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def run(self, folder_ids):
+        """
+        Auditar todas las carpetas indicadas
+
+        Returns:
+            dict: 'rows' combinadas, 'summary', 'folders' (resumen por carpeta), 'messages' y 'hosts_down'
+        """
+        folder_ids = list(dict.fromkeys(str(folder_id).strip() for folder_id in folder_ids if str(folder_id).strip()))
+        self.folders = {
+            folder_id: {'Carpeta': folder_id, 'ID': folder_id, 'Estado': 'pendiente',
+                        'Archivos': 0, 'Procesados': 0, 'Omitidos': 0, 'URLs': 0, 'Detalle': ''}
+            for folder_id in folder_ids
+        }
+        self._fractions = {folder_id: 0.0 for folder_id in folder_ids}
+        self._files_left = self.max_files
+        validations = ValidationCache()  # URL canónica -> resultado, compartida por todas las carpetas
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrent_folders)) as executor:
+            folder_results = list(executor.map(self._audit_folder, folder_ids, repeat(validations)))
+
+        rows = []
+        messages = []
+        for folder_result in folder_results:
+            rows.extend(folder_result['rows'])
+            messages.extend(folder_result['messages'])
+
+        skipped = sum(folder['Omitidos'] for folder in self.folders.values())
+        if skipped:
+            messages.append(('warning', f"⚠️ {skipped} archivo(s) sin auditar: se alcanzó el máximo de {self.max_files} archivos"))
+        self._report()
+
+        return {
+            'rows': rows,
+            'summary': {
+                'folders': len(folder_ids),
+                'files': sum(folder['Archivos'] for folder in self.folders.values()),
+                'skipped_files': skipped,
+                'occurrences': len(rows),
+                'unique_urls': len(validations),
+                'requests_saved': len(rows) - len(validations),
+            },
+            'folders': list(self.folders.values()),
+            'messages': messages,
+            'hosts_down': [h for h in self.validator.get_host_summary() if h['circuito_abierto']],
+        }
+
+    def _audit_folder(self, folder_id, validations):
+        """Explorar y auditar una carpeta raíz; los errores quedan en su fila del resumen"""
+        try:
+            drive_manager = self._thread_drive_manager()
+            self._update(folder_id, Estado='explorando')
+            # Sin interfaz que muestre los avisos: una carpeta inaccesible (403/404/cuota) termina en error
+            folder_name = drive_manager.get_folder_name(folder_id, raise_errors=True)
+            files = self._reserve_files(folder_id, drive_manager.find_pptx_files(folder_id, raise_errors=True))
+            self._update(folder_id, Carpeta=folder_name, Estado='auditando', Archivos=len(files))
+
+            pipeline = URLAuditPipeline(
+                drive_manager,
+                processed_by=self.processed_by,
+                supabase=self.supabase,
+                validator=self.validator,
+                progress_callback=lambda fraction, _: self._update(
+                    folder_id, fraction=fraction, Procesados=round(fraction * len(files))
+                ),
+                checkpoints=self.checkpoints,
+                run_id=self.run_id,
+                rows_callback=lambda batch: self._emit_rows(folder_name, batch),
+                fast_mode=self.fast_mode,
+                store=self.store,
+                url_index=self.url_index,
+                slide_index_cache=self.slide_index_cache,
+                profiler=self.profiler,
+            )
+            result = pipeline.run(files, validations=validations)
+            rows = [self._tag_row(folder_name, row) for row in result['rows']]
+            self._update(folder_id, fraction=1.0, Estado='completado', Procesados=len(files), URLs=len(rows))
+            return {'rows': rows, 'messages': result['messages']}
+        except Exception as e:
+            self._update(folder_id, fraction=1.0, Estado='error', Detalle=str(e))
+            return {'rows': [], 'messages': [('error', f"❌ Error al auditar la carpeta {folder_id}: {str(e)}")]}
+
+    def _thread_drive_manager(self):
+        """Cliente de Drive propio del hilo actual"""
+        if getattr(self._local, 'drive_manager', None) is None:
+            self._local.drive_manager = self.drive_manager.thread_copy()
+        return self._local.drive_manager
+
+    def _reserve_files(self, folder_id, files):
+        """Tomar del presupuesto global los archivos que se auditarán de esta carpeta"""
+        with self._lock:
+            if self._files_left is None:
+                return files
+            allowed = files[:self._files_left]
+            self._files_left -= len(allowed)
+        self._update(folder_id, Omitidos=len(files) - len(allowed))
+        return allowed
+
+    def _emit_rows(self, folder_name, rows):
+        if self.rows_callback:
+            self.rows_callback([self._tag_row(folder_name, row) for row in rows])
+
+    @staticmethod
+    def _tag_row(folder_name, row):
+        return {'Carpeta raíz': folder_name, **row}
+
+    def _update(self, folder_id, fraction=None, **changes):
+        """Actualizar el avance de una carpeta e informar el avance global"""
+        with self._lock:
+            self.folders[folder_id].update(changes)
+            if fraction is not None:
+                self._fractions[folder_id] = fraction
+        self._report()
+
+    def _report(self):
+        if not self.progress_callback:
+            return
+        with self._lock:
+            folders = [dict(folder) for folder in self.folders.values()]
+            fraction = sum(self._fractions.values()) / max(len(self._fractions), 1)
+        finished = sum(1 for folder in folders if folder['Estado'] in ('completado', 'error'))
+        processed = sum(folder['Procesados'] for folder in folders)
+        total = sum(folder['Archivos'] for folder in folders)
+        self.progress_callback(
+            fraction,
+            f"{finished}/{len(folders)} carpetas terminadas · {processed}/{total} archivos",
+            folders,
+        )
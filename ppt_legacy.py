@@ -0,0 +1,346 @@
+"""
+Módulo para lectura directa de presentaciones PowerPoint 97-2003 (.ppt, formato binario OLE2)
+"""
+
+import struct
+
+# Firma de los archivos OLE2 / Compound File Binary
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Valores especiales de la FAT
+FREESECT = 0xFFFFFFFF
+ENDOFCHAIN = 0xFFFFFFFE
+
+# Tipos de registro de PowerPoint usados por el escáner
+RT_DOCUMENT = 0x03E8
+RT_SLIDE = 0x03EE
+RT_NOTES = 0x03F0
+RT_SLIDE_PERSIST_ATOM = 0x03F3
+RT_MAIN_MASTER = 0x03F8
+RT_TEXT_CHARS_ATOM = 0x0FA0
+RT_TEXT_BYTES_ATOM = 0x0FA8
+RT_CSTRING = 0x0FBA
+RT_EX_HYPERLINK_ATOM = 0x0FD3
+RT_EX_HYPERLINK = 0x0FD7
+RT_SLIDE_LIST_WITH_TEXT = 0x0FF0
+RT_INTERACTIVE_INFO_ATOM = 0x0FF3
+RT_USER_EDIT_ATOM = 0x0FF5
+RT_PERSIST_DIRECTORY_ATOM = 0x1772
+
+
+def is_legacy_ppt(content):
+    """Indica si el contenido es un archivo OLE2 (formato .ppt binario)"""
+    return content[:8] == OLE2_SIGNATURE
+
+
+class CompoundFileReader:
+    """Lector mínimo de archivos Compound File Binary (OLE2) en memoria"""
+
+    def __init__(self, content):
+        if not is_legacy_ppt(content):
+            raise ValueError("No es un archivo OLE2")
+        self.content = content
+
+        if len(content) < 512:
+            raise ValueError("Archivo OLE2 truncado (sin cabecera completa)")
+        sector_shift, mini_sector_shift = struct.unpack_from('<HH', content, 30)
+        # Versión 3 (sectores de 512 bytes) o 4 (4096); cualquier otro valor es un archivo dañado
+        if sector_shift not in (9, 12) or mini_sector_shift != 6:
+            raise ValueError("Cabecera OLE2 inválida")
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_sector_shift
+        # Sectores presentes en el archivo (la cabecera ocupa el primero); un archivo truncado tiene menos
+        self.num_sectors = (len(content) - 1) // self.sector_size
+        (num_fat_sectors, first_dir_sector, _, self.mini_stream_cutoff,
+         first_minifat_sector, _, first_difat_sector, num_difat_sectors) = struct.unpack_from('<8I', content, 44)
+
+        self.fat = self._read_fat(num_fat_sectors, first_difat_sector, num_difat_sectors)
+        self.entries = self._read_directory(first_dir_sector)
+
+        root = self.entries[0]
+        self.minifat = []
+        self.mini_stream = b''
+        if first_minifat_sector != ENDOFCHAIN and root['size']:
+            minifat_bytes = self._read_chain(first_minifat_sector)
+            self.minifat = list(struct.unpack(f'<{len(minifat_bytes) // 4}I', minifat_bytes))
+            self.mini_stream = self._read_chain(root['start'])[:root['size']]
+
+    def read_stream(self, name):
+        """Leer un stream por nombre; None si no existe"""
+        for entry in self.entries:
+            if entry['type'] == 2 and entry['name'] == name:
+                if entry['size'] < self.mini_stream_cutoff:
+                    return self._read_mini_chain(entry['start'])[:entry['size']]
+                return self._read_chain(entry['start'])[:entry['size']]
+        return None
+
+    def _sector(self, sector):
+        """Contenido de un sector; error si apunta fuera del archivo"""
+        if sector >= self.num_sectors:
+            raise ValueError("Sector OLE2 fuera del archivo")
+        offset = (sector + 1) * self.sector_size
+        return self.content[offset:offset + self.sector_size]
+
+    def _sector_values(self, sector):
+        data = self._sector(sector)
+        if len(data) < self.sector_size:
+            raise ValueError("Archivo OLE2 truncado")
+        return struct.unpack(f'<{self.sector_size // 4}I', data)
+
+    def _read_fat(self, num_fat_sectors, first_difat_sector, num_difat_sectors):
+        difat = list(struct.unpack_from('<109I', self.content, 76))
+        sector = first_difat_sector
+        visited = set()
+        # Cada sector DIFAT es un sector distinto del archivo: una cadena más larga tiene un ciclo
+        for _ in range(min(num_difat_sectors, self.num_sectors)):
+            if sector in (FREESECT, ENDOFCHAIN):
+                break
+            if sector in visited:
+                raise ValueError("Cadena DIFAT OLE2 con ciclo")
+            visited.add(sector)
+            values = self._sector_values(sector)
+            difat.extend(values[:-1])
+            sector = values[-1]
+
+        fat = []
+        for fat_sector in difat[:min(num_fat_sectors, self.num_sectors)]:
+            if fat_sector == FREESECT:
+                continue
+            fat.extend(self._sector_values(fat_sector))
+        return fat
+
+    def _read_chain(self, start):
+        chunks = []
+        sector = start
+        visited = set()
+        while sector not in (ENDOFCHAIN, FREESECT):
+            if sector >= len(self.fat) or sector in visited:
+                raise ValueError("Cadena de sectores OLE2 inválida")
+            visited.add(sector)
+            chunks.append(self._sector(sector))
+            sector = self.fat[sector]
+        return b''.join(chunks)
+
+    def _read_mini_chain(self, start):
+        chunks = []
+        sector = start
+        visited = set()
+        while sector not in (ENDOFCHAIN, FREESECT):
+            if sector >= len(self.minifat) or sector in visited:
+                raise ValueError("Cadena de mini-sectores OLE2 inválida")
+            visited.add(sector)
+            offset = sector * self.mini_sector_size
+            chunks.append(self.mini_stream[offset:offset + self.mini_sector_size])
+            sector = self.minifat[sector]
+        return b''.join(chunks)
+
+    def _read_directory(self, first_dir_sector):
+        data = self._read_chain(first_dir_sector)
+        entries = []
+        for offset in range(0, len(data) - 127, 128):
+            name_len, entry_type = struct.unpack_from('<HB', data, offset + 64)
+            start, size = struct.unpack_from('<IQ', data, offset + 116)
+            name = data[offset:offset + max(name_len - 2, 0)].decode('utf-16-le', errors='ignore')
+            if self.sector_size == 512:
+                size &= 0xFFFFFFFF  # Versión 3: solo son válidos los 32 bits bajos
+            entries.append({'name': name, 'type': entry_type, 'start': start, 'size': size})
+        return entries
+
+
+class LegacyPPTReader:
+    """Recorre los registros del stream 'PowerPoint Document' y obtiene textos e hipervínculos"""
+
+    def __init__(self, content):
+        cfb = CompoundFileReader(content)
+        self.document = cfb.read_stream('PowerPoint Document')
+        if self.document is None:
+            raise ValueError("El archivo OLE2 no contiene el stream 'PowerPoint Document'")
+        self.current_user = cfb.read_stream('Current User') or b''
+        self.live_offsets = None  # Offsets de los registros vigentes; None sin directorio de persistencia
+        self.document_offset = None
+        self.slide_numbers = self._map_slide_offsets()
+
+    def iter_items(self):
+        """
+        Generar los elementos de texto e hipervínculos de la presentación
+
+        Yields:
+            tuple: (número de diapositiva o 0, tipo, texto) con tipo 'texto', 'notas',
+            'patron' o 'hipervinculo'
+        """
+        hyperlinks = {}  # exHyperlinkId -> destino
+        hyperlink_slides = {}  # exHyperlinkId -> diapositiva que lo usa
+
+        for rec_type, instance, start, end in self._iter_records(0, len(self.document)):
+            if not self._is_live(rec_type, start - 8):
+                continue
+            if rec_type == RT_SLIDE:
+                slide_num = self.slide_numbers.get(start - 8, 0)
+                for item in self._iter_container(start, end, slide_num, 'texto', hyperlink_slides):
+                    yield item
+            elif rec_type == RT_NOTES:
+                for item in self._iter_container(start, end, 0, 'notas', hyperlink_slides):
+                    yield item
+            elif rec_type == RT_MAIN_MASTER:
+                for item in self._iter_container(start, end, 0, 'patron', hyperlink_slides):
+                    yield item
+            elif rec_type == RT_DOCUMENT:
+                for item in self._iter_document(start, end, hyperlinks):
+                    yield item
+
+        for link_id, target in hyperlinks.items():
+            yield hyperlink_slides.get(link_id, 0), 'hipervinculo', target
+
+    def _is_live(self, rec_type, offset):
+        """
+        Si un contenedor de primer nivel pertenece a la versión vigente de la presentación
+
+        Los guardados incrementales dejan en el stream copias anteriores de diapositivas, notas,
+        patrones y del propio Document que el directorio de persistencia ya no referencia
+        """
+        if self.live_offsets is None:
+            return True
+        if rec_type == RT_DOCUMENT:
+            return offset == self.document_offset
+        if rec_type == RT_SLIDE:
+            # Solo las diapositivas de la lista del Document vigente (no las borradas)
+            return offset in self.slide_numbers
+        if rec_type in (RT_NOTES, RT_MAIN_MASTER):
+            return offset in self.live_offsets
+        return True
+
+    def _iter_records(self, start, end):
+        """Registros hijos directos en [start, end): (tipo, instancia, inicio datos, fin datos)"""
+        offset = start
+        while offset + 8 <= end:
+            ver_instance, rec_type, rec_len = struct.unpack_from('<HHI', self.document, offset)
+            data_start = offset + 8
+            data_end = min(data_start + rec_len, end)
+            yield rec_type, ver_instance >> 4, data_start, data_end
+            offset = data_start + rec_len
+
+    def _is_container(self, data_start):
+        return (self.document[data_start - 8] & 0x0F) == 0x0F
+
+    def _iter_container(self, start, end, slide_num, kind, hyperlink_slides):
+        """Textos de un contenedor (incluye los dibujos OfficeArt, que comparten formato de cabecera)"""
+        for rec_type, instance, data_start, data_end in self._iter_records(start, end):
+            if self._is_container(data_start):
+                for item in self._iter_container(data_start, data_end, slide_num, kind, hyperlink_slides):
+                    yield item
+            elif rec_type in (RT_TEXT_CHARS_ATOM, RT_TEXT_BYTES_ATOM):
+                yield slide_num, kind, self._decode_text(rec_type, data_start, data_end)
+            elif rec_type == RT_INTERACTIVE_INFO_ATOM and data_end - data_start >= 8:
+                link_id = struct.unpack_from('<I', self.document, data_start + 4)[0]
+                hyperlink_slides.setdefault(link_id, slide_num)
+
+    def _iter_document(self, start, end, hyperlinks):
+        """Contenedor Document: textos de esquema por diapositiva y lista de hipervínculos externos"""
+        for rec_type, instance, data_start, data_end in self._iter_records(start, end):
+            if rec_type == RT_SLIDE_LIST_WITH_TEXT:
+                kind = {0: 'texto', 1: 'patron', 2: 'notas'}.get(instance, 'texto')
+                slide_index = 0
+                for child_type, _, child_start, child_end in self._iter_records(data_start, data_end):
+                    if child_type == RT_SLIDE_PERSIST_ATOM:
+                        slide_index += 1
+                    elif child_type in (RT_TEXT_CHARS_ATOM, RT_TEXT_BYTES_ATOM):
+                        slide_num = slide_index if kind == 'texto' else 0
+                        yield slide_num, kind, self._decode_text(child_type, child_start, child_end)
+            elif self._is_container(data_start):
+                if rec_type == RT_EX_HYPERLINK:
+                    self._read_hyperlink(data_start, data_end, hyperlinks)
+                else:
+                    for item in self._iter_document(data_start, data_end, hyperlinks):
+                        yield item
+
+    def _read_hyperlink(self, start, end, hyperlinks):
+        link_id = None
+        target = None
+        for rec_type, instance, data_start, data_end in self._iter_records(start, end):
+            if rec_type == RT_EX_HYPERLINK_ATOM and data_end - data_start >= 4:
+                link_id = struct.unpack_from('<I', self.document, data_start)[0]
+            elif rec_type == RT_CSTRING and instance == 1:
+                target = self.document[data_start:data_end].decode('utf-16-le', errors='ignore')
+        if link_id is not None and target:
+            hyperlinks[link_id] = target
+
+    def _decode_text(self, rec_type, start, end):
+        raw = self.document[start:end]
+        if rec_type == RT_TEXT_CHARS_ATOM:
+            return raw.decode('utf-16-le', errors='ignore')
+        return raw.decode('latin-1')
+
+    def _map_slide_offsets(self):
+        """Offset de cada contenedor Slide -> número de diapositiva (orden de presentación)"""
+        try:
+            persist_offsets, document_persist_id = self._read_persist_directory()
+        except (struct.error, ValueError):
+            persist_offsets, document_persist_id = {}, None
+        if document_persist_id in persist_offsets:
+            self.live_offsets = set(persist_offsets.values())
+            self.document_offset = persist_offsets[document_persist_id]
+
+        slide_numbers = {}
+        for rec_type, instance, start, end in self._iter_records(0, len(self.document)):
+            if rec_type != RT_DOCUMENT or self.document_offset not in (None, start - 8):
+                continue
+            for child_type, child_instance, child_start, child_end in self._iter_records(start, end):
+                if child_type != RT_SLIDE_LIST_WITH_TEXT or child_instance != 0:
+                    continue
+                slide_index = 0
+                for atom_type, _, atom_start, _ in self._iter_records(child_start, child_end):
+                    if atom_type == RT_SLIDE_PERSIST_ATOM:
+                        slide_index += 1
+                        persist_id = struct.unpack_from('<I', self.document, atom_start)[0]
+                        if persist_id in persist_offsets:
+                            slide_numbers[persist_offsets[persist_id]] = slide_index
+
+        if not slide_numbers:
+            # Sin directorio de persistencia: numerar los contenedores Slide en orden físico
+            self.live_offsets = self.document_offset = None
+            slide_index = 0
+            for rec_type, _, start, _ in self._iter_records(0, len(self.document)):
+                if rec_type == RT_SLIDE:
+                    slide_index += 1
+                    slide_numbers[start - 8] = slide_index
+        return slide_numbers
+
+    def _read_persist_directory(self):
+        """
+        Directorio de persistencia siguiendo la cadena de UserEditAtom (la edición más reciente gana)
+
+        Returns:
+            tuple: (persistId -> offset en el stream, persistId del Document de la última edición)
+        """
+        if len(self.current_user) < 20:
+            return {}, None
+        edit_offset = struct.unpack_from('<I', self.current_user, 16)[0]
+
+        persist_offsets = {}
+        document_persist_id = None
+        visited = set()
+        while edit_offset and edit_offset not in visited and edit_offset + 28 <= len(self.document):
+            visited.add(edit_offset)
+            _, rec_type, _ = struct.unpack_from('<HHI', self.document, edit_offset)
+            if rec_type != RT_USER_EDIT_ATOM:
+                break
+            last_edit, directory_offset, doc_persist_id = struct.unpack_from('<III', self.document, edit_offset + 16)
+            if document_persist_id is None:
+                document_persist_id = doc_persist_id
+
+            _, dir_type, dir_len = struct.unpack_from('<HHI', self.document, directory_offset)
+            if dir_type != RT_PERSIST_DIRECTORY_ATOM:
+                break
+            offset = directory_offset + 8
+            dir_end = min(offset + dir_len, len(self.document))
+            while offset + 4 <= dir_end:
+                entry = struct.unpack_from('<I', self.document, offset)[0]
+                persist_id, count = entry & 0xFFFFF, entry >> 20
+                offset += 4
+                for i in range(count):
+                    if offset + 4 > dir_end:
+                        break
+                    persist_offsets.setdefault(persist_id + i, struct.unpack_from('<I', self.document, offset)[0])
+                    offset += 4
+            edit_offset = last_edit
+        return persist_offsets, document_persist_id
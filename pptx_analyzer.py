@@ -1,18 +1,64 @@
 """
-Módulo para extracción exhaustiva de URLs de archivos PowerPoint (.pptx)
+Módulo para extracción exhaustiva de URLs de archivos PowerPoint (.pptx y .ppt)
 """
 
 import re
 import zipfile
 import xml.etree.ElementTree as ET
-from pptx import Presentation
 from urllib.parse import urlparse
 import io
+import time
+from ppt_legacy import LegacyPPTReader, is_legacy_ppt
+
+
+# Caracteres en los que se puede cortar un texto largo sin partir una URL
+TEXT_SEPARATORS = (' ', '\n', '\t', '\r', '<', '>', '"', "'")
+
+
+class ExtractionLimitExceeded(Exception):
+    """Se superó un límite de recursos durante la extracción de un archivo"""
+
 
 class PPTXURLExtractor:
     """Clase para extraer URLs de manera exhaustiva de archivos PPTX"""
     
-    def __init__(self):
+    # Paquetes OOXML incrustados que se auditan recursivamente
+    EMBEDDED_OOXML_EXTENSIONS = ('.xlsx', '.xlsm', '.docx', '.docm', '.pptx', '.pptm')
+    
+    def __init__(self, max_embedded_bytes=50 * 1024 * 1024, max_embedded_depth=2,
+                 max_inflated_bytes=512 * 1024 * 1024, max_compression_ratio=200,
+                 max_seconds=120, max_text_length=20_000, profiler=None):
+        """
+        Args:
+            max_embedded_bytes: Bytes descomprimidos máximos a leer de objetos incrustados por archivo
+            max_embedded_depth: Niveles máximos de paquetes incrustados dentro de otros
+            max_inflated_bytes: Bytes descomprimidos máximos por archivo (según el directorio ZIP)
+            max_compression_ratio: Ratio máximo descomprimido/comprimido de una parte del ZIP
+            max_seconds: Tiempo máximo de procesamiento por archivo
+            max_text_length: Caracteres que se analizan de una vez con los patrones; los textos más
+                largos se analizan por bloques cortados en espacios, comprobando el plazo entre bloques
+            profiler: FileProfiler opcional; guarda el perfil de las extracciones que superen su umbral
+        """
+        self.max_embedded_bytes = max_embedded_bytes
+        self.max_embedded_depth = max_embedded_depth
+        self.max_inflated_bytes = max_inflated_bytes
+        self.max_compression_ratio = max_compression_ratio
+        self.max_seconds = max_seconds
+        self.max_text_length = max_text_length
+        self.profiler = profiler
+        
+        # Estado de la última extracción: 'completo', 'parcial' o 'error'
+        self.last_status = {'status': 'completo', 'reason': ''}
+        # Presentación abierta en la última extracción (None si se rechazó por los límites), para
+        # que otros análisis del mismo archivo no la vuelvan a abrir
+        self.last_presentation = None
+        self._deadline = None
+        self._abort_reason = None
+        
+        # Emails (mantener simple); cuantificadores acotados (máximos del RFC 5321) para que
+        # una cadena larga sin espacios no cueste tiempo cuadrático por retroceso
+        self.email_pattern = re.compile(r'[a-zA-Z0-9._%+-]{1,64}@[a-zA-Z0-9.-]{1,255}\.[a-zA-Z]{2,63}', re.IGNORECASE)
+        
         # Expresiones regulares mejoradas para detectar URLs COMPLETAS sin división
         self.url_patterns = [
             # URLs completas con http/https - MEJORADO para capturar URLs completas
@@ -21,10 +67,10 @@ class PPTXURLExtractor:
             re.compile(r'www\.[^\s<>"\']+', re.IGNORECASE),
             # URLs tipo ftp - MEJORADO
             re.compile(r'ftp://[^\s<>"\']+', re.IGNORECASE),
-            # Emails (mantener simple)
-            re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', re.IGNORECASE),
-            # URLs en formato de enlace tipo [texto](url)
-            re.compile(r'\[([^\]]+)\]\((https?://[^\)]+)\)', re.IGNORECASE),
+            # Emails
+            self.email_pattern,
+            # URLs en formato de enlace tipo [texto](url), con longitudes acotadas como los emails
+            re.compile(r'\[([^\[\]]{1,1000})\]\((https?://[^\s)\[\]]{1,2048})\)', re.IGNORECASE),
             # URLs que empiezan con dominios conocidos sin protocolo - MEJORADO
             re.compile(r'(?:^|\s)([a-zA-Z0-9-]+\.(?:com|org|net|edu|gov|mil|int|co|io|me|ly|tk|cc|tv|fm|am|info|biz|name|pro|museum|aero|coop|jobs|travel|mobi|asia|cat|tel|xxx|post|geo|local|youtube|google|github|microsoft|amazon|facebook|twitter|linkedin|instagram|tiktok|vimeo|zoom|teams)[^\s<>"\']*)', re.IGNORECASE),
             # IPs con puertos y rutas - MEJORADO
@@ -44,72 +90,263 @@ class PPTXURLExtractor:
             'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'
         }
     
-    def extract_urls_from_file(self, file_path_or_content):
+    def extract_urls_from_file(self, file_path_or_content, file_id=None):
         """
         Extraer URLs de un archivo PPTX
         
         Args:
             file_path_or_content: Ruta del archivo o contenido en bytes
+            file_id: Identificador con el que se guarda el perfil de la extracción (si hay profiler)
             
         Returns:
-            List[dict]: Lista de URLs encontradas con contexto detallado
+            List[dict]: Lista de URLs encontradas con contexto detallado. Si se supera
+            algún límite de recursos, last_status queda como 'parcial' con el motivo
         """
+        if self.profiler is None:
+            return self._extract_urls_from_file(file_path_or_content)
+        
+        if file_id is None:
+            file_id = file_path_or_content if isinstance(file_path_or_content, str) else 'contenido'
+        with self.profiler.profile(file_id, file_id):
+            return self._extract_urls_from_file(file_path_or_content)
+    
+    def _extract_urls_from_file(self, file_path_or_content):
         urls_found = []
+        self._start_run()
         
         try:
             # Abrir el archivo PPTX
-            if isinstance(file_path_or_content, str):
-                prs = Presentation(file_path_or_content)
-                with open(file_path_or_content, 'rb') as f:
-                    zip_content = f.read()
-            else:
-                prs = Presentation(io.BytesIO(file_path_or_content))
-                zip_content = file_path_or_content
+            zip_content = self._read_content(file_path_or_content)
             
-            # Método 1: Extraer URLs usando python-pptx (texto visible y shapes)
-            urls_found.extend(self._extract_from_presentation_object(prs))
+            # Formato binario 97-2003 (.ppt): escáner OLE2 directo, sin python-pptx
+            if is_legacy_ppt(zip_content):
+                return self._deduplicate_urls_advanced(self._extract_from_legacy_ppt(zip_content))
             
-            # Método 2: Extraer URLs del archivo ZIP/XML (búsqueda exhaustiva)
-            urls_found.extend(self._extract_from_xml_content(zip_content))
+            # Rechazar antes de descomprimir nada si el directorio ZIP excede los límites
+            self._check_zip_limits(zip_content)
+            prs = self.last_presentation = self._open_presentation(zip_content)
             
-            # Método 3: NUEVO - Búsqueda brutal en todo el contenido como último recurso
-            urls_found.extend(self._extract_from_all_content_brute_force(zip_content))
+            strategies = [
+                # Método 1: Extraer URLs usando python-pptx (texto visible y shapes)
+                lambda: self._extract_from_presentation_object(prs),
+                # Método 2: Extraer URLs del archivo ZIP/XML (búsqueda exhaustiva)
+                lambda: self._extract_from_xml_content(zip_content),
+                # Método 3: NUEVO - Búsqueda brutal en todo el contenido como último recurso
+                lambda: self._extract_from_all_content_brute_force(zip_content),
+                # Método 4: Objetos OOXML incrustados (Excel, Word, PowerPoint)
+                lambda: self._extract_from_embedded_packages(zip_content),
+            ]
+            for strategy in strategies:
+                urls_found.extend(strategy())
+                # Con un límite superado se devuelve lo encontrado hasta el momento
+                if self._abort_reason:
+                    break
             
             # DEDUPLICACIÓN MEJORADA Y ROBUSTA
             unique_urls = self._deduplicate_urls_advanced(urls_found)
             
             return unique_urls
             
+        except ExtractionLimitExceeded:
+            return self._deduplicate_urls_advanced(urls_found)
         except Exception as e:
             print(f"Error al procesar archivo PPTX: {str(e)}")
+            self.last_status = {'status': 'error', 'reason': str(e)}
             return []
     
+    def iter_urls(self, file_path_or_content):
+        """
+        Generar las URLs de un archivo a medida que se procesa cada diapositiva
+        
+        A diferencia de extract_urls_from_file, la deduplicación es incremental: una URL
+        ya emitida no se reemplaza por una variante posterior (p. ej. su versión https)
+        
+        Args:
+            file_path_or_content: Ruta del archivo o contenido en bytes
+            
+        Yields:
+            dict: URL encontrada con contexto detallado
+        """
+        for _, url_batch in self.iter_url_batches(file_path_or_content):
+            for url_info in url_batch:
+                yield url_info
+    
+    def iter_url_batches(self, file_path_or_content):
+        """
+        Generar las URLs nuevas por cada diapositiva procesada
+        
+        max_seconds cuenta solo el tiempo de extracción: no el que el consumidor tarda en pedir
+        el siguiente lote (p. ej. validando las URLs del anterior)
+        
+        Yields:
+            tuple: (número de diapositiva, lista de URLs nuevas); 0 para las partes del
+            archivo que no pertenecen a una diapositiva concreta
+        """
+        self._start_run()
+        emitted = set()
+        
+        try:
+            zip_content = self._read_content(file_path_or_content)
+            
+            if is_legacy_ppt(zip_content):
+                new_urls = self._filter_new_urls(self._extract_from_legacy_ppt(zip_content), emitted)
+                if new_urls:
+                    yield from self._yield_batch(0, new_urls)
+                return
+            
+            self._check_zip_limits(zip_content)
+            prs = self.last_presentation = self._open_presentation(zip_content)
+            
+            # Método 1 diapositiva a diapositiva: el primer resultado no espera al resto del archivo
+            for slide_num, slide in enumerate(prs.slides, 1):
+                slide_urls = []
+                try:
+                    self._extract_from_slide(slide, slide_num, slide_urls)
+                except ExtractionLimitExceeded:
+                    pass  # Se emite lo encontrado; el bucle termina abajo
+                new_urls = self._filter_new_urls(slide_urls, emitted)
+                if new_urls:
+                    yield from self._yield_batch(slide_num, new_urls)
+                if self._abort_reason:
+                    return
+            
+            # Métodos 2 a 4 sobre el ZIP completo
+            strategies = [
+                self._extract_from_xml_content,
+                self._extract_from_all_content_brute_force,
+                self._extract_from_embedded_packages,
+            ]
+            for strategy in strategies:
+                new_urls = self._filter_new_urls(strategy(zip_content), emitted)
+                if new_urls:
+                    yield from self._yield_batch(0, new_urls)
+                if self._abort_reason:
+                    return
+        
+        except ExtractionLimitExceeded:
+            return
+        except Exception as e:
+            print(f"Error al procesar archivo PPTX: {str(e)}")
+            self.last_status = {'status': 'error', 'reason': str(e)}
+    
+    def _yield_batch(self, slide_num, new_urls):
+        """Emitir un lote sin contar en el plazo el tiempo en que el consumidor tiene pausado el generador"""
+        # El pipeline valida cada lote por la red antes de pedir el siguiente: ese tiempo no es extracción
+        paused_at = time.monotonic()
+        yield slide_num, new_urls
+        if self._deadline is not None:
+            self._deadline += time.monotonic() - paused_at
+    
+    def _filter_new_urls(self, urls_found, emitted):
+        """Deduplicación incremental: descartar URLs ya emitidas o fragmentos de una ya emitida"""
+        new_urls = []
+        for url_info in urls_found:
+            normalized_url = self._normalize_url_for_comparison(url_info['url'])
+            if normalized_url in emitted:
+                continue
+            if any(existing.startswith(normalized_url) for existing in emitted):
+                continue
+            emitted.add(normalized_url)
+            new_urls.append(url_info)
+        return new_urls
+    
+    def open_presentation(self, content):
+        """Abrir una presentación con los mismos límites de descompresión que la extracción (ExtractionLimitExceeded si los supera)"""
+        self._start_run()
+        self._check_zip_limits(content)
+        return self._open_presentation(content)
+    
+    def _open_presentation(self, zip_content):
+        """Abrir el archivo con python-pptx, que se importa solo cuando hace falta"""
+        from pptx import Presentation
+        return Presentation(io.BytesIO(zip_content))
+    
+    def _read_content(self, file_path_or_content):
+        """Obtener los bytes del archivo a partir de una ruta o del contenido"""
+        if isinstance(file_path_or_content, str):
+            with open(file_path_or_content, 'rb') as f:
+                return f.read()
+        return file_path_or_content
+    
+    def _start_run(self):
+        """Reiniciar el estado y el plazo de tiempo para un nuevo archivo"""
+        self.last_status = {'status': 'completo', 'reason': ''}
+        self.last_presentation = None
+        self._deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        self._abort_reason = None
+    
+    def _limit_exceeded(self, reason):
+        """Marcar el resultado como parcial y cortar la extracción"""
+        self._abort_reason = reason
+        self.last_status = {'status': 'parcial', 'reason': reason}
+        raise ExtractionLimitExceeded(reason)
+    
+    def _check_limits(self):
+        """Cortar si se agotó el tiempo o ya se superó otro límite en este archivo"""
+        if self._abort_reason:
+            raise ExtractionLimitExceeded(self._abort_reason)
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self._limit_exceeded(f'Tiempo máximo de {self.max_seconds} s superado')
+    
+    def _check_zip_limits(self, zip_content):
+        """Validar tamaños descomprimidos y ratios declarados en el directorio central del ZIP"""
+        # zipfile nunca descomprime más allá del tamaño declarado en el directorio,
+        # así que validarlo acota lo que python-pptx y las búsquedas pueden inflar
+        total_inflated = 0
+        with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_file:
+            for info in zip_file.infolist():
+                total_inflated += info.file_size
+                if total_inflated > self.max_inflated_bytes:
+                    self._limit_exceeded(
+                        f'Contenido descomprimido supera {self.max_inflated_bytes // (1024 * 1024)} MB'
+                    )
+                if info.file_size > 1024 * 1024:
+                    ratio = info.file_size / max(info.compress_size, 1)
+                    if ratio > self.max_compression_ratio:
+                        self._limit_exceeded(
+                            f'Ratio de compresión sospechoso ({ratio:.0f}:1) en {info.filename}'
+                        )
+    
+    def _read_member(self, zip_file, name):
+        """Leer una parte del ZIP comprobando antes los límites de tiempo"""
+        self._check_limits()
+        return zip_file.read(name)
+    
     def _extract_from_presentation_object(self, prs):
         """Extraer URLs usando el objeto Presentation de python-pptx con búsqueda exhaustiva en shapes"""
         urls_found = []
         
-        for slide_num, slide in enumerate(prs.slides, 1):
-            # Extraer de formas en la diapositiva
-            urls_found.extend(self._extract_from_shapes(slide.shapes, slide_num))
-            
-            # Notas de la diapositiva
-            if slide.has_notes_slide:
-                notes_text = slide.notes_slide.notes_text_frame.text
-                urls_in_notes = self._find_urls_in_text(notes_text)
-                for url in urls_in_notes:
-                    urls_found.append({
-                        'url': url,
-                        'location': f'Diapositiva {slide_num} - Notas',
-                        'context': notes_text[:100] + '...' if len(notes_text) > 100 else notes_text
-                    })
+        try:
+            for slide_num, slide in enumerate(prs.slides, 1):
+                self._extract_from_slide(slide, slide_num, urls_found)
+        except ExtractionLimitExceeded:
+            pass  # Resultado parcial: se conserva lo extraído de las diapositivas anteriores
         
         return urls_found
     
+    def _extract_from_slide(self, slide, slide_num, urls_found):
+        """Extraer URLs de las formas y notas de una diapositiva"""
+        # Extraer de formas en la diapositiva
+        urls_found.extend(self._extract_from_shapes(slide.shapes, slide_num))
+            
+        # Notas de la diapositiva
+        if slide.has_notes_slide:
+            notes_text = slide.notes_slide.notes_text_frame.text
+            urls_in_notes = self._find_urls_in_text(notes_text)
+            for url in urls_in_notes:
+                urls_found.append({
+                    'url': url,
+                    'location': f'Diapositiva {slide_num} - Notas',
+                    'context': notes_text[:100] + '...' if len(notes_text) > 100 else notes_text
+                })
+    
     def _extract_from_shapes(self, shapes, slide_num, parent_context=""):
         """Extraer URLs de shapes de manera recursiva con búsqueda EXHAUSTIVA en todos los elementos"""
         urls_found = []
         
         for shape_idx, shape in enumerate(shapes):
+            # Fuera del try: los límites no deben quedar silenciados por los except de cada paso
+            self._check_limits()
             shape_context = f"{parent_context}Shape {shape_idx + 1}"
             
             try:
@@ -324,13 +561,14 @@ class PPTXURLExtractor:
             with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_file:
                 # Buscar en archivos de slides específicos
                 for file_name in zip_file.namelist():
+                    self._check_limits()
                     if file_name.startswith('ppt/slides/slide') and file_name.endswith('.xml'):
                         # Extraer número de slide del nombre del archivo
                         slide_match = re.search(r'slide(\d+)\.xml', file_name)
                         slide_num = int(slide_match.group(1)) if slide_match else 0
                         
                         try:
-                            xml_content = zip_file.read(file_name).decode('utf-8')
+                            xml_content = self._read_member(zip_file, file_name).decode('utf-8')
                             
                             # Buscar URLs en el contenido XML
                             urls_in_xml = self._find_urls_in_text(xml_content)
@@ -351,9 +589,10 @@ class PPTXURLExtractor:
                 
                 # Buscar en archivos de relaciones (_rels) - AQUÍ ES DONDE ESTÁN MUCHOS HIPERVÍNCULOS
                 for file_name in zip_file.namelist():
+                    self._check_limits()
                     if '_rels' in file_name and file_name.endswith('.rels'):
                         try:
-                            xml_content = zip_file.read(file_name).decode('utf-8')
+                            xml_content = self._read_member(zip_file, file_name).decode('utf-8')
                             
                             # Los archivos .rels contienen los hipervínculos externos
                             # Buscar elementos <Relationship> con Type="hyperlink"
@@ -399,9 +638,10 @@ class PPTXURLExtractor:
                 ]
                 
                 for xml_file in xml_files_to_check:
+                    self._check_limits()
                     if xml_file in zip_file.namelist():
                         try:
-                            xml_content = zip_file.read(xml_file).decode('utf-8')
+                            xml_content = self._read_member(zip_file, xml_file).decode('utf-8')
                             urls_in_file = self._find_urls_in_text(xml_content)
                             for url in urls_in_file:
                                 # VERIFICAR QUE NO SEA METADATA ANTES DE AGREGAR
@@ -414,6 +654,8 @@ class PPTXURLExtractor:
                         except UnicodeDecodeError:
                             continue
         
+        except ExtractionLimitExceeded:
+            pass  # Resultado parcial: el estado queda registrado en last_status
         except Exception as e:
             print(f"Error al procesar contenido XML: {str(e)}")
         
@@ -486,7 +728,26 @@ class PPTXURLExtractor:
         """Encontrar todas las URLs en un texto usando múltiples patrones"""
         if not text:
             return []
-        
+        if not self.max_text_length or len(text) <= self.max_text_length:
+            return self._scan_text_for_urls(text)
+        
+        # Textos enormes por bloques: ninguna URL contiene espacios ni delimitadores de XML, así que
+        # cortar en uno no parte ninguna, y el plazo de tiempo se comprueba entre bloques
+        urls_found = {}
+        start = 0
+        while start < len(text):
+            self._check_limits()
+            end = start + self.max_text_length
+            if end < len(text):
+                cut = max(text.rfind(separator, start, end) for separator in TEXT_SEPARATORS)
+                end = cut + 1 if cut > start else end
+            for url in self._scan_text_for_urls(text[start:end]):
+                urls_found.setdefault(url, None)
+            start = end
+        return list(urls_found)
+    
+    def _scan_text_for_urls(self, text):
+        """Aplicar los patrones a un bloque de texto de longitud acotada"""
         urls_found = set()  # Usar set para evitar duplicados
         
         # Limpiar el texto de caracteres de control y espacios múltiples
@@ -509,6 +770,9 @@ class PPTXURLExtractor:
         
         # PASO 2: Buscar otros patrones solo si no encontramos la URL completa
         for pattern in self.url_patterns[1:]:  # Omitir el primer patrón ya usado
+            # Sin '@' el patrón de emails no puede coincidir: se evita recorrer el texto
+            if pattern is self.email_pattern and '@' not in clean_text:
+                continue
             matches = pattern.findall(clean_text)
             for match in matches:
                 if isinstance(match, tuple):
@@ -731,6 +995,7 @@ class PPTXURLExtractor:
             with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_file:
                 # Procesar SOLO archivos relevantes (NO docProps, NO _rels generales)
                 for file_name in zip_file.namelist():
+                    self._check_limits()
                     # EXCLUIR archivos de metadatos y propiedades
                     if any(excluded in file_name.lower() for excluded in [
                         'docprops/', 'docprops\\', 'core.xml', 'app.xml', 'custom.xml',
@@ -745,7 +1010,7 @@ class PPTXURLExtractor:
                     
                     try:
                         # Leer contenido como texto
-                        content = zip_file.read(file_name)
+                        content = self._read_member(zip_file, file_name)
                         
                         # Intentar decodificar como texto
                         text_content = ""
@@ -779,11 +1044,149 @@ class PPTXURLExtractor:
                 
                 # NO buscar en archivos binarios para evitar metadatos
         
+        except ExtractionLimitExceeded:
+            pass  # Resultado parcial: el estado queda registrado en last_status
         except Exception as e:
             print(f"Error en búsqueda selectiva: {str(e)}")
         
         return urls_found
     
+    def _extract_from_embedded_packages(self, zip_content):
+        """Buscar URLs dentro de paquetes OOXML incrustados (ppt/embeddings/*.xlsx, *.docx...)"""
+        urls_found = []
+        
+        try:
+            with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_file:
+                # Relacionar cada objeto incrustado con la diapositiva que lo referencia
+                embedding_slides = {}
+                for file_name in zip_file.namelist():
+                    self._check_limits()
+                    slide_match = re.match(r'ppt/slides/_rels/slide(\d+)\.xml\.rels$', file_name)
+                    if slide_match:
+                        rels_content = self._read_member(zip_file, file_name).decode('utf-8', errors='ignore')
+                        for target in re.findall(r'Target="[^"]*embeddings/([^"]+)"', rels_content):
+                            embedding_slides.setdefault(target, int(slide_match.group(1)))
+                
+                budget = {'bytes': self.max_embedded_bytes}
+                self._scan_embedded_packages(zip_file, '', 1, budget, embedding_slides, urls_found)
+        
+        except ExtractionLimitExceeded:
+            pass  # Resultado parcial: el estado queda registrado en last_status
+        except Exception as e:
+            print(f"Error al procesar objetos incrustados: {str(e)}")
+        
+        return urls_found
+    
+    def _scan_embedded_packages(self, zip_file, parent_path, depth, budget, embedding_slides, urls_found,
+                                default_slide=0):
+        """Recorrer los paquetes incrustados de un ZIP sin extraerlos a disco ni a memoria"""
+        if depth > self.max_embedded_depth:
+            return
+        
+        # Orden físico: al anidar ZipFile sobre un miembro comprimido, los seeks hacia
+        # adelante solo descomprimen lo intermedio y se evita reiniciar el stream
+        embedded = sorted(
+            (info for info in zip_file.infolist()
+             if 'embeddings/' in info.filename
+             and info.filename.lower().endswith(self.EMBEDDED_OOXML_EXTENSIONS)),
+            key=lambda info: info.header_offset
+        )
+        
+        for info in embedded:
+            if info.file_size > budget['bytes']:
+                print(f"Objeto incrustado omitido por tamaño: {parent_path}{info.filename}")
+                continue
+            budget['bytes'] -= info.file_size
+            
+            embedded_name = info.filename.rsplit('/', 1)[-1]
+            package_path = f"{parent_path}{info.filename}"
+            slide_num = embedding_slides.get(embedded_name, default_slide)
+            
+            try:
+                with zip_file.open(info) as member, zipfile.ZipFile(member) as nested_zip:
+                    self._scan_embedded_parts(nested_zip, package_path, slide_num, budget, urls_found)
+                    self._scan_embedded_packages(
+                        nested_zip, f"{package_path} > ", depth + 1, budget,
+                        {}, urls_found, default_slide=slide_num
+                    )
+            except (zipfile.BadZipFile, OSError, RuntimeError) as e:
+                print(f"Objeto incrustado ilegible {package_path}: {str(e)}")
+    
+    def _scan_embedded_parts(self, nested_zip, package_path, slide_num, budget, urls_found):
+        """Buscar URLs en las partes XML de un paquete incrustado respetando el presupuesto de bytes"""
+        parts = sorted(
+            (info for info in nested_zip.infolist()
+             if info.filename.endswith(('.xml', '.rels'))
+             and not info.filename.lower().startswith('docprops/')),
+            key=lambda info: info.header_offset
+        )
+        
+        for info in parts:
+            self._check_limits()
+            if budget['bytes'] <= 0:
+                print(f"Presupuesto de objetos incrustados agotado en {package_path}")
+                return
+            
+            with nested_zip.open(info) as part:
+                # Nunca descomprimir más de lo que queda de presupuesto
+                content = part.read(budget['bytes'] + 1)
+            budget['bytes'] -= len(content)
+            if budget['bytes'] < 0:
+                print(f"Presupuesto de objetos incrustados agotado en {package_path}")
+                return
+            
+            text_content = content.decode('utf-8', errors='ignore')
+            for url in self._find_urls_in_text(text_content):
+                if self._is_valid_url(url):
+                    location = f'Objeto incrustado {package_path}'
+                    urls_found.append({
+                        'url': url,
+                        'location': f'Diapositiva {slide_num} - {location}' if slide_num > 0 else location,
+                        'context': f'Encontrado en {info.filename} de {package_path}'
+                    })
+    
+    def _extract_from_legacy_ppt(self, ppt_content):
+        """Extraer URLs de un archivo .ppt binario leyendo directamente sus registros"""
+        urls_found = []
+        
+        try:
+            for slide_num, kind, text in LegacyPPTReader(ppt_content).iter_items():
+                self._check_limits()
+                urls_found.extend(self._urls_from_legacy_item(slide_num, kind, text))
+        except ExtractionLimitExceeded:
+            pass  # Resultado parcial: el estado queda registrado en last_status
+        
+        return urls_found
+    
+    def _urls_from_legacy_item(self, slide_num, kind, text):
+        """Convertir un elemento del .ppt binario en registros de URL"""
+        kind_labels = {
+            'texto': 'Texto',
+            'notas': 'Notas',
+            'patron': 'Patrón de diapositivas',
+            'hipervinculo': 'Hipervínculo',
+        }
+        label = kind_labels[kind]
+        location = f'Diapositiva {slide_num} - {label}' if slide_num > 0 else f'Presentación .ppt - {label}'
+        
+        if kind == 'hipervinculo':
+            if not self._is_valid_url(text):
+                return []
+            return [{
+                'url': text,
+                'location': location,
+                'context': f'Hipervínculo externo: {text}'
+            }]
+        
+        return [
+            {
+                'url': url,
+                'location': location,
+                'context': text[:100] + '...' if len(text) > 100 else text
+            }
+            for url in self._find_urls_in_text(text)
+        ]
+    
     def _deduplicate_urls_advanced(self, urls_found):
         """Deduplicación avanzada de URLs con múltiples criterios"""
         if not urls_found:
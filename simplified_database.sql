@@ -36,6 +36,7 @@ CREATE TABLE IF NOT EXISTS validated_urls (
     checked_at TIMESTAMPTZ,
     subfolder VARCHAR(255),
     processed_by VARCHAR(100), -- Usuario que procesó
+    audit_key TEXT, -- Clave idempotente de la sincronización diferida
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -50,6 +51,7 @@ CREATE INDEX IF NOT EXISTS idx_validated_urls_status ON validated_urls(status);
 CREATE INDEX IF NOT EXISTS idx_validated_urls_user ON validated_urls(processed_by);
 CREATE INDEX IF NOT EXISTS idx_validated_urls_created_at ON validated_urls(created_at);
 CREATE INDEX IF NOT EXISTS idx_validated_urls_url_hash ON validated_urls USING hash(url);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_validated_urls_audit_key ON validated_urls(audit_key);
 
 -- =================================
 -- FUNCIONES Y TRIGGERS
@@ -146,6 +148,7 @@ COMMENT ON COLUMN validated_urls.url_domain IS 'Dominio extraído de la URL';
 COMMENT ON COLUMN validated_urls.status IS 'Estado de validación de la URL (Activo, Error, etc.)';
 COMMENT ON COLUMN validated_urls.processed_by IS 'Usuario que realizó el procesamiento';
 COMMENT ON COLUMN validated_urls.subfolder IS 'Subcarpeta donde se encontró el archivo';
+COMMENT ON COLUMN validated_urls.audit_key IS 'Clave idempotente de la ocurrencia (ejecución, archivo, diapositiva, URL, ubicación)';
 
 -- =================================
 -- =================================
@@ -0,0 +1,195 @@
+"""
+Módulo con el índice de contenido por diapositiva, compartido por todas las auditorías y cacheado en disco
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+from batch_checkpoint import file_content_key
+from ppt_legacy import LegacyPPTReader, is_legacy_ppt
+
+# Directorio de la caché de índices (un archivo .json.gz por contenido de presentación)
+SLIDE_INDEX_DIR = os.environ.get('SLIDE_INDEX_DIR', 'slide_index_cache')
+
+# Versión del formato: al cambiarla los índices antiguos se reconstruyen
+SLIDE_INDEX_VERSION = 1
+
+TITLE_PLACEHOLDER_TYPES = {'TITLE', 'CENTER_TITLE', 'VERTICAL_TITLE'}
+
+
+def build_slide_index(content, prs=None):
+    """
+    Construir el índice de contenido de una presentación
+
+    Args:
+        content: Bytes del archivo .pptx o .ppt
+        prs: Presentation ya abierta del mismo contenido (p. ej. la del extractor de URLs);
+            sin ella se abre con los límites de descompresión de PPTXURLExtractor
+
+    Returns:
+        dict: 'version', 'format', 'layouts' y 'slides'; cada diapositiva tiene 'number',
+        'title', 'layout', 'shapes' (con sus párrafos en orden) y 'notes'
+    """
+    if is_legacy_ppt(content):
+        return _build_legacy_index(content)
+
+    if prs is None:
+        from pptx_analyzer import PPTXURLExtractor
+        prs = PPTXURLExtractor().open_presentation(content)
+
+    layouts = []
+    for master_idx, master in enumerate(prs.slide_masters, 1):
+        for layout in master.slide_layouts:
+            layouts.append({'name': layout.name, 'master': master_idx, 'part': layout.part.partname})
+
+    slides = []
+    for slide_num, slide in enumerate(prs.slides, 1):
+        shapes = []
+        _index_shapes(slide.shapes, shapes)
+        title = next((shape['text'] for shape in shapes if shape['is_title'] and shape['text']), '')
+        notes = ''
+        if slide.has_notes_slide:
+            notes = slide.notes_slide.notes_text_frame.text if slide.notes_slide.notes_text_frame else ''
+        slides.append({
+            'number': slide_num,
+            'part': slide.part.partname,
+            'title': title,
+            'layout': slide.slide_layout.name,
+            'layout_part': slide.slide_layout.part.partname,
+            'shapes': shapes,
+            'notes': notes,
+        })
+
+    return {'version': SLIDE_INDEX_VERSION, 'format': 'pptx', 'layouts': layouts, 'slides': slides}
+
+
+def _index_shapes(shapes, output, group=''):
+    """Añadir en orden de lectura las formas con texto (los grupos se recorren recursivamente)"""
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+    for shape in shapes:
+        name = f"{group}/{shape.name}" if group else shape.name
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            _index_shapes(shape.shapes, output, name)
+            continue
+
+        paragraphs = []
+        if getattr(shape, 'has_text_frame', False) and shape.has_text_frame:
+            paragraphs = [paragraph.text for paragraph in shape.text_frame.paragraphs]
+        elif getattr(shape, 'has_table', False) and shape.has_table:
+            paragraphs = [
+                ' | '.join(cell.text for cell in row.cells) for row in shape.table.rows
+            ]
+        if not any(paragraph.strip() for paragraph in paragraphs):
+            continue
+
+        placeholder_type = ''
+        if shape.is_placeholder:
+            try:
+                placeholder_type = shape.placeholder_format.type.name
+            except (AttributeError, ValueError):
+                placeholder_type = ''
+        output.append({
+            'id': shape.shape_id,
+            'name': name,
+            'placeholder': placeholder_type,
+            'is_title': placeholder_type in TITLE_PLACEHOLDER_TYPES,
+            'paragraphs': paragraphs,
+            'text': '\n'.join(paragraphs),
+        })
+
+
+def _build_legacy_index(content):
+    """Índice de un .ppt binario: texto por diapositiva desde los registros de PowerPoint 97-2003"""
+    slides = {}
+    notes = []
+    for slide_num, kind, text in LegacyPPTReader(content).iter_items():
+        if kind == 'texto' and slide_num:
+            slides.setdefault(slide_num, []).append(text)
+        elif kind == 'notas':
+            notes.append(text)
+    return {
+        'version': SLIDE_INDEX_VERSION,
+        'format': 'ppt',
+        'layouts': [],
+        'slides': [
+            {
+                'number': slide_num,
+                'part': '',
+                'title': paragraphs[0] if paragraphs else '',
+                'layout': '',
+                'layout_part': '',
+                'shapes': [{'id': 0, 'name': 'Texto', 'placeholder': '', 'is_title': False,
+                            'paragraphs': paragraphs, 'text': '\n'.join(paragraphs)}],
+                'notes': '',
+            }
+            for slide_num, paragraphs in sorted(slides.items())
+        ],
+        # El formato binario no enlaza de forma directa las notas con su diapositiva
+        'unassigned_notes': notes,
+    }
+
+
+class SlideIndexCache:
+    """Caché en disco de índices de diapositivas, por huella del contenido de la presentación"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or SLIDE_INDEX_DIR
+
+    def get(self, key):
+        """Índice cacheado para una huella de contenido; None si no existe o es de otra versión"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Índice de diapositivas dañado {path}: {str(e)}")
+            return None
+        return index if index.get('version') == SLIDE_INDEX_VERSION else None
+
+    def put(self, key, index):
+        """Guardar un índice (escritura atómica: nunca queda un archivo a medias)"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def get_or_build(self, file, download):
+        """
+        Índice de un archivo de Drive; solo se descarga y analiza si no está en caché
+
+        Args:
+            file: Archivo de Drive (con 'md5Checksum' o 'modifiedTime'/'size')
+            download: Función sin argumentos que devuelve los bytes del archivo
+
+        Returns:
+            dict: Índice de diapositivas, o None si no se pudo descargar; ExtractionLimitExceeded
+            si el archivo supera los límites de descompresión
+        """
+        key = file_content_key(file)
+        index = self.get(key)
+        if index is not None:
+            return index
+        content = download()
+        if not content:
+            return None
+        return self.ensure(key, content)
+
+    def ensure(self, key, content, prs=None):
+        """Índice de un contenido ya descargado (y opcionalmente ya abierto), construyéndolo y guardándolo si falta"""
+        index = self.get(key)
+        if index is None:
+            index = build_slide_index(content, prs)
+            self.put(key, index)
+        return index
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json.gz")
+
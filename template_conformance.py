@@ -0,0 +1,475 @@
+"""
+Módulo con la auditoría de conformidad de plantillas (patrones y diseños) con veredictos cacheados por hash
+"""
+
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from audit_store import AUDIT_STORE_DB_PATH
+from drive_range import RangeReadError
+from hyperlink_index import NS_PRESENTATION
+
+# Partes que definen la plantilla de una presentación: (prefijo, tipo)
+TEMPLATE_PARTS = (
+    ('ppt/slideMasters/', 'patron'),
+    ('ppt/slideLayouts/', 'diseño'),
+)
+
+VERDICT_CONFORMING = 'conforme'
+VERDICT_PARTIAL = 'parcial'
+VERDICT_NON_CONFORMING = 'no conforme'
+VERDICT_NO_TEMPLATES = 'sin plantillas aprobadas'
+
+
+def template_kind(name):
+    """Tipo de parte de plantilla ('patron' o 'diseño'); None si no es una parte XML de plantilla"""
+    if not name.endswith('.xml'):
+        return None
+    for prefix, kind in TEMPLATE_PARTS:
+        if name.startswith(prefix) and '/' not in name[len(prefix):]:
+            return kind
+    return None
+
+
+def describe_part(content):
+    """Nombre y tipos de marcador de posición de un patrón o diseño (para comparar diseños modificados)"""
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return '', []
+    slide_data = root.find(f'{{{NS_PRESENTATION}}}cSld')
+    name = slide_data.get('name', '') if slide_data is not None else ''
+    placeholders = sorted(
+        element.get('type', 'body') for element in root.iter(f'{{{NS_PRESENTATION}}}ph')
+    )
+    return name, placeholders
+
+
+def read_template_parts(source):
+    """
+    Partes de plantilla de una presentación o plantilla (.pptx, .potx)
+
+    Args:
+        source: Contenido en bytes u objeto de archivo con seek (p. ej. un DriveRangeFile)
+
+    Returns:
+        List[dict]: Partes ordenadas por nombre con 'part', 'kind', 'hash', 'name' y 'placeholders'
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source, 'r') as zip_file:
+        infos = sorted(
+            (info for info in zip_file.infolist() if template_kind(info.filename)),
+            key=lambda info: info.filename
+        )
+        parts = []
+        for info in infos:
+            content = zip_file.read(info)
+            name, placeholders = describe_part(content)
+            parts.append({
+                'part': info.filename,
+                'kind': template_kind(info.filename),
+                'hash': hashlib.sha256(content).hexdigest(),
+                'name': name,
+                'placeholders': placeholders,
+            })
+    return parts
+
+
+def directory_signature(source):
+    """
+    Firma de las partes de plantilla tomada solo del directorio central (CRC-32 y tamaño)
+
+    Dos presentaciones con la misma firma tienen, salvo colisión de CRC, las mismas partes de
+    plantilla: permite reutilizar el hash de plantilla sin leer ninguna parte
+
+    Returns:
+        str: Firma, o '' si la presentación no tiene partes de plantilla
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source, 'r') as zip_file:
+        entries = sorted(
+            f"{info.CRC:08x}:{info.file_size}" for info in zip_file.infolist() if template_kind(info.filename)
+        )
+    return hashlib.sha256('\n'.join(entries).encode('ascii')).hexdigest() if entries else ''
+
+
+def template_hash(parts):
+    """Hash de plantilla: independiente de la numeración de las partes, solo de su contenido"""
+    return hashlib.sha256('\n'.join(sorted(part['hash'] for part in parts)).encode('ascii')).hexdigest()
+
+
+class TemplateStore:
+    """Plantillas aprobadas y veredictos de conformidad cacheados por hash entre presentaciones y ejecuciones"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or AUDIT_STORE_DB_PATH
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS approved_template_parts (
+                    template_name TEXT NOT NULL,
+                    part TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    part_hash TEXT NOT NULL,
+                    name TEXT,
+                    placeholders TEXT,
+                    added_at TEXT NOT NULL,
+                    PRIMARY KEY (template_name, part)
+                );
+                CREATE INDEX IF NOT EXISTS idx_approved_parts_hash ON approved_template_parts(part_hash);
+                CREATE TABLE IF NOT EXISTS template_signatures (
+                    signature TEXT PRIMARY KEY,
+                    template_hash TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS template_verdicts (
+                    template_hash TEXT PRIMARY KEY,
+                    registry_version TEXT NOT NULL,
+                    verdict TEXT NOT NULL,
+                    template_name TEXT,
+                    matched_parts INTEGER,
+                    total_parts INTEGER,
+                    detail TEXT,
+                    analyzed_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS deck_templates (
+                    file_id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    subfolder TEXT,
+                    template_hash TEXT NOT NULL,
+                    checked_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_deck_templates_hash ON deck_templates(template_hash);
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def register_template(self, template_name, content):
+        """
+        Aprobar una plantilla a partir de un .pptx o .potx (reemplaza una aprobada con el mismo nombre)
+
+        Returns:
+            int: Partes de plantilla registradas
+        """
+        parts = read_template_parts(content)
+        if not parts:
+            raise ValueError("El archivo no contiene patrones ni diseños de diapositiva")
+        added_at = datetime.utcnow().isoformat()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM approved_template_parts WHERE template_name = ?", (template_name,))
+            conn.executemany(
+                "INSERT INTO approved_template_parts (template_name, part, kind, part_hash, name, placeholders, "
+                "added_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(template_name, part['part'], part['kind'], part['hash'], part['name'],
+                  json.dumps(part['placeholders']), added_at) for part in parts]
+            )
+        return len(parts)
+
+    def remove_template(self, template_name):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM approved_template_parts WHERE template_name = ?", (template_name,))
+
+    def approved_templates(self):
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT template_name AS plantilla,
+                       SUM(CASE WHEN kind = 'patron' THEN 1 ELSE 0 END) AS patrones,
+                       SUM(CASE WHEN kind = 'diseño' THEN 1 ELSE 0 END) AS diseños,
+                       MAX(added_at) AS aprobada
+                FROM approved_template_parts GROUP BY template_name ORDER BY template_name
+            """).fetchall()
+        return [dict(row) for row in rows]
+
+    def registry_version(self):
+        """Huella del conjunto de plantillas aprobadas: al cambiar, los veredictos se recalculan"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT template_name, part_hash FROM approved_template_parts ORDER BY template_name, part_hash"
+            ).fetchall()
+        return hashlib.sha256(
+            '\n'.join(f"{row['template_name']}:{row['part_hash']}" for row in rows).encode('utf-8')
+        ).hexdigest()
+
+    def template_for_signature(self, signature):
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT template_hash FROM template_signatures WHERE signature = ?", (signature,)
+            ).fetchone()
+        return row['template_hash'] if row else None
+
+    def remember_signature(self, signature, deck_template_hash):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO template_signatures (signature, template_hash) VALUES (?, ?)",
+                (signature, deck_template_hash)
+            )
+
+    def cached_verdict(self, deck_template_hash, registry_version):
+        """Veredicto ya calculado para un hash de plantilla con las plantillas aprobadas actuales"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM template_verdicts WHERE template_hash = ? AND registry_version = ?",
+                (deck_template_hash, registry_version)
+            ).fetchone()
+        if row is None:
+            return None
+        verdict = dict(row)
+        verdict['detail'] = json.loads(verdict['detail'])
+        return verdict
+
+    def analyze(self, deck_template_hash, parts, registry_version):
+        """
+        Comparar las partes de una plantilla con las aprobadas y cachear el veredicto
+
+        Cada parte se clasifica como 'aprobada' (hash idéntico a una aprobada), 'modificada'
+        (diseño con el nombre o los marcadores de uno aprobado) o 'ajena'
+
+        Returns:
+            dict: Veredicto con 'verdict', 'template_name', 'matched_parts', 'total_parts' y 'detail'
+        """
+        cached = self.cached_verdict(deck_template_hash, registry_version)
+        if cached is not None:
+            return cached
+
+        with self._connection() as conn:
+            approved = [dict(row) for row in conn.execute(
+                "SELECT template_name, kind, part_hash, name, placeholders FROM approved_template_parts"
+            ).fetchall()]
+
+        if not approved:
+            verdict, template_name, detail = VERDICT_NO_TEMPLATES, '', []
+            matched = 0
+        else:
+            by_hash = {}
+            for row in approved:
+                by_hash.setdefault(row['part_hash'], set()).add(row['template_name'])
+            # Plantilla aprobada con más partes idénticas: es la referencia para el resto de partes
+            votes = {}
+            for part in parts:
+                for name in by_hash.get(part['hash'], ()):
+                    votes[name] = votes.get(name, 0) + 1
+            template_name = max(votes, key=votes.get) if votes else ''
+            reference = [row for row in approved if row['template_name'] == template_name] or approved
+
+            detail = []
+            for part in parts:
+                if template_name in by_hash.get(part['hash'], ()):
+                    status = 'aprobada'
+                elif part['kind'] == 'diseño' and any(
+                    row['kind'] == 'diseño' and (
+                        (part['name'] and row['name'] == part['name'])
+                        or json.loads(row['placeholders']) == part['placeholders']
+                    )
+                    for row in reference
+                ):
+                    status = 'modificada'
+                else:
+                    status = 'ajena'
+                detail.append({'parte': part['part'], 'tipo': part['kind'], 'nombre': part['name'],
+                               'estado': status})
+
+            matched = sum(1 for item in detail if item['estado'] == 'aprobada')
+            masters_ok = all(item['estado'] == 'aprobada' for item in detail if item['tipo'] == 'patron')
+            if matched == len(detail):
+                verdict = VERDICT_CONFORMING
+            elif masters_ok and matched:
+                verdict = VERDICT_PARTIAL
+            else:
+                verdict = VERDICT_NON_CONFORMING
+
+        result = {
+            'template_hash': deck_template_hash,
+            'registry_version': registry_version,
+            'verdict': verdict,
+            'template_name': template_name,
+            'matched_parts': matched,
+            'total_parts': len(parts),
+            'detail': detail,
+            'analyzed_at': datetime.utcnow().isoformat(),
+        }
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO template_verdicts (template_hash, registry_version, verdict, template_name, "
+                "matched_parts, total_parts, detail, analyzed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (deck_template_hash, registry_version, verdict, template_name, matched, len(parts),
+                 json.dumps(detail, ensure_ascii=False), result['analyzed_at'])
+            )
+        return result
+
+    def record_deck(self, file, deck_template_hash):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO deck_templates (file_id, filename, subfolder, template_hash, checked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (file['id'], file['name'], file.get('subfolder', ''), deck_template_hash, datetime.utcnow().isoformat())
+            )
+
+    def template_summary(self):
+        """Plantillas distintas encontradas, con su veredicto y el número de presentaciones que la usan"""
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT substr(d.template_hash, 1, 12) AS plantilla_hash, v.verdict AS veredicto,
+                       v.template_name AS plantilla_aprobada, v.matched_parts AS partes_aprobadas,
+                       v.total_parts AS partes, COUNT(*) AS presentaciones
+                FROM deck_templates d LEFT JOIN template_verdicts v ON v.template_hash = d.template_hash
+                GROUP BY d.template_hash ORDER BY presentaciones DESC
+            """).fetchall()
+        return [dict(row) for row in rows]
+
+    def non_conforming_decks(self, limit=500):
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT d.filename AS archivo, d.subfolder AS carpeta, v.verdict AS veredicto,
+                       v.template_name AS plantilla_aprobada, v.matched_parts AS partes_aprobadas,
+                       v.total_parts AS partes, d.checked_at AS revisado
+                FROM deck_templates d JOIN template_verdicts v ON v.template_hash = d.template_hash
+                WHERE v.verdict != ? ORDER BY d.filename LIMIT ?
+            """, (VERDICT_CONFORMING, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+
+class TemplateConformanceRun:
+    """Conformidad de plantilla de un lote de archivos de Drive: un análisis por plantilla distinta"""
+
+    def __init__(self, drive_manager, template_store, progress_callback=None, rows_callback=None, max_workers=8):
+        """
+        Args:
+            drive_manager: GoogleDriveManager autenticado (cada hilo usa su propia copia)
+            template_store: TemplateStore con las plantillas aprobadas y la caché de veredictos
+            progress_callback: Función (fracción 0-1, mensaje) para informar avance
+            rows_callback: Función que recibe la fila de cada archivo en cuanto está lista
+            max_workers: Archivos revisados a la vez
+        """
+        self.drive_manager = drive_manager
+        self.template_store = template_store
+        self.progress_callback = progress_callback
+        self.rows_callback = rows_callback
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._analysis_locks = {}  # Hash de plantilla -> Lock de su análisis
+        self._done = 0
+        self._stats = {}
+
+    def run(self, files):
+        """
+        Revisar la plantilla de una lista de archivos
+
+        Returns:
+            dict: 'summary' y 'messages'
+        """
+        self._done = 0
+        self._stats = {'files': 0, 'signature_hits': 0, 'verdict_hits': 0, 'analyses': 0}
+        registry_version = self.template_store.registry_version()
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            messages = [
+                message for message in executor.map(lambda file: self._check(file, registry_version, len(files)), files)
+                if message
+            ]
+        self._report(1.0, "Revisión de plantillas completada")
+        stats = self._stats
+        messages.append(('info', f"📐 {stats['files']} archivo(s) revisados con {stats['analyses']} análisis de "
+                                 f"plantilla; {stats['verdict_hits']} veredictos reutilizados de la caché"))
+        return {'summary': dict(stats), 'messages': messages}
+
+    def _check(self, file, registry_version, total):
+        message = None
+        try:
+            drive_manager = self._thread_drive_manager()
+            try:
+                # Por rangos: el directorio central y, solo si la plantilla es nueva, sus partes
+                verdict = self._verdict(drive_manager.open_ranged(file), registry_version)
+            except RangeReadError as e:
+                # Solo los fallos de transporte justifican la descarga completa: un archivo sin
+                # plantilla o un ZIP inválido fallaría igual
+                print(f"Lectura por rangos no disponible para {file['name']}: {str(e)}")
+                content = drive_manager.download_file(file['id'])
+                if not content:
+                    raise ValueError("no se pudo descargar")
+                verdict = self._verdict(content, registry_version)
+            self.template_store.record_deck(file, verdict['template_hash'])
+            self._count('files')
+            if self.rows_callback:
+                self.rows_callback([{
+                    'Archivo': file['name'],
+                    'Subcarpeta': file.get('subfolder', ''),
+                    'Veredicto': verdict['verdict'],
+                    'Plantilla aprobada': verdict['template_name'],
+                    'Partes aprobadas': f"{verdict['matched_parts']}/{verdict['total_parts']}",
+                    'Partes distintas': ', '.join(
+                        f"{item['parte'].rsplit('/', 1)[-1]} ({item['estado']})"
+                        for item in verdict['detail'] if item['estado'] != 'aprobada'
+                    ),
+                }])
+        except zipfile.BadZipFile:
+            message = ('warning', f"⚠️ {file['name']} no es un archivo ZIP (¿.ppt binario?): sin revisión de plantilla")
+        except Exception as e:
+            message = ('error', f"❌ No se pudo revisar {file['name']}: {str(e)}")
+        with self._lock:
+            self._done += 1
+            done = self._done
+        self._report(done / max(total, 1), f"{done}/{total} archivos revisados")
+        return message
+
+    def _verdict(self, source, registry_version):
+        """Veredicto de una presentación, leyendo sus partes de plantilla solo si no hay nada en caché"""
+        signature = directory_signature(source)
+        if not signature:
+            raise ValueError("sin patrones ni diseños de diapositiva")
+        # Misma firma del directorio central: el hash de plantilla se reutiliza sin leer partes
+        deck_template_hash = self.template_store.template_for_signature(signature)
+        parts = None
+        if deck_template_hash is None:
+            parts = read_template_parts(source)
+            deck_template_hash = template_hash(parts)
+            self.template_store.remember_signature(signature, deck_template_hash)
+        else:
+            self._count('signature_hits')
+
+        # Los hilos que encuentran a la vez la misma plantilla nueva esperan a un único análisis;
+        # las plantillas distintas se analizan (y leen de Drive) en paralelo
+        with self._analysis_lock(deck_template_hash):
+            verdict = self.template_store.cached_verdict(deck_template_hash, registry_version)
+            if verdict is not None:
+                self._count('verdict_hits')
+                return verdict
+            if parts is None:
+                parts = read_template_parts(source)
+            self._count('analyses')
+            return self.template_store.analyze(deck_template_hash, parts, registry_version)
+
+    def _analysis_lock(self, deck_template_hash):
+        with self._lock:
+            return self._analysis_locks.setdefault(deck_template_hash, threading.Lock())
+
+    def _thread_drive_manager(self):
+        """Cliente de Drive propio del hilo actual"""
+        if getattr(self._local, 'drive_manager', None) is None:
+            self._local.drive_manager = self.drive_manager.thread_copy()
+        return self._local.drive_manager
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _report(self, fraction, message):
+        if self.progress_callback:
+            self.progress_callback(fraction, message)
@@ -0,0 +1,38 @@
+"""Configuración común de las pruebas: el código de la app vive en la raíz del repositorio"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_deck():
+    """Función que genera un PPTX con un cuadro de texto por diapositiva"""
+    def make(*slide_texts):
+        from pptx import Presentation
+        from pptx.util import Inches
+
+        prs = Presentation()
+        for text in slide_texts:
+            slide = prs.slides.add_slide(prs.slide_layouts[6])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(2)).text_frame.text = text
+        content = io.BytesIO()
+        prs.save(content)
+        return content.getvalue()
+    return make
+
+
+def add_zip_member(content, name, data, compress=True):
+    """Copia de un ZIP (p. ej. un PPTX) con una parte más"""
+    import zipfile
+
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(content)) as source, zipfile.ZipFile(output, 'w') as target:
+        for info in source.infolist():
+            target.writestr(info, source.read(info))
+        target.writestr(name, data, compress_type=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+    return output.getvalue()
@@ -0,0 +1,195 @@
+"""
+Generador de presentaciones .ppt binarias para las pruebas
+
+Escribe el mismo diseño que PowerPoint 97-2003 ([MS-CFB] versión 3 y [MS-PPT]): stream
+'PowerPoint Document' en sectores normales, 'Current User' en el mini stream, Document con
+SlideListWithText y ExObjList, diapositivas con dibujos OfficeArt, PersistDirectoryAtom y
+UserEditAtom. Admite guardados incrementales, que añaden al final del stream las versiones
+nuevas de los contenedores sin borrar las anteriores.
+"""
+
+import struct
+
+from ppt_legacy import (
+    ENDOFCHAIN, FREESECT, OLE2_SIGNATURE, RT_DOCUMENT, RT_EX_HYPERLINK, RT_EX_HYPERLINK_ATOM,
+    RT_INTERACTIVE_INFO_ATOM, RT_MAIN_MASTER, RT_PERSIST_DIRECTORY_ATOM, RT_SLIDE, RT_SLIDE_LIST_WITH_TEXT,
+    RT_SLIDE_PERSIST_ATOM, RT_TEXT_BYTES_ATOM, RT_TEXT_CHARS_ATOM, RT_USER_EDIT_ATOM, RT_CSTRING,
+)
+
+FATSECT = 0xFFFFFFFD
+SECTOR_SIZE = 512
+MINI_SECTOR_SIZE = 64
+MINI_STREAM_CUTOFF = 4096
+
+RT_DOCUMENT_ATOM = 0x03E9
+RT_ENVIRONMENT = 0x03F2
+RT_TEXT_MASTER_STYLE_ATOM = 0x0FA3
+RT_EX_OBJ_LIST = 0x0409
+RT_PPDRAWING = 0x040C
+RT_TEXT_HEADER_ATOM = 0x0F9F
+RT_INTERACTIVE_INFO = 0x0FF2
+RT_CURRENT_USER_ATOM = 0x0FF6
+OFFICE_ART_DG_CONTAINER = 0xF002
+OFFICE_ART_SP_CONTAINER = 0xF004
+OFFICE_ART_CLIENT_TEXTBOX = 0xF00D
+OFFICE_ART_CLIENT_DATA = 0xF011
+
+
+def atom(rec_type, data, instance=0):
+    return struct.pack('<HHI', instance << 4, rec_type, len(data)) + data
+
+
+def container(rec_type, *children, instance=0):
+    data = b''.join(children)
+    return struct.pack('<HHI', (instance << 4) | 0x0F, rec_type, len(data)) + data
+
+
+def text_chars(text):
+    return atom(RT_TEXT_CHARS_ATOM, text.encode('utf-16-le'))
+
+
+def slide_container(text, hyperlink_id=None):
+    """Diapositiva con un cuadro de texto; con hyperlink_id, la forma enlaza a ese hipervínculo"""
+    shape = [container(OFFICE_ART_CLIENT_TEXTBOX, atom(RT_TEXT_HEADER_ATOM, struct.pack('<I', 1)), text_chars(text))]
+    if hyperlink_id is not None:
+        info = struct.pack('<IIBBBBBBBB', 0, hyperlink_id, 4, 0, 0, 0, 8, 0, 0, 0)
+        shape.append(container(OFFICE_ART_CLIENT_DATA, container(RT_INTERACTIVE_INFO, atom(RT_INTERACTIVE_INFO_ATOM, info))))
+    drawing = container(OFFICE_ART_DG_CONTAINER, container(OFFICE_ART_SP_CONTAINER, *shape))
+    return container(RT_SLIDE, atom(0x03EF, b'\0' * 24), container(RT_PPDRAWING, drawing))
+
+
+def master_container(text):
+    """Patrón de diapositivas con un texto ANSI (TextBytesAtom)"""
+    textbox = container(OFFICE_ART_CLIENT_TEXTBOX, atom(RT_TEXT_BYTES_ATOM, text.encode('latin-1')))
+    drawing = container(OFFICE_ART_DG_CONTAINER, container(OFFICE_ART_SP_CONTAINER, textbox))
+    return container(RT_MAIN_MASTER, container(RT_PPDRAWING, drawing))
+
+
+def document_container(slides, hyperlinks):
+    """Document con la lista de diapositivas (persistId, texto de esquema) y los hipervínculos externos"""
+    slide_list = []
+    for index, (persist_id, outline) in enumerate(slides, 1):
+        slide_list.append(atom(RT_SLIDE_PERSIST_ATOM, struct.pack('<5I', persist_id, 0, 1, 255 + index, 0)))
+        slide_list.append(atom(RT_TEXT_HEADER_ATOM, struct.pack('<I', 0)))
+        slide_list.append(text_chars(outline))
+    links = [
+        container(
+            RT_EX_HYPERLINK,
+            atom(RT_EX_HYPERLINK_ATOM, struct.pack('<I', link_id)),
+            atom(RT_CSTRING, target.encode('utf-16-le'), instance=0),
+            atom(RT_CSTRING, target.encode('utf-16-le'), instance=1),
+        )
+        for link_id, target in hyperlinks.items()
+    ]
+    return container(
+        RT_DOCUMENT,
+        atom(RT_DOCUMENT_ATOM, b'\0' * 40),
+        # Tipos de letra y estilos: en un archivo real el stream supera el corte del mini stream
+        container(RT_ENVIRONMENT, atom(RT_TEXT_MASTER_STYLE_ATOM, b'\0' * MINI_STREAM_CUTOFF)),
+        container(RT_EX_OBJ_LIST, atom(0x040A, struct.pack('<I', len(links))), *links),
+        container(RT_SLIDE_LIST_WITH_TEXT, *slide_list, instance=0),
+    )
+
+
+class PowerPointDocument:
+    """Stream 'PowerPoint Document' construido por ediciones, como los guardados de PowerPoint"""
+
+    def __init__(self):
+        self.stream = b''
+        self.last_edit = 0
+
+    def save(self, records):
+        """
+        Añadir una edición: records es persistId -> contenedor (el persistId 1 es el Document)
+
+        Returns:
+            int: Offset del UserEditAtom de esta edición
+        """
+        offsets = {}
+        for persist_id, record in sorted(records.items()):
+            offsets[persist_id] = len(self.stream)
+            self.stream += record
+        directory = b''
+        for persist_id, offset in sorted(offsets.items()):
+            directory += struct.pack('<II', persist_id | (1 << 20), offset)
+        directory_offset = len(self.stream)
+        self.stream += atom(RT_PERSIST_DIRECTORY_ATOM, directory)
+        edit_offset = len(self.stream)
+        self.stream += atom(RT_USER_EDIT_ATOM, struct.pack(
+            '<IHBBIIIIHH', 256, 0, 0, 3, self.last_edit, directory_offset, 1, max(offsets) + 1, 1, 0
+        ))
+        self.last_edit = edit_offset
+        return edit_offset
+
+    def current_user(self):
+        data = struct.pack('<III', 20, 0xE391C05F, self.last_edit) + b'\0' * 8
+        return atom(RT_CURRENT_USER_ATOM, data)
+
+
+def compound_file(streams):
+    """Archivo OLE2 (versión 3) con los streams dados: los menores de 4096 bytes van al mini stream"""
+    sectors = []
+    fat = []
+
+    def allocate(data, size=SECTOR_SIZE):
+        if not data:
+            return ENDOFCHAIN
+        first = len(sectors)
+        for offset in range(0, len(data), size):
+            sectors.append(data[offset:offset + size].ljust(size, b'\0'))
+            fat.append(len(sectors))
+        fat[-1] = ENDOFCHAIN
+        return first
+
+    mini_stream = b''
+    minifat = []
+    entries = []
+    for name, data in streams.items():
+        if len(data) < MINI_STREAM_CUTOFF:
+            first = len(minifat) if data else ENDOFCHAIN
+            for offset in range(0, len(data), MINI_SECTOR_SIZE):
+                mini_stream += data[offset:offset + MINI_SECTOR_SIZE].ljust(MINI_SECTOR_SIZE, b'\0')
+                minifat.append(len(minifat) + 1)
+            if data:
+                minifat[-1] = ENDOFCHAIN
+            entries.append((name, first, len(data)))
+        else:
+            entries.append((name, allocate(data), len(data)))
+
+    mini_stream_start = allocate(mini_stream)
+    first_minifat = allocate(struct.pack(f'<{len(minifat)}I', *minifat)) if minifat else ENDOFCHAIN
+
+    def entry(name, entry_type, start, size, child=FREESECT, right=FREESECT):
+        encoded = (name + '\0').encode('utf-16-le')
+        return (encoded.ljust(64, b'\0') + struct.pack('<HBB3I', len(encoded), entry_type, 1, FREESECT, right, child)
+                + b'\0' * 36 + struct.pack('<IQ', start, size))
+
+    directory = entry('Root Entry', 5, mini_stream_start, len(mini_stream), child=1)
+    for index, (name, start, size) in enumerate(entries, 1):
+        directory += entry(name, 2, start, size, right=index + 1 if index < len(entries) else FREESECT)
+    first_directory = allocate(directory.ljust(-(-len(directory) // SECTOR_SIZE) * SECTOR_SIZE, b'\0'))
+
+    # Sectores FAT al final: cada uno describe 128 sectores, incluidos los propios
+    num_fat_sectors = 1
+    while (len(sectors) + num_fat_sectors) > num_fat_sectors * (SECTOR_SIZE // 4):
+        num_fat_sectors += 1
+    fat_start = len(sectors)
+    fat.extend([FATSECT] * num_fat_sectors)
+    fat.extend([FREESECT] * (num_fat_sectors * (SECTOR_SIZE // 4) - len(fat)))
+    for index in range(num_fat_sectors):
+        sectors.append(struct.pack('<128I', *fat[index * 128:(index + 1) * 128]))
+
+    difat = [fat_start + index for index in range(num_fat_sectors)] + [FREESECT] * (109 - num_fat_sectors)
+    header = (OLE2_SIGNATURE + b'\0' * 16 + struct.pack('<HHHHH', 0x3E, 3, 0xFFFE, 9, 6) + b'\0' * 6
+              + struct.pack('<9I', 0, num_fat_sectors, first_directory, 0, MINI_STREAM_CUTOFF,
+                            first_minifat, 1 if minifat else 0, ENDOFCHAIN, 0)
+              + struct.pack('<109I', *difat))
+    return header + b''.join(sectors)
+
+
+def legacy_ppt(document):
+    """Archivo .ppt completo a partir de un PowerPointDocument"""
+    return compound_file({
+        'Current User': document.current_user(),
+        'PowerPoint Document': document.stream,
+    })
@@ -0,0 +1,103 @@
+"""Añadir carpetas a la raíz por lotes: cada operación del batch tiene su propio resultado"""
+
+import json
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from drive_throttle import DrivePolicy
+
+
+def _http_error(status, reason):
+    content = json.dumps({'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}})
+    return HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+
+class FakeUpdate:
+    def __init__(self, folder_id):
+        self.folder_id = folder_id
+
+
+class FakeFiles:
+    def update(self, fileId, addParents, fields):
+        return FakeUpdate(fileId)
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.folder_ids = []
+
+    def add(self, request, request_id):
+        assert request.folder_id == request_id
+        self.folder_ids.append(request_id)
+
+    def execute(self):
+        self.service.batches.append(list(self.folder_ids))
+        if len(self.service.batches) in self.service.failing_batches:
+            raise _http_error(400, 'badRequest')
+        for folder_id in self.folder_ids:
+            outcome = self.service.outcomes[folder_id]
+            error = outcome.pop(0) if isinstance(outcome, list) and outcome else None
+            if isinstance(outcome, HttpError):
+                error = outcome
+            if error:
+                self.callback(folder_id, None, error)
+            else:
+                self.callback(folder_id, {'id': folder_id, 'name': f"Carpeta {folder_id}"}, None)
+
+
+class FakeService:
+    """
+    Drive falso: outcomes es ID -> HttpError permanente o lista de errores antes de aceptar;
+    las solicitudes batch con número en failing_batches (desde 1) fallan completas
+    """
+
+    def __init__(self, outcomes, failing_batches=()):
+        self.outcomes = outcomes
+        self.failing_batches = set(failing_batches)
+        self.batches = []
+
+    def files(self):
+        return FakeFiles()
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+
+def _drive_manager(service):
+    from app import GoogleDriveManager
+
+    drive_manager = GoogleDriveManager()
+    drive_manager.service = service
+    drive_manager.policy = DrivePolicy(quota_per_minute=60000, max_retries=2, base_delay=0)
+    return drive_manager
+
+
+def test_partial_batch_failures_are_reported_per_folder():
+    service = FakeService({
+        'ok': [],
+        'limitada': [_http_error(403, 'userRateLimitExceeded')],
+        'prohibida': _http_error(403, 'insufficientFilePermissions'),
+        'caida': _http_error(503, 'backendError'),
+    })
+
+    results = _drive_manager(service).add_folders_to_root(['ok', 'limitada', 'prohibida', 'caida', ' ok '])
+
+    assert [(row['ID'], row['Resultado']) for row in results] == [
+        ('ok', '✅ Añadida'), ('limitada', '✅ Añadida'), ('prohibida', '❌ Error'), ('caida', '❌ Error'),
+    ]
+    assert 'insufficientFilePermissions' in results[2]['Detalle']
+    # Solo se reenvían las operaciones rechazadas por cuota o 5xx, hasta max_retries veces
+    assert service.batches == [['ok', 'limitada', 'prohibida', 'caida'], ['limitada', 'caida'], ['caida']]
+
+
+def test_failed_batch_request_only_affects_its_chunk():
+    service = FakeService({folder_id: [] for folder_id in 'abcde'}, failing_batches={2})
+
+    results = _drive_manager(service).add_folders_to_root(list('abcde'), chunk_size=2)
+
+    assert [row['Resultado'] for row in results] == ['✅ Añadida', '✅ Añadida', '❌ Error', '❌ Error', '✅ Añadida']
+    assert 'badRequest' in results[2]['Detalle']
+    assert service.batches == [['a', 'b'], ['c', 'd'], ['e']]
@@ -0,0 +1,75 @@
+"""Desglose por partes: la descarga completa solo sustituye a una lectura por rangos fallida"""
+
+import io
+
+import archive_breakdown
+from archive_breakdown import ArchiveAnalysisRun, ArchiveIndex
+from drive_range import RangeReadError
+
+
+class RangedContent(io.BytesIO):
+    """Contenido servido como si se leyera por rangos"""
+
+    @property
+    def bytes_fetched(self):
+        return self.tell()
+
+
+class RangedDriveManager:
+    """Drive falso: open_ranged sirve el contenido o falla como un error de transporte"""
+
+    def __init__(self, content, ranged_error=None):
+        self.content = content
+        self.ranged_error = ranged_error
+        self.downloads = 0
+
+    def thread_copy(self):
+        return self
+
+    def open_ranged(self, file):
+        if self.ranged_error:
+            raise self.ranged_error
+        return RangedContent(self.content)
+
+    def download_file(self, file_id):
+        self.downloads += 1
+        return self.content
+
+
+def test_invalid_zip_is_not_downloaded_again(tmp_path):
+    drive = RangedDriveManager(b'\xd0\xcf\x11\xe0' + b'\0' * 2048)
+    run = ArchiveAnalysisRun(drive, ArchiveIndex(str(tmp_path / 'store.db')))
+
+    result = run.run([{'id': 'f1', 'name': 'antigua.ppt'}])
+
+    assert drive.downloads == 0
+    assert result['messages'][0][0] == 'warning'
+    assert result['summary']['files'] == 0
+
+
+def test_content_errors_are_not_downloaded_again(make_deck, tmp_path, monkeypatch):
+    def unreadable(source):
+        raise ValueError("directorio central inconsistente")
+
+    monkeypatch.setattr(archive_breakdown, 'archive_breakdown', unreadable)
+    drive = RangedDriveManager(make_deck('Portada'))
+    run = ArchiveAnalysisRun(drive, ArchiveIndex(str(tmp_path / 'store.db')))
+
+    result = run.run([{'id': 'f1', 'name': 'deck.pptx'}])
+
+    assert drive.downloads == 0
+    assert result['messages'][0] == ('error', "❌ No se pudo analizar deck.pptx: directorio central inconsistente")
+
+
+def test_transport_errors_fall_back_to_download(make_deck, tmp_path):
+    deck = make_deck('Portada')
+    drive = RangedDriveManager(deck, ranged_error=RangeReadError("Drive no respetó el rango"))
+    rows = []
+    run = ArchiveAnalysisRun(drive, ArchiveIndex(str(tmp_path / 'store.db')), rows_callback=rows.extend)
+
+    result = run.run([{'id': 'f1', 'name': 'deck.pptx'}])
+
+    assert drive.downloads == 1
+    assert result['summary']['files'] == 1
+    assert result['summary']['fetched_bytes'] == len(deck)
+    assert rows[0]['Archivo'] == 'deck.pptx'
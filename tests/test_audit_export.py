@@ -0,0 +1,57 @@
+"""Exportación en streaming: hojas nuevas al llenarse una, BOM del CSV y límite de tamaño"""
+
+import os
+import re
+import zipfile
+
+import pytest
+
+import audit_export
+from audit_export import ExportTooLarge, export_to_file, write_csv, write_xlsx
+
+ROWS = [{'Archivo': f'presentación {index}.pptx', 'URL': f'https://ejemplo.org/{index}'} for index in range(5)]
+
+
+def _sheet_rows(path):
+    """Nombre de cada hoja -> filas escritas (encabezado incluido)"""
+    with zipfile.ZipFile(path) as workbook:
+        names = re.findall(r'<sheet name="([^"]+)"', workbook.read('xl/workbook.xml').decode())
+        return {
+            name: workbook.read(f'xl/worksheets/sheet{index}.xml').decode().count('<row ')
+            for index, name in enumerate(names, 1)
+        }
+
+
+def test_write_xlsx_rolls_over_to_new_sheet_at_row_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_export, 'XLSX_MAX_ROWS_PER_SHEET', 2)
+    path = str(tmp_path / 'export.xlsx')
+
+    written = write_xlsx([ROWS[:3], ROWS[3:]], path)
+
+    assert written == 5
+    assert _sheet_rows(path) == {'Resultados': 3, 'Resultados 2': 3, 'Resultados 3': 2}
+
+
+def test_write_csv_keeps_bom_and_utf8(tmp_path):
+    path = str(tmp_path / 'export.csv')
+
+    assert write_csv([ROWS[:2]], path) == 2
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    assert content.startswith(b'\xef\xbb\xbf')
+    assert content[3:].decode('utf-8').splitlines() == [
+        'Archivo,URL', 'presentación 0.pptx,https://ejemplo.org/0', 'presentación 1.pptx,https://ejemplo.org/1',
+    ]
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'xlsx'])
+def test_export_over_size_limit_is_rejected_and_removed(export_format, monkeypatch, tmp_path):
+    monkeypatch.setattr(audit_export.tempfile, 'tempdir', str(tmp_path))
+
+    with pytest.raises(ExportTooLarge):
+        export_to_file([ROWS] * 50, export_format, max_bytes=1024)
+
+    assert os.listdir(tmp_path) == []
+    path, written = export_to_file([ROWS], export_format, max_bytes=1024 * 1024)
+    assert written == 5 and os.path.getsize(path) <= 1024 * 1024
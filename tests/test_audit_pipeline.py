@@ -0,0 +1,70 @@
+"""URLAuditPipeline con Drive y validador locales"""
+
+import time
+
+from audit_pipeline import URLAuditPipeline
+from pptx_analyzer import PPTXURLExtractor
+
+
+class FakeDriveManager:
+    def __init__(self, files):
+        self.files = files
+
+    def download_file(self, file_id):
+        return self.files[file_id]
+
+
+class SlowValidator:
+    """Validador que tarda un tiempo fijo por lote, como uno que espera respuestas de la red"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.validated = []
+
+    def validate_many(self, urls):
+        time.sleep(self.delay)
+        self.validated.extend(urls)
+        return {url: (200, 'OK') for url in urls}
+
+    def get_host_summary(self):
+        return []
+
+
+def test_validation_time_does_not_count_against_extraction_deadline(make_deck):
+    deck = make_deck(*(f"https://www.github.com/slide{index}/inicio" for index in range(6)))
+    validator = SlowValidator(delay=0.5)
+    pipeline = URLAuditPipeline(
+        FakeDriveManager({'deck': deck}), processed_by='pruebas',
+        extractor=PPTXURLExtractor(max_seconds=1.5), validator=validator,
+    )
+
+    result = pipeline.run([{'id': 'deck', 'name': 'deck.pptx'}])
+
+    assert len(result['rows']) == 6
+    assert not [text for level, text in result['messages'] if level == 'warning']
+
+
+class RecordingStore:
+    def __init__(self):
+        self.records = []
+
+    def record(self, records):
+        self.records.extend(records)
+
+
+def test_records_keep_the_slide_of_their_batch(make_deck, tmp_path):
+    from url_index import URLIndex
+
+    deck = make_deck("Portada", "https://www.github.com/isil/dos", "Ver https://docs.python.org/3/ hoy")
+    store = RecordingStore()
+    url_index = URLIndex(str(tmp_path / 'urls.db'))
+    pipeline = URLAuditPipeline(
+        FakeDriveManager({'deck': deck}), processed_by='pruebas', validator=SlowValidator(delay=0),
+        store=store, url_index=url_index,
+    )
+
+    pipeline.run([{'id': 'deck', 'name': 'deck.pptx'}])
+
+    slides = {record['url']: record['slide_number'] for record in store.records}
+    assert slides == {'https://www.github.com/isil/dos': 2, 'https://docs.python.org/3/': 3}
+    assert [row['slide_number'] for row in url_index.lookup_url('https://docs.python.org/3/')] == [3]
@@ -0,0 +1,91 @@
+"""Almacén local y sincronización diferida con Supabase: claves idempotentes y reintentos con backoff"""
+
+import sqlite3
+
+import audit_store
+from audit_store import AuditStore, SupabaseSync, audit_key
+
+
+def _record(slide_number=1, url='https://ejemplo.org/', run_id='run-1'):
+    record = {
+        'filename': 'deck.pptx', 'slide_number': slide_number, 'url': url, 'url_domain': 'ejemplo.org',
+        'location_context': f'Diapositiva {slide_number}', 'status': '200', 'processed_by': 'pruebas',
+    }
+    record['audit_key'] = audit_key(run_id, 'file-1', record)
+    return record
+
+
+class StubSupabase:
+    """Cliente Supabase falso: falla las primeras failures llamadas a upsert"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.upserts = []
+
+    def table(self, name):
+        assert name == 'validated_urls'
+        return self
+
+    def upsert(self, rows, on_conflict, ignore_duplicates):
+        self.upserts.append(([row['audit_key'] for row in rows], on_conflict, ignore_duplicates))
+        return self
+
+    def execute(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Supabase no disponible")
+        return self
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _sync_state(store):
+    with sqlite3.connect(store.db_path) as conn:
+        return conn.execute(
+            "SELECT synced_at IS NOT NULL, sync_attempts, next_sync_at, last_sync_error FROM validated_urls"
+        ).fetchone()
+
+
+def test_insert_or_ignore_on_audit_key(tmp_path):
+    store = AuditStore(str(tmp_path / 'store.db'))
+
+    store.record([_record(), _record()])
+    store.record([_record(), _record(slide_number=2), _record(run_id='run-2')])
+
+    assert store.sync_status()['total'] == 3
+    assert len(store.pending()) == 3
+
+
+def test_pending_failed_backoff_then_synced(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(audit_store.time, 'time', clock)
+    store = AuditStore(str(tmp_path / 'store.db'))
+    store.record([_record()])
+    supabase = StubSupabase(failures=2)
+    sync = SupabaseSync(store, supabase)
+
+    assert sync.sync_once() == 0
+    synced, attempts, next_sync_at, error = _sync_state(store)
+    assert (synced, attempts, error) == (0, 1, 'ConnectionError: Supabase no disponible')
+    assert next_sync_at == clock.now + 5
+    # Durante el backoff no se reintenta
+    assert store.pending() == [] and sync.sync_once() == 0
+    assert len(supabase.upserts) == 1
+
+    clock.now += 5
+    assert sync.sync_once() == 0
+    assert _sync_state(store)[1:3] == (2, clock.now + 10)
+    assert store.sync_status() == {'total': 1, 'sincronizadas': 0, 'pendientes': 1, 'con_error': 1}
+
+    clock.now += 10
+    assert sync.sync_once() == 1
+    assert _sync_state(store)[0] == 1 and _sync_state(store)[3] is None
+    assert store.sync_status() == {'total': 1, 'sincronizadas': 1, 'pendientes': 0, 'con_error': 0}
+    # Siempre upsert idempotente sobre audit_key
+    assert supabase.upserts == [([_record()['audit_key']], 'audit_key', True)] * 3
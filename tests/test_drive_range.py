@@ -0,0 +1,118 @@
+"""Lecturas por rangos de Drive: bloques en caché, tramos faltantes contiguos y expulsión LRU"""
+
+import zipfile
+
+import pytest
+
+from drive_range import DriveRangeFile, RangeReadError
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes: 16 bloques de 64
+
+
+class FakeMediaRequest:
+    def __init__(self, service):
+        self.service = service
+        self.headers = {}
+
+    def execute(self):
+        if self.service.error:
+            raise self.service.error
+        start, end = (int(value) for value in self.headers['Range'][len('bytes='):].split('-'))
+        self.service.ranges.append((start, end))
+        if self.service.ignore_range:
+            return self.service.content
+        return self.service.content[start:end + 1]
+
+
+class FakeService:
+    """files().get_media() de Drive que anota cada rango pedido"""
+
+    def __init__(self, content=CONTENT, ignore_range=False, error=None):
+        self.content = content
+        self.ignore_range = ignore_range
+        self.error = error
+        self.ranges = []
+
+    def files(self):
+        return self
+
+    def get_media(self, fileId):
+        return FakeMediaRequest(self)
+
+
+def _range_file(service, max_blocks=64):
+    return DriveRangeFile(service, 'f1', len(service.content), block_size=64, max_blocks=max_blocks)
+
+
+def _read(range_file, start, end):
+    range_file.seek(start)
+    return range_file.read(end - start)
+
+
+def test_read_range_merges_cached_and_missing_blocks():
+    service = FakeService()
+    range_file = _range_file(service)
+
+    assert _read(range_file, 70, 80) == CONTENT[70:80]
+    assert _read(range_file, 200, 210) == CONTENT[200:210]
+    assert service.ranges == [(64, 127), (192, 255)]
+
+    # Bloques 0-4: el 1 y el 3 están en caché; se piden el 0, el 2 y el 4 en tramos separados
+    assert _read(range_file, 10, 300) == CONTENT[10:300]
+    assert service.ranges[2:] == [(0, 63), (128, 191), (256, 319)]
+
+    # Bloques 5-7 faltan seguidos: una sola solicitud
+    assert _read(range_file, 330, 500) == CONTENT[330:500]
+    assert service.ranges[5:] == [(320, 511)]
+    assert range_file.requests == 6
+    assert range_file.bytes_fetched == 512
+
+    # Todo en caché: ninguna solicitud más
+    assert _read(range_file, 0, 512) == CONTENT[:512]
+    assert range_file.requests == 6
+
+
+def test_last_block_is_clipped_to_file_size():
+    service = FakeService(CONTENT[:1000])
+    range_file = _range_file(service)
+
+    range_file.seek(-30, 2)
+    assert range_file.read() == CONTENT[970:1000]
+    assert service.ranges == [(960, 999)]
+    assert range_file.read(10) == b''
+
+
+def test_least_recently_used_blocks_are_evicted():
+    service = FakeService()
+    range_file = _range_file(service, max_blocks=3)
+
+    for block in (0, 1, 2):
+        _read(range_file, block * 64, block * 64 + 1)
+    _read(range_file, 0, 1)  # El bloque 0 pasa a ser el más reciente
+    _read(range_file, 3 * 64, 3 * 64 + 1)  # Expulsa el 1, el menos usado
+
+    assert list(range_file._blocks) == [2, 0, 3]
+    _read(range_file, 64, 65)
+    assert service.ranges[-1] == (64, 127)
+    assert list(range_file._blocks) == [0, 3, 1]
+
+
+def test_transport_errors_raise_range_read_error():
+    error = ConnectionResetError("conexión cerrada")
+    with pytest.raises(RangeReadError) as raised:
+        _read(_range_file(FakeService(error=error)), 0, 10)
+    assert raised.value.__cause__ is error
+
+    with pytest.raises(RangeReadError, match='no respetó el rango'):
+        _read(_range_file(FakeService(ignore_range=True)), 0, 10)
+
+
+def test_zipfile_reads_only_the_central_directory(make_deck):
+    deck = make_deck('Portada', 'Cierre')
+    service = FakeService(deck)
+    range_file = DriveRangeFile(service, 'f1', len(deck), block_size=4096)
+
+    with zipfile.ZipFile(range_file) as zip_file:
+        assert 'ppt/slides/slide2.xml' in zip_file.namelist()
+
+    assert range_file.bytes_fetched < len(deck) / 2
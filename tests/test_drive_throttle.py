@@ -0,0 +1,99 @@
+"""Cuota y reintentos de Drive: cubeta de fichas, presupuesto de reintentos y errores reintentables"""
+
+import json
+import socket
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import drive_throttle
+from drive_throttle import DrivePolicy, RetryBudget, TokenBucket
+
+
+def _http_error(status, reason):
+    content = json.dumps({'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}})
+    return HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+
+class FakeClock:
+    """time.monotonic falso: time.sleep avanza el reloj en lugar de esperar"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(drive_throttle.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(drive_throttle.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_token_bucket_allows_burst_then_refills_at_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    # Sin fichas: espera lo justo para que se repongan las que faltan
+    bucket.acquire(2)
+    assert clock.sleeps == [pytest.approx(0.2)]
+
+    # Tras una pausa larga la cubeta se llena solo hasta su capacidad
+    clock.now += 60
+    bucket.acquire(5)
+    bucket.acquire(50)
+    assert clock.sleeps[1:] == [pytest.approx(0.5)]
+
+
+def test_retry_budget_is_exhausted_and_refilled_by_successes():
+    budget = RetryBudget(ratio=0.5, min_reserve=2)
+
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+
+    budget.record_success()
+    assert not budget.try_spend()
+    budget.record_success()
+    assert budget.try_spend()
+
+
+def test_policy_stops_retrying_when_budget_is_exhausted(clock):
+    policy = DrivePolicy(quota_per_minute=60000, max_retries=5, retry_budget=RetryBudget(min_reserve=2))
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise _http_error(503, 'backendError')
+
+    with pytest.raises(HttpError):
+        policy.call(failing)
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (_http_error(403, 'userRateLimitExceeded'), True),
+    (_http_error(403, 'rateLimitExceeded'), True),
+    (_http_error(403, 'quotaExceeded'), True),
+    (_http_error(403, 'insufficientFilePermissions'), False),
+    (_http_error(403, 'domainPolicy'), False),
+    (_http_error(429, 'tooManyRequests'), True),
+    (_http_error(500, 'backendError'), True),
+    (_http_error(404, 'notFound'), False),
+    (socket.timeout('timed out'), True),
+    (ConnectionResetError(), True),
+    (ValueError('otro'), False),
+])
+def test_is_retryable_distinguishes_rate_limit_403s(error, retryable):
+    assert DrivePolicy.is_retryable(error) is retryable
@@ -0,0 +1,64 @@
+"""Casos adversarios de PPTXURLExtractor: bombas de compresión, presupuesto de bytes, textos enormes y plazo"""
+
+import os
+import time
+
+from conftest import add_zip_member
+from pptx_analyzer import PPTXURLExtractor
+
+
+def test_compression_ratio_bomb_is_rejected(make_deck):
+    # 4 MB de ceros se comprimen a unos pocos KB (ratio > 1000:1)
+    deck = add_zip_member(make_deck("https://www.github.com/a"), 'ppt/media/bomba.bin', b'\0' * 4 * 1024 * 1024)
+    extractor = PPTXURLExtractor()
+
+    extractor.extract_urls_from_file(deck)
+
+    assert extractor.last_status['status'] == 'parcial'
+    assert 'Ratio de compresión' in extractor.last_status['reason']
+
+
+def test_inflated_size_budget_is_enforced(make_deck):
+    # Datos incompresibles: el ratio es normal, pero el tamaño descomprimido supera el presupuesto
+    deck = add_zip_member(make_deck("https://www.github.com/a"), 'ppt/media/grande.bin', os.urandom(2 * 1024 * 1024))
+    extractor = PPTXURLExtractor(max_inflated_bytes=1024 * 1024)
+
+    extractor.extract_urls_from_file(deck)
+
+    assert extractor.last_status['status'] == 'parcial'
+    assert 'descomprimido supera' in extractor.last_status['reason']
+
+
+def test_huge_single_text_run_is_scanned_in_linear_time(make_deck):
+    # Sin espacios ni '@' ni corchetes cerrados: el peor caso de retroceso de los patrones anteriores
+    hostile = 'a' * 100_000 + '[' * 50_000 + 'x@' * 25_000
+    deck = make_deck(hostile + " https://www.github.com/final")
+    extractor = PPTXURLExtractor()
+
+    started = time.perf_counter()
+    urls = [url_info['url'] for url_info in extractor.extract_urls_from_file(deck)]
+
+    assert time.perf_counter() - started < 10
+    assert 'https://www.github.com/final' in urls
+    assert extractor.last_status['status'] == 'completo'
+
+
+def test_long_text_is_scanned_in_chunks_without_losing_urls():
+    extractor = PPTXURLExtractor(max_text_length=1000)
+    extractor._start_run()
+    text = ' '.join(f"https://www.github.com/repo{index}/inicio" for index in range(200))
+
+    urls = extractor._find_urls_in_text(text)
+
+    assert len(urls) == 200
+    assert extractor.last_status['status'] == 'completo'
+
+
+def test_deadline_stops_extraction(make_deck):
+    deck = make_deck(*(f"https://www.github.com/slide{index}" for index in range(30)))
+    extractor = PPTXURLExtractor(max_seconds=1e-6)
+
+    extractor.extract_urls_from_file(deck)
+
+    assert extractor.last_status['status'] == 'parcial'
+    assert 'Tiempo máximo' in extractor.last_status['reason']
@@ -0,0 +1,81 @@
+"""Perfilado por archivo: solo se guardan los lentos y el candado se libera aunque cProfile falle"""
+
+import json
+import os
+
+import file_profiler
+from file_profiler import FileProfiler, list_profiles
+
+
+class FakePerfCounter:
+    """time.perf_counter falso: cada archivo 'tarda' los segundos de durations, en orden"""
+
+    def __init__(self, *durations):
+        self.durations = list(durations)
+        self.now = 0.0
+        self.started = False
+
+    def __call__(self):
+        if self.started:
+            self.now += self.durations.pop(0)
+        self.started = not self.started
+        return self.now
+
+
+def _work():
+    return sum(index * index for index in range(1000))
+
+
+def test_only_files_above_threshold_are_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_profiler.time, 'perf_counter', FakePerfCounter(0.5, 12.0, 10.0))
+    profiler = FileProfiler('run/1', threshold_seconds=10, profile_dir=str(tmp_path))
+
+    for file_id in ('rapido', 'lento', 'limite'):
+        with profiler.profile(file_id, f"{file_id}.pptx"):
+            _work()
+
+    assert sorted(summary['file_id'] for summary in profiler.saved) == ['lento', 'limite']
+    run_dir = tmp_path / 'run_1'
+    assert sorted(os.listdir(run_dir)) == ['lento.json', 'lento.prof', 'limite.json', 'limite.prof']
+    summaries = list_profiles('run/1', str(tmp_path))
+    assert [(summary['file_id'], summary['seconds']) for summary in summaries] == [('lento', 12.0), ('limite', 10.0)]
+    assert any(entry['funcion'] == '_work' for entry in summaries[0]['top'])
+    assert not file_profiler._profiling_lock.locked()
+
+
+class FailingProfile:
+    """cProfile.Profile cuando otra herramienta de perfilado ya está activa (Python 3.12+)"""
+
+    def enable(self):
+        raise ValueError("Another profiling tool is already active")
+
+
+def test_lock_is_released_when_enable_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_profiler.cProfile, 'Profile', FailingProfile)
+    profiler = FileProfiler('run', threshold_seconds=0, profile_dir=str(tmp_path))
+
+    with profiler.profile('f1', 'deck.pptx'):
+        assert not file_profiler._profiling_lock.locked()
+
+    assert not file_profiler._profiling_lock.locked()
+    # Se guarda el tiempo, pero sin perfil
+    with open(tmp_path / 'run' / 'f1.json', encoding='utf-8') as f:
+        summary = json.load(f)
+    assert summary['profile_path'] is None and summary['top'] == []
+
+
+def test_concurrent_file_is_only_timed_and_lock_survives_errors(tmp_path):
+    profiler = FileProfiler('run', threshold_seconds=0, profile_dir=str(tmp_path))
+
+    try:
+        with profiler.profile('externo'):
+            with profiler.profile('interno'):
+                _work()
+            raise RuntimeError("fallo al procesar")
+    except RuntimeError:
+        pass
+
+    assert not file_profiler._profiling_lock.locked()
+    saved = {summary['file_id']: summary for summary in profiler.saved}
+    assert saved['interno']['profile_path'] is None
+    assert saved['externo']['profile_path'].endswith('externo.prof')
@@ -0,0 +1,92 @@
+"""Índice de hipervínculos: destinos de las .rels y orden de las diapositivas según presentation.xml"""
+
+import io
+import zipfile
+
+from hyperlink_index import HyperlinkIndex, OOXMLPackage
+
+
+def _linked_deck(*links, reorder=False):
+    """PPTX con una forma enlazada por diapositiva; con reorder la primera parte pasa al final"""
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    for index, url in enumerate(links, 1):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        textbox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1))
+        textbox.name = f'Enlace {index}'
+        run = textbox.text_frame.paragraphs[0].add_run()
+        run.text = url
+        run.hyperlink.address = url
+    if reorder:
+        slide_ids = prs.slides._sldIdLst
+        first = slide_ids[0]
+        slide_ids.remove(first)
+        slide_ids.append(first)
+    output = io.BytesIO()
+    prs.save(output)
+    return output.getvalue()
+
+
+def _rewrite(content, name, transform):
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(content)) as source, zipfile.ZipFile(output, 'w') as target:
+        for info in source.infolist():
+            data = source.read(info)
+            target.writestr(info, transform(data) if info.filename == name else data)
+    return output.getvalue()
+
+
+def test_resolve_target_relative_and_absolute():
+    assert OOXMLPackage._resolve_target('ppt/presentation.xml', 'slides/slide2.xml') == 'ppt/slides/slide2.xml'
+    notes = 'ppt/notesSlides/notesSlide1.xml'
+    assert OOXMLPackage._resolve_target(notes, '../slides/slide1.xml') == 'ppt/slides/slide1.xml'
+    assert OOXMLPackage._resolve_target('ppt/slides/slide1.xml', '/ppt/media/image1.png') == 'ppt/media/image1.png'
+    assert OOXMLPackage._rels_name('ppt/slides/slide1.xml') == 'ppt/slides/_rels/slide1.xml.rels'
+    assert OOXMLPackage._source_part('ppt/slides/_rels/slide1.xml.rels') == 'ppt/slides/slide1.xml'
+
+
+def test_slides_are_numbered_in_presentation_order():
+    deck = _linked_deck(
+        'https://uno.example.org/', 'https://dos.example.org/', 'https://tres.example.org/', reorder=True
+    )
+
+    links = HyperlinkIndex(deck).build()
+
+    # slide1.xml se movió al final: es la diapositiva 3 aunque su parte sea la primera
+    assert [(link['slide_number'], link['url'], link['part']) for link in links] == [
+        (1, 'https://dos.example.org/', 'ppt/slides/slide2.xml'),
+        (2, 'https://tres.example.org/', 'ppt/slides/slide3.xml'),
+        (3, 'https://uno.example.org/', 'ppt/slides/slide1.xml'),
+    ]
+    assert links[0]['location'] == 'Diapositiva 1 - Enlace 2 - Hipervínculo'
+
+
+def test_absolute_presentation_targets_keep_slide_order():
+    deck = _rewrite(
+        _linked_deck('https://uno.example.org/', 'https://dos.example.org/', reorder=True),
+        'ppt/_rels/presentation.xml.rels',
+        lambda data: data.replace(b'Target="slides/', b'Target="/ppt/slides/'),
+    )
+
+    links = HyperlinkIndex(deck, resolve_shapes=False).build()
+
+    assert [(link['slide_number'], link['part']) for link in links] == [
+        (1, 'ppt/slides/slide2.xml'), (2, 'ppt/slides/slide1.xml'),
+    ]
+    assert all(link['shape'] == '' for link in links)
+
+
+def test_unreadable_slide_list_falls_back_to_part_numbers():
+    deck = _rewrite(
+        _linked_deck('https://uno.example.org/', 'https://dos.example.org/', reorder=True),
+        'ppt/presentation.xml',
+        lambda data: data[:-20],
+    )
+
+    links = HyperlinkIndex(deck).build()
+
+    assert [(link['slide_number'], link['part']) for link in links] == [
+        (1, 'ppt/slides/slide1.xml'), (2, 'ppt/slides/slide2.xml'),
+    ]
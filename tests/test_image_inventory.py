@@ -0,0 +1,86 @@
+"""Límites de memoria del inventario de imágenes: imágenes enormes y hashes por lotes"""
+
+import io
+import zipfile
+
+import image_inventory
+from image_inventory import DeckImageInventory, ImageIndex
+from conftest import add_zip_member
+
+
+def _png(seed, size=64):
+    from PIL import Image
+
+    image = Image.new('L', (size, size))
+    image.putdata([(x * seed + y * 7) % 256 for y in range(size) for x in range(size)])
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+
+class RecordingExecutor:
+    """Executor en el propio proceso que anota cuántas imágenes recibe en cada lote"""
+
+    def __init__(self):
+        self.batches = []
+
+    def map(self, function, items):
+        items = list(items)
+        self.batches.append(len(items))
+        return [function(item) for item in items]
+
+
+def test_oversized_image_is_not_read(make_deck, monkeypatch):
+    content = add_zip_member(make_deck('Portada'), 'ppt/media/image1.png', _png(3))
+    content = add_zip_member(content, 'ppt/media/image2.png', b'\x89PNG' + b'\0' * 200_000)
+    monkeypatch.setattr(image_inventory, 'MAX_HASH_IMAGE_BYTES', 100_000)
+
+    read_parts = []
+    original_read = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, 'read', lambda self, name, pwd=None: (
+        read_parts.append(getattr(name, 'filename', name)), original_read(self, name, pwd))[1])
+
+    images = {image['part']: image for image in DeckImageInventory(content).build()}
+
+    assert images['ppt/media/image1.png']['phash'] is not None
+    assert images['ppt/media/image2.png']['hash_skipped']
+    assert images['ppt/media/image2.png']['phash'] is None
+    assert 'ppt/media/image2.png' not in read_parts
+
+
+def test_hashes_are_sent_in_bounded_batches(make_deck, monkeypatch):
+    content = make_deck('Portada')
+    for index in range(1, 6):
+        content = add_zip_member(content, f'ppt/media/image{index}.png', _png(index + 2))
+    monkeypatch.setattr(image_inventory, 'HASH_BATCH_BYTES', 1)
+    executor = RecordingExecutor()
+
+    images = DeckImageInventory(content).build(hash_executor=executor)
+
+    assert len(images) == 5
+    assert all(image['phash'] is not None for image in images)
+    assert executor.batches == [1] * 5
+
+
+def _image(part, phash):
+    return {'part': part, 'format': 'PNG', 'bytes': 1000, 'compressed_bytes': 900, 'width': 10, 'height': 10,
+            'content_key': part, 'phash': phash, 'placements': [{'slide': 1}], 'min_dpi': 96, 'max_dpi': 96,
+            'issues': []}
+
+
+def test_duplicate_groups_are_reused_until_the_inventory_changes(tmp_path, monkeypatch):
+    image_index = ImageIndex(str(tmp_path / 'imagenes.db'))
+    image_index.replace_file({'id': 'a', 'name': 'a.pptx'}, [_image('ppt/media/image1.png', 0b1111)])
+    image_index.replace_file({'id': 'b', 'name': 'b.pptx'}, [_image('ppt/media/image1.png', 0b0111)])
+    computed = []
+    original = image_index._duplicate_groups
+    monkeypatch.setattr(image_index, '_duplicate_groups', lambda *args: computed.append(args) or original(*args))
+
+    assert image_index.duplicate_groups(1)[0]['archivos'] == 2
+    assert image_index.duplicate_groups(1) == image_index.duplicate_groups(1)
+    assert image_index.duplicate_groups(0) == []
+    assert len(computed) == 2
+
+    image_index.replace_file({'id': 'c', 'name': 'c.pptx'}, [_image('ppt/media/image1.png', 0b1111)])
+    assert image_index.duplicate_groups(1)[0]['archivos'] == 3
+    assert len(computed) == 3
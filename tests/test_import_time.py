@@ -0,0 +1,42 @@
+"""Presupuesto de importación: los módulos que app.py carga al arrancar no traen dependencias pesadas"""
+
+import ast
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencias que solo se importan al usarse (validar enlaces, abrir presentaciones, Drive, Supabase)
+LAZY_MODULES = ('requests', 'pptx', 'PIL', 'googleapiclient', 'supabase')
+
+# Segundos máximos para importar los módulos propios de app.py en un intérprete nuevo
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def _app_local_imports():
+    with open(os.path.join(REPO_DIR, 'app.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return sorted({
+        node.module for node in tree.body
+        if isinstance(node, ast.ImportFrom) and node.module
+        and os.path.exists(os.path.join(REPO_DIR, f'{node.module}.py'))
+    })
+
+
+def test_app_imports_stay_light():
+    modules = _app_local_imports()
+    assert 'url_index' in modules
+    script = (
+        "import importlib, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"for name in {modules!r}:\n"
+        "    importlib.import_module(name)\n"
+        "print(time.perf_counter() - started)\n"
+        f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    seconds, loaded = result.stdout.splitlines()
+
+    assert loaded == ''
+    assert float(seconds) < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,67 @@
+"""Panel de trabajos: filas paginadas al terminar y solo las últimas mientras el trabajo avanza"""
+
+import os
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PANEL_SCRIPT = f"""
+import sys
+import streamlit as st
+sys.path.insert(0, {REPO_DIR!r})
+import app
+app.audit_job_panel(st.session_state.job_id)
+"""
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    import app
+
+    monkeypatch.setattr(job_queue, 'JOBS_DB_PATH', str(tmp_path / 'jobs.db'))
+    # La app guarda su cola con st.cache_resource: cada prueba usa la de su propia base
+    app.get_job_queue.clear()
+    return JobQueue()
+
+
+def _run_panel(job_id):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(PANEL_SCRIPT, default_timeout=30)
+    at.session_state['job_id'] = job_id
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_get_rows_limit_and_count(queue):
+    job_id = queue.submit('image_inventory', {})
+    queue.append_rows(job_id, [{'n': index} for index in range(10)])
+
+    assert queue.count_rows(job_id) == 10
+    assert [row['n'] for row in queue.get_rows(job_id, offset=4, limit=3)] == [4, 5, 6]
+
+
+def test_finished_job_pages_rows(queue):
+    job_id = queue.submit('image_inventory', {})
+    queue.append_rows(job_id, [{'n': index} for index in range(1200)])
+    queue.complete(job_id, {'messages': []})
+
+    at = _run_panel(job_id)
+    assert at.dataframe[0].value.shape[0] == 500
+
+    at.number_input[0].set_value(3).run()
+    assert list(at.dataframe[0].value['n']) == list(range(1000, 1200))
+
+
+def test_running_job_shows_latest_rows(queue):
+    job_id = queue.submit('image_inventory', {})
+    queue.claim('worker-1')
+    queue.append_rows(job_id, [{'n': index} for index in range(700)])
+
+    at = _run_panel(job_id)
+    assert list(at.dataframe[-1].value['n']) == list(range(200, 700))
@@ -0,0 +1,244 @@
+"""Circuit breaker y respaldo de LinkValidator contra servidores HTTP locales"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import link_validator
+from link_validator import DNSCache, LinkValidator, ValidationCache
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Responde después de un retraso mayor que el timeout del validador"""
+
+    delay = 0.5
+
+    def do_HEAD(self):
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class HeadRejectingHandler(BaseHTTPRequestHandler):
+    """Rechaza HEAD con 405 y atiende GET por rangos"""
+
+    ranges = []
+
+    def do_HEAD(self):
+        self.send_response(405)
+        self.end_headers()
+
+    def do_GET(self):
+        self.ranges.append(self.headers.get('Range'))
+        self.send_response(206)
+        self.send_header('Content-Length', '1')
+        self.end_headers()
+        self.wfile.write(b'x')
+
+    def log_message(self, *args):
+        pass
+
+
+class OkHandler(HeadRejectingHandler):
+    def do_HEAD(self):
+        self.send_response(200)
+        self.end_headers()
+
+
+def _free_port():
+    # Puerto sin nadie escuchando: las conexiones se rechazan
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _serve(handler, port=0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_refused_host_opens_circuit_and_recovers_after_probe():
+    port = _free_port()
+    validator = LinkValidator(max_failures=2, cooldown=0.3)
+    base = f"http://127.0.0.1:{port}"
+
+    for index in range(2):
+        status, _ = validator.validate(f"{base}/pagina{index}")
+        assert status is None
+    status, description = validator.validate(f"{base}/pagina2")
+    assert status is None and description.startswith('Host omitido')
+    assert validator.get_host_summary()[0]['circuito_abierto']
+
+    time.sleep(0.35)
+    with _serve(OkHandler, port):
+        status, _ = validator.validate(f"{base}/pagina3")
+        assert status == 200
+        assert not validator.get_host_summary()[0]['circuito_abierto']
+        assert validator.validate(f"{base}/pagina4")[0] == 200
+
+
+def test_failed_probe_reopens_circuit():
+    port = _free_port()
+    validator = LinkValidator(max_failures=1, cooldown=0.2)
+    base = f"http://127.0.0.1:{port}"
+
+    validator.validate(f"{base}/a")
+    time.sleep(0.25)
+    status, description = validator.validate(f"{base}/b")
+    assert status is None and not description.startswith('Host omitido')
+    # La prueba fallida reinicia el enfriamiento
+    assert validator.validate(f"{base}/c")[1].startswith('Host omitido')
+
+
+def test_only_one_probe_passes_while_half_open():
+    validator = LinkValidator(max_failures=1, cooldown=0)
+    health = validator._get_health('host')
+    validator._record_failure(health, 'caído')
+
+    assert validator._allow_request(health)
+    assert not validator._allow_request(health)
+
+
+def test_slow_host_times_out_and_opens_circuit():
+    validator = LinkValidator(max_failures=2, base_timeout=0.1, cooldown=60)
+    with _serve(SlowHandler) as base:
+        for index in range(2):
+            assert validator.validate(f"{base}/lenta{index}")[0] is None
+        started = time.monotonic()
+        status, description = validator.validate(f"{base}/lenta2")
+        assert time.monotonic() - started < 0.1
+    assert status is None and description.startswith('Host omitido')
+
+
+def test_head_rejected_falls_back_to_ranged_get():
+    HeadRejectingHandler.ranges = []
+    validator = LinkValidator()
+    with _serve(HeadRejectingHandler) as base:
+        status, _ = validator.validate(f"{base}/documento")
+    assert status == 206
+    assert HeadRejectingHandler.ranges == ['bytes=0-0']
+
+
+class CountingValidator:
+    """Validador lento que anota cada URL que se le pide"""
+
+    def __init__(self):
+        self.validated = []
+        self._lock = threading.Lock()
+
+    def validate_many(self, urls):
+        with self._lock:
+            self.validated.extend(urls)
+        time.sleep(0.2)
+        return {url: (200, 'OK') for url in urls}
+
+
+def test_concurrent_callers_validate_each_url_once():
+    validator = CountingValidator()
+    validations = ValidationCache()
+    urls = ['https://ejemplo.org/a', 'https://ejemplo.org/b']
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda batch=batch: results.append(validations.validate_many(validator, batch)))
+        for batch in (urls, list(reversed(urls)), urls[:1])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(validator.validated) == urls
+    assert len(validations) == 2
+    assert all(result[url] == (200, 'OK') for result in results for url in result)
+
+
+class CountingResolver:
+    """socket.getaddrinfo falso: resuelve 'existe.test' y responde NXDOMAIN o EAI_AGAIN al resto"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, host, port, family=0, type=0, proto=0, flags=0):
+        self.calls.append(host)
+        if host == 'existe.test':
+            return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('192.0.2.10', 0))] * 2
+        if host == 'transitorio.test':
+            raise socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution')
+        raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _resolver(monkeypatch):
+    resolver, clock = CountingResolver(), FakeClock()
+    monkeypatch.setattr(link_validator.socket, 'getaddrinfo', resolver)
+    monkeypatch.setattr(link_validator.time, 'monotonic', clock)
+    return resolver, clock
+
+
+def test_dns_cache_positive_entries_expire_after_ttl(monkeypatch):
+    resolver, clock = _resolver(monkeypatch)
+    cache = DNSCache(positive_ttl=300, negative_ttl=60)
+
+    assert cache.resolve('existe.test') == ([(socket.AF_INET, '192.0.2.10')], '')
+    clock.now += 299
+    assert cache.resolve('existe.test')[0] == [(socket.AF_INET, '192.0.2.10')]
+    assert resolver.calls == ['existe.test']
+
+    clock.now += 2
+    cache.resolve('existe.test')
+    assert resolver.calls == ['existe.test', 'existe.test']
+
+
+def test_dns_cache_negative_entries_and_transient_errors(monkeypatch):
+    resolver, clock = _resolver(monkeypatch)
+    cache = DNSCache(positive_ttl=300, negative_ttl=60)
+
+    assert cache.resolve('no-existe.test') == (None, 'Dominio inexistente (DNS): no-existe.test')
+    assert cache.resolve('no-existe.test')[0] is None
+    assert resolver.calls == ['no-existe.test']
+    clock.now += 61
+    cache.resolve('no-existe.test')
+    assert resolver.calls.count('no-existe.test') == 2
+
+    # EAI_AGAIN no se cachea: la siguiente consulta vuelve a preguntar al DNS
+    assert cache.resolve('transitorio.test')[0] == []
+    cache.resolve('transitorio.test')
+    assert resolver.calls.count('transitorio.test') == 2
+
+
+def test_pinned_host_connects_through_validator_adapter_only():
+    getaddrinfo = socket.getaddrinfo
+    cache = DNSCache()
+    cache.pin('fijado.invalid', '127.0.0.1')
+    validator = LinkValidator(dns_cache=cache)
+    with _serve(OkHandler) as base:
+        port = base.rsplit(':', 1)[1]
+        status, _ = validator.validate(f"http://fijado.invalid:{port}/pagina")
+
+        assert status == 200
+        assert socket.getaddrinfo is getaddrinfo
+        # Fuera de las sesiones del validador el host fijado no existe
+        with pytest.raises(socket.gaierror):
+            socket.getaddrinfo('fijado.invalid', 'https')
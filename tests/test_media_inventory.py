@@ -0,0 +1,99 @@
+"""Inventario multimedia de un PPTX sintético: incrustado, enlazado, archivo local y videos de la plantilla"""
+
+import io
+import zipfile
+
+from media_inventory import DeckMediaInventory, MediaIndex, MediaInventoryRun
+
+REL_VIDEO = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/video'
+REL_MEDIA = 'http://schemas.microsoft.com/office/2007/relationships/media'
+
+
+def _with_media_relationships(content, part_rels, members):
+    """Copia de un PPTX con relaciones multimedia añadidas a las .rels indicadas y partes nuevas"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(content)) as source, zipfile.ZipFile(output, 'w') as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename in part_rels:
+                extra = ''.join(
+                    f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{rel_target}"'
+                    + (' TargetMode="External"' if external else '') + '/>'
+                    for rel_id, rel_type, rel_target, external in part_rels[info.filename]
+                )
+                data = data.replace(b'</Relationships>', extra.encode() + b'</Relationships>')
+            target.writestr(info, data)
+        for name, data in members.items():
+            target.writestr(name, data)
+    return output.getvalue()
+
+
+def _media_deck(make_deck):
+    """Dos diapositivas: la 1 con video incrustado, YouTube y un archivo local; el diseño con un video propio"""
+    return _with_media_relationships(
+        make_deck('Portada', 'Cierre'),
+        {
+            'ppt/slides/_rels/slide1.xml.rels': [
+                ('rIdV1', REL_VIDEO, '../media/media1.mp4', False),
+                ('rIdV2', REL_VIDEO, 'https://www.youtube.com/watch?v=abc123', True),
+                ('rIdV3', REL_VIDEO, 'file:///C:/Users/autor/Videos/demo.wmv', True),
+            ],
+            'ppt/slideLayouts/_rels/slideLayout7.xml.rels': [
+                ('rIdL1', REL_MEDIA, '../media/media2.mp4', False),
+            ],
+        },
+        {
+            'ppt/media/media1.mp4': b'\0' * 2048,
+            'ppt/media/media2.mp4': b'\0' * 1024,
+            'ppt/media/media3.avi': b'\0' * 512,
+        },
+    )
+
+
+def test_media_inventory_origins_and_template_media(make_deck):
+    items = {item['target']: item for item in DeckMediaInventory(_media_deck(make_deck)).build()}
+
+    embedded = items['ppt/media/media1.mp4']
+    assert (embedded['origin'], embedded['kind'], embedded['bytes']) == ('incrustado', 'video', 2048)
+    assert embedded['slides'] == [1] and embedded['issues'] == []
+
+    youtube = items['https://www.youtube.com/watch?v=abc123']
+    assert (youtube['origin'], youtube['service'], youtube['kind']) == ('enlazado', 'YouTube', 'video')
+    assert youtube['bytes'] is None and youtube['issues'] == []
+
+    local = items['file:///C:/Users/autor/Videos/demo.wmv']
+    assert local['origin'] == 'archivo local'
+    assert local['issues'] == ['enlace a archivo local', 'formato poco compatible']
+
+    # El video del diseño se ve en las dos diapositivas que lo usan
+    layout_video = items['ppt/media/media2.mp4']
+    assert layout_video['slides'] == [1, 2]
+    assert layout_video['patterns'] == ['ppt/slideLayouts/slideLayout7.xml']
+    assert 'sin uso en diapositivas' not in layout_video['issues']
+
+    assert 'sin uso en diapositivas' in items['ppt/media/media3.avi']['issues']
+
+
+class DeckDriveManager:
+    def __init__(self, decks):
+        self.decks = decks
+
+    def thread_copy(self):
+        return self
+
+    def download_file(self, file_id):
+        return self.decks.get(file_id)
+
+
+def test_media_inventory_run_processes_files_concurrently(make_deck, tmp_path):
+    deck = _media_deck(make_deck)
+    drive = DeckDriveManager({'f1': deck, 'f2': deck})
+    rows = []
+    run = MediaInventoryRun(drive, MediaIndex(str(tmp_path / 'store.db')), rows_callback=rows.extend, max_workers=2)
+
+    result = run.run([{'id': 'f1', 'name': 'a.pptx'}, {'id': 'f2', 'name': 'b.pptx'}, {'id': 'f3', 'name': 'c.pptx'}])
+
+    assert result['summary']['files'] == 2
+    assert result['summary']['items'] == 10
+    assert result['messages'][0] == ('warning', "No se pudo descargar c.pptx")
+    assert {row['Archivo'] for row in rows} == {'a.pptx', 'b.pptx'}
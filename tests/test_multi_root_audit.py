@@ -0,0 +1,71 @@
+"""Auditoría de varias carpetas raíz: una carpeta inaccesible termina en error, no en 0 archivos"""
+
+import json
+import re
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from multi_root_audit import MultiRootAudit
+
+
+def _http_error(status, reason):
+    content = json.dumps({'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}})
+    return HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+
+class FakeRequest:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class FakeFiles:
+    """files() de la API de Drive: 'prohibida' responde 403 al listar y 'borrada' 404 al consultarla"""
+
+    def get(self, fileId, fields):
+        if fileId == 'borrada':
+            return FakeRequest(error=_http_error(404, 'notFound'))
+        return FakeRequest({'id': fileId, 'name': f"Carpeta {fileId}"})
+
+    def list(self, q, **kwargs):
+        parent = re.search(r"'([^']+)' in parents", q).group(1)
+        if parent == 'prohibida':
+            return FakeRequest(error=_http_error(403, 'insufficientFilePermissions'))
+        return FakeRequest({'files': []})
+
+
+class FakeService:
+    def files(self):
+        return FakeFiles()
+
+
+def test_inaccessible_folders_are_reported_as_errors(monkeypatch):
+    from app import GoogleDriveManager
+
+    monkeypatch.setattr(GoogleDriveManager, 'build_service', staticmethod(lambda credentials: FakeService()))
+    drive_manager = GoogleDriveManager()
+    drive_manager.service = FakeService()
+
+    result = MultiRootAudit(drive_manager, processed_by='pruebas').run(['prohibida', 'borrada', 'vacia'])
+    folders = {folder['ID']: folder for folder in result['folders']}
+
+    assert folders['prohibida']['Estado'] == 'error'
+    assert 'insufficientFilePermissions' in folders['prohibida']['Detalle']
+    assert folders['borrada']['Estado'] == 'error'
+    assert folders['vacia']['Estado'] == 'completado'
+    assert sum(1 for level, _ in result['messages'] if level == 'error') == 2
+
+
+def test_interactive_crawl_still_degrades_to_an_empty_list():
+    from app import GoogleDriveManager
+
+    drive_manager = GoogleDriveManager()
+    drive_manager.service = FakeService()
+
+    assert drive_manager.find_pptx_files('prohibida') == []
@@ -0,0 +1,132 @@
+"""Lectura de .ppt binarios: hipervínculos, guardados incrementales y archivos dañados"""
+
+import struct
+import time
+
+import pytest
+
+from legacy_ppt import (
+    PowerPointDocument, compound_file, document_container, legacy_ppt, master_container, slide_container,
+)
+from ppt_legacy import CompoundFileReader, LegacyPPTReader, is_legacy_ppt
+from pptx_analyzer import PPTXURLExtractor
+
+HYPERLINKS = {1: 'https://www.isil.pe/programas', 2: 'https://docs.python.org/3/'}
+
+
+def _deck():
+    """Presentación de 3 diapositivas con dos hipervínculos y una URL escrita en el texto"""
+    document = PowerPointDocument()
+    document.save({
+        1: document_container([(3, 'Inicio'), (4, 'Recursos'), (5, 'Cierre')], HYPERLINKS),
+        2: master_container('Patrón ISIL'),
+        3: slide_container('Bienvenidos'),
+        4: slide_container('Más en https://github.com/isil/recursos', hyperlink_id=1),
+        5: slide_container('Gracias', hyperlink_id=2),
+    })
+    return document
+
+
+def _texts(reader, kind='texto'):
+    return [(slide_num, text) for slide_num, item_kind, text in reader.iter_items() if item_kind == kind]
+
+
+def test_reads_texts_and_hyperlinks_per_slide():
+    content = legacy_ppt(_deck())
+    assert is_legacy_ppt(content)
+    reader = LegacyPPTReader(content)
+
+    items = list(reader.iter_items())
+
+    assert (2, 'texto', 'Más en https://github.com/isil/recursos') in items
+    assert (0, 'patron', 'Patrón ISIL') in items
+    assert sorted(item for item in items if item[1] == 'hipervinculo') == [
+        (2, 'hipervinculo', 'https://www.isil.pe/programas'),
+        (3, 'hipervinculo', 'https://docs.python.org/3/'),
+    ]
+
+
+def test_extractor_reports_legacy_urls_with_their_slide():
+    extractor = PPTXURLExtractor()
+
+    urls = {url['url']: url['location'] for url in extractor.extract_urls_from_file(legacy_ppt(_deck()))}
+
+    assert urls['https://www.isil.pe/programas'] == 'Diapositiva 2 - Hipervínculo'
+    assert urls['https://docs.python.org/3/'] == 'Diapositiva 3 - Hipervínculo'
+    assert urls['https://github.com/isil/recursos'].startswith('Diapositiva 2')
+
+
+def test_incremental_save_ignores_stale_containers():
+    document = _deck()
+    # Segundo guardado: se edita la diapositiva 2 y se borra la 3 (nuevo Document, sin su persistId)
+    document.save({
+        1: document_container([(3, 'Inicio'), (4, 'Recursos')], HYPERLINKS),
+        4: slide_container('Versión nueva', hyperlink_id=1),
+    })
+    reader = LegacyPPTReader(legacy_ppt(document))
+
+    texts = _texts(reader)
+
+    assert (2, 'Versión nueva') in texts
+    assert not any('github.com/isil/recursos' in text or text in ('Gracias', 'Cierre') for _, text in texts)
+    assert all(slide_num for slide_num, _ in texts)
+
+
+def test_truncated_file_raises_value_error():
+    content = legacy_ppt(_deck())
+    for size in (100, 600, len(content) // 2, len(content) - 300):
+        with pytest.raises(ValueError):
+            LegacyPPTReader(content[:size])
+
+
+def _set_fat_entry(content, sector, value):
+    """Copia del archivo con una entrada de la FAT (de su primer sector FAT) cambiada"""
+    first_fat_sector = struct.unpack_from('<I', content, 76)[0]
+    offset = (first_fat_sector + 1) * 512 + sector * 4
+    return content[:offset] + struct.pack('<I', value) + content[offset + 4:]
+
+
+def _document_start(content):
+    cfb = CompoundFileReader(content)
+    return next(entry['start'] for entry in cfb.entries if entry['name'] == 'PowerPoint Document')
+
+
+def test_fat_chain_loops_and_out_of_range_sectors_terminate():
+    content = legacy_ppt(_deck())
+    start = _document_start(content)
+
+    looping = _set_fat_entry(content, start + 1, start)
+    out_of_range = _set_fat_entry(content, start + 1, 0x00FFFFFF)
+    for damaged in (looping, out_of_range):
+        started = time.monotonic()
+        with pytest.raises(ValueError):
+            LegacyPPTReader(damaged)
+        assert time.monotonic() - started < 1
+
+
+def test_difat_loops_and_huge_counts_terminate():
+    content = legacy_ppt(_deck())
+    # Un sector DIFAT que apunta a sí mismo, anunciado como la primera de 2^32 - 1 entradas
+    difat_sector = struct.unpack_from('<I', content, 76)[0]
+    looping = bytearray(content)
+    struct.pack_into('<II', looping, 68, difat_sector, 0xFFFFFFFF)
+    offset = (difat_sector + 1) * 512
+    struct.pack_into('<I', looping, offset + 508, difat_sector)
+    # Y una cabecera que declara 2^32 - 1 sectores FAT que no existen
+    huge_fat = bytearray(content)
+    struct.pack_into('<I', huge_fat, 44, 0xFFFFFFFF)
+    struct.pack_into('<I', huge_fat, 80, 0x7FFFFFFF)
+
+    for damaged in (bytes(looping), bytes(huge_fat)):
+        started = time.monotonic()
+        with pytest.raises(ValueError):
+            LegacyPPTReader(damaged)
+        assert time.monotonic() - started < 1
+
+
+def test_invalid_sector_size_is_rejected():
+    content = bytearray(compound_file({'PowerPoint Document': b'\0' * 16}))
+    struct.pack_into('<H', content, 30, 30)  # Sectores de 1 GB
+
+    with pytest.raises(ValueError):
+        CompoundFileReader(bytes(content))
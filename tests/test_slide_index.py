@@ -0,0 +1,93 @@
+"""Índice de diapositivas construido desde la presentación ya validada por el extractor"""
+
+import os
+
+import pytest
+
+from audit_pipeline import URLAuditPipeline
+from batch_checkpoint import file_content_key
+from conftest import add_zip_member
+from pptx_analyzer import ExtractionLimitExceeded, PPTXURLExtractor
+from slide_index import SlideIndexCache
+from test_audit_pipeline import FakeDriveManager, SlowValidator
+
+
+def run_pipeline(deck, cache):
+    extractor = PPTXURLExtractor()
+    pipeline = URLAuditPipeline(
+        FakeDriveManager({'deck': deck}), processed_by='pruebas', extractor=extractor,
+        validator=SlowValidator(delay=0), slide_index_cache=cache,
+    )
+    file = {'id': 'deck', 'name': 'deck.pptx', 'md5Checksum': 'abc'}
+    pipeline.run([file])
+    return extractor, file
+
+
+def test_index_reuses_the_extractor_presentation(make_deck, tmp_path, monkeypatch):
+    opened = []
+    original_open = PPTXURLExtractor._open_presentation
+    monkeypatch.setattr(PPTXURLExtractor, '_open_presentation',
+                        lambda self, content: opened.append(1) or original_open(self, content))
+    cache = SlideIndexCache(str(tmp_path))
+
+    extractor, file = run_pipeline(make_deck("Introducción https://www.github.com/a/inicio", "Cierre"), cache)
+
+    index = cache.get_or_build(file, download=lambda: pytest.fail("no debe volver a descargarse"))
+    assert [slide['shapes'][0]['text'] for slide in index['slides']] == [
+        "Introducción https://www.github.com/a/inicio", "Cierre"
+    ]
+    assert len(opened) == 1
+    assert extractor.last_presentation is None
+
+
+def test_decks_rejected_by_the_extractor_are_not_indexed(make_deck, tmp_path):
+    bomb = add_zip_member(make_deck("Texto"), 'ppt/media/bomba.bin', b'\0' * 4 * 1024 * 1024)
+    cache = SlideIndexCache(str(tmp_path))
+
+    _, file = run_pipeline(bomb, cache)
+
+    assert cache.get(file_content_key(file)) is None
+    with pytest.raises(ExtractionLimitExceeded):
+        cache.get_or_build(file, download=lambda: bomb)
+
+
+class CorruptDriveManager:
+    """Drive que devuelve un archivo que no es ZIP; el resto de llamadas no encuentra nada"""
+
+    def __init__(self):
+        self.downloads = 0
+
+    def download_file(self, file_id):
+        self.downloads += 1
+        return b'esto no es un zip'
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: []
+
+
+def test_sequence_tab_reports_corrupt_decks_without_breaking_the_page(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+    # Bases SQLite e índices de la app en un directorio temporal
+    monkeypatch.chdir(tmp_path)
+    drive_manager = CorruptDriveManager()
+    at = AppTest.from_file(app_path, default_timeout=30)
+    at.secrets['SUPABASE_URL'] = ''
+    at.session_state['authenticated'] = True
+    at.session_state['current_user'] = 'admin'
+    at.session_state['connected'] = True
+    at.session_state['drive_manager'] = drive_manager
+    at.session_state['selected_files'] = [{'id': 'roto', 'name': 'roto.pptx', 'md5Checksum': 'abc'}]
+
+    at.run()
+    # Elegir la presentación no la descarga: solo el botón lo hace
+    assert drive_manager.downloads == 0
+
+    next(button for button in at.button if button.key == 'sequence_build').click().run()
+
+    assert not at.exception
+    assert drive_manager.downloads == 1
+    assert any('No se pudo indexar roto.pptx' in error.value for error in at.error)
+    # Las pestañas posteriores se siguen mostrando
+    assert 'Con error de envío' in [metric.label for metric in at.metric]
@@ -0,0 +1,132 @@
+"""Análisis de plantillas concurrentes: solo esperan los hilos con la misma plantilla"""
+
+import io
+import threading
+import time
+import zipfile
+
+from conftest import add_zip_member
+from drive_range import RangeReadError
+from template_conformance import TemplateConformanceRun, TemplateStore
+
+
+def _verdicts_in_parallel(run, sources, registry_version):
+    verdicts = []
+    threads = [
+        threading.Thread(target=lambda source=source: verdicts.append(run._verdict(source, registry_version)))
+        for source in sources
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return verdicts
+
+
+def _conformance_run(store):
+    run = TemplateConformanceRun(None, store)
+    # Contadores que run() inicializa al empezar un lote
+    run._stats = {'files': 0, 'signature_hits': 0, 'verdict_hits': 0, 'analyses': 0}
+    return run
+
+
+def _slow_store(tmp_path, monkeypatch, delay=0.3):
+    """TemplateStore cuyo análisis tarda delay segundos y anota cuántos corren a la vez"""
+    store = TemplateStore(str(tmp_path / 'store.db'))
+    state = {'running': 0, 'max_running': 0, 'calls': 0}
+    lock = threading.Lock()
+    analyze = store.analyze
+
+    def slow_analyze(*args):
+        with lock:
+            state['calls'] += 1
+            state['running'] += 1
+            state['max_running'] = max(state['max_running'], state['running'])
+        time.sleep(delay)
+        try:
+            return analyze(*args)
+        finally:
+            with lock:
+                state['running'] -= 1
+
+    monkeypatch.setattr(store, 'analyze', slow_analyze)
+    return store, state
+
+
+def test_distinct_templates_are_analyzed_in_parallel(make_deck, tmp_path, monkeypatch):
+    store, state = _slow_store(tmp_path, monkeypatch)
+    deck = make_deck('Portada')
+    other = add_zip_member(deck, 'ppt/slideLayouts/slideLayout99.xml', b'<diseno/>')
+    run = _conformance_run(store)
+
+    verdicts = _verdicts_in_parallel(run, [deck, other], store.registry_version())
+
+    assert state['calls'] == 2
+    assert state['max_running'] == 2
+    assert verdicts[0]['template_hash'] != verdicts[1]['template_hash']
+
+
+def test_same_template_is_analyzed_once(make_deck, tmp_path, monkeypatch):
+    store, state = _slow_store(tmp_path, monkeypatch)
+    deck = make_deck('Portada')
+    run = _conformance_run(store)
+
+    verdicts = _verdicts_in_parallel(run, [deck, deck, deck], store.registry_version())
+
+    assert state['calls'] == 1
+    assert run._stats['verdict_hits'] == 2
+    assert len({verdict['template_hash'] for verdict in verdicts}) == 1
+
+
+class RangedDriveManager:
+    """Drive falso: open_ranged sirve el contenido o falla como un error de transporte"""
+
+    def __init__(self, content, ranged_error=None):
+        self.content = content
+        self.ranged_error = ranged_error
+        self.downloads = 0
+
+    def thread_copy(self):
+        return self
+
+    def open_ranged(self, file):
+        if self.ranged_error:
+            raise self.ranged_error
+        return io.BytesIO(self.content)
+
+    def download_file(self, file_id):
+        self.downloads += 1
+        return self.content
+
+
+def _without_templates(content):
+    """Copia de un PPTX sin patrones ni diseños de diapositiva"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(content)) as source, zipfile.ZipFile(output, 'w') as target:
+        for info in source.infolist():
+            if not info.filename.startswith(('ppt/slideLayouts/', 'ppt/slideMasters/')):
+                target.writestr(info, source.read(info))
+    return output.getvalue()
+
+
+def test_content_errors_do_not_fall_back_to_download(make_deck, tmp_path):
+    drive = RangedDriveManager(_without_templates(make_deck('Portada')))
+    run = TemplateConformanceRun(drive, TemplateStore(str(tmp_path / 'store.db')))
+
+    result = run.run([{'id': 'f1', 'name': 'sin_plantilla.pptx'}])
+
+    assert drive.downloads == 0
+    assert result['messages'][0][0] == 'error'
+    assert 'sin patrones' in result['messages'][0][1]
+
+
+def test_transport_errors_fall_back_to_download(make_deck, tmp_path):
+    drive = RangedDriveManager(make_deck('Portada'), ranged_error=RangeReadError("503"))
+    rows = []
+    run = TemplateConformanceRun(drive, TemplateStore(str(tmp_path / 'store.db')), rows_callback=rows.extend)
+
+    result = run.run([{'id': 'f1', 'name': 'deck.pptx'}])
+
+    assert drive.downloads == 1
+    assert result['summary']['files'] == 1
+    assert rows[0]['Archivo'] == 'deck.pptx'
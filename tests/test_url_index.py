@@ -0,0 +1,48 @@
+"""Índice de URLs: búsqueda de un dominio y sus subdominios por prefijo del dominio invertido"""
+
+from url_index import URLIndex, reverse_domain
+
+URLS = [
+    'https://example.com/inicio',
+    'https://a.example.com/docs',
+    'http://b.a.example.com:8080/x',
+    'https://badexample.com/',
+    'https://example.com.evil.org/',
+    'https://example.community/',
+    'www.example.com/sin-esquema',
+]
+
+
+def _index(tmp_path):
+    index = URLIndex(str(tmp_path / 'index.db'))
+    entries = [({'url': url, 'location': f'Diapositiva {slide}'}, 200) for slide, url in enumerate(URLS, 1)]
+    index.replace_file({'id': 'f1', 'name': 'deck.pptx'}, entries)
+    return index
+
+
+def _domains(rows):
+    return sorted(row['domain'] for row in rows)
+
+
+def test_reverse_domain_normalizes_before_reversing():
+    assert reverse_domain('Docs.Example.COM.') == 'com.example.docs'
+    assert reverse_domain('https://user@a.example.com:443/ruta') == 'com.example.a'
+
+
+def test_lookup_domain_matches_subdomains_but_not_lookalikes(tmp_path):
+    index = _index(tmp_path)
+
+    assert _domains(index.lookup_domain('example.com')) == [
+        'a.example.com', 'b.a.example.com', 'example.com', 'www.example.com',
+    ]
+    assert _domains(index.lookup_domain('a.example.com')) == ['a.example.com', 'b.a.example.com']
+    assert _domains(index.lookup_domain('example.com', include_subdomains=False)) == ['example.com']
+    assert _domains(index.lookup_domain('badexample.com')) == ['badexample.com']
+
+
+def test_lookup_dispatches_on_query_shape(tmp_path):
+    index = _index(tmp_path)
+
+    assert [row['slide_number'] for row in index.lookup('https://EXAMPLE.com:443/inicio#seccion')] == [1]
+    assert [row['slide_number'] for row in index.lookup('www.example.com/sin-esquema')] == [7]
+    assert _domains(index.lookup(' A.Example.com ')) == ['a.example.com', 'b.a.example.com']
@@ -0,0 +1,155 @@
+"""
+Módulo con el índice invertido de URLs entre presentaciones (URL canónica y dominio -> archivo, diapositiva y forma)
+"""
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from audit_store import AUDIT_STORE_DB_PATH
+from link_validator import canonicalize_url
+
+SLIDE_LOCATION_RE = re.compile(r'^Diapositiva (\d+)')
+
+
+def normalize_domain(domain):
+    """Dominio en minúsculas, sin puerto, credenciales ni punto final"""
+    domain = (domain or '').strip().lower()
+    if '//' in domain:
+        domain = urlsplit(domain).netloc
+    domain = domain.rsplit('@', 1)[-1].split(':', 1)[0]
+    return domain.strip('.')
+
+
+def reverse_domain(domain):
+    """docs.example.com -> com.example.docs: los subdominios comparten prefijo con su dominio"""
+    return '.'.join(reversed(normalize_domain(domain).split('.')))
+
+
+def slide_and_shape(url_info):
+    """Diapositiva y forma de una URL extraída (del registro o, si no, de su ubicación)"""
+    location = url_info.get('location', '')
+    match = SLIDE_LOCATION_RE.match(location)
+    slide_num = url_info.get('slide_number') or (int(match.group(1)) if match else 0)
+    shape = url_info.get('shape')
+    if shape is None:
+        # 'Diapositiva 3 - TextBox 2 - Texto directo': la forma es el segmento central
+        parts = location.split(' - ')
+        shape = parts[1] if match and len(parts) >= 3 else ''
+    return slide_num, shape
+
+
+class URLIndex:
+    """Índice invertido persistente, actualizado archivo a archivo por el pipeline de auditoría"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or AUDIT_STORE_DB_PATH
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS url_index (
+                    canonical_url TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    domain_reversed TEXT NOT NULL,
+                    file_id TEXT NOT NULL,
+                    filename TEXT,
+                    subfolder TEXT,
+                    slide_number INTEGER,
+                    shape TEXT,
+                    location TEXT,
+                    status TEXT,
+                    indexed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_url_index_url ON url_index(canonical_url);
+                CREATE INDEX IF NOT EXISTS idx_url_index_domain ON url_index(domain_reversed);
+                CREATE INDEX IF NOT EXISTS idx_url_index_file ON url_index(file_id);
+            """)
+
+    @contextmanager
+    def _connection(self):
+        """Conexión con commit/rollback automático que siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def replace_file(self, file, entries):
+        """
+        Reemplazar las entradas de un archivo por las de su última auditoría
+
+        Args:
+            file: Archivo de Drive ('id', 'name', 'subfolder')
+            entries: Lista de (url_info del extractor, estado de validación)
+        """
+        indexed_at = datetime.utcnow().isoformat()
+        rows = []
+        for url_info, status in entries:
+            canonical_url = canonicalize_url(url_info['url'])
+            # URLs sin esquema (www.ejemplo.com/...) también se indexan por su dominio
+            domain = normalize_domain(
+                urlsplit(canonical_url).netloc or urlsplit(f"http://{url_info['url'].strip()}").netloc
+            )
+            slide_num, shape = slide_and_shape(url_info)
+            rows.append((
+                canonical_url, url_info['url'], domain, reverse_domain(domain), file['id'], file['name'],
+                file.get('subfolder', ''), slide_num, shape, url_info.get('location', ''),
+                str(status) if status else 'Error', indexed_at,
+            ))
+        with self._connection() as conn:
+            conn.execute("DELETE FROM url_index WHERE file_id = ?", (file['id'],))
+            conn.executemany(
+                "INSERT INTO url_index (canonical_url, url, domain, domain_reversed, file_id, filename, "
+                "subfolder, slide_number, shape, location, status, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def lookup_url(self, url, limit=1000):
+        """Presentaciones y diapositivas que referencian una URL (en su forma canónica)"""
+        return self._select("canonical_url = ?", (canonicalize_url(url),), limit)
+
+    def lookup_domain(self, domain, include_subdomains=True, limit=1000):
+        """
+        Presentaciones que referencian un dominio
+
+        Con include_subdomains, 'example.com' también encuentra 'www.example.com' y
+        'docs.example.com': es una consulta por prefijo sobre el dominio invertido
+        """
+        reversed_domain = reverse_domain(domain)
+        if not include_subdomains:
+            return self._select("domain_reversed = ?", (reversed_domain,), limit)
+        # Rango [prefijo + '.', prefijo + '/'): '/' es el carácter siguiente a '.'
+        return self._select(
+            "(domain_reversed = ? OR (domain_reversed >= ? AND domain_reversed < ?))",
+            (reversed_domain, reversed_domain + '.', reversed_domain + '/'),
+            limit
+        )
+
+    def lookup(self, query, limit=1000):
+        """Buscar por URL si la consulta tiene ruta o esquema; si no, por dominio y subdominios"""
+        query = query.strip()
+        if '://' in query:
+            return self.lookup_url(query, limit)
+        if '/' in query:
+            # Sin esquema se buscan la variante http, la https y la forma tal como apareció en el texto
+            candidates = [canonicalize_url(f"{scheme}://{query}") for scheme in ('http', 'https')]
+            candidates.append(canonicalize_url(query))
+            return self._select(
+                f"canonical_url IN ({', '.join('?' for _ in candidates)})", tuple(candidates), limit
+            )
+        return self.lookup_domain(query, limit=limit)
+
+    def _select(self, condition, params, limit):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT url, domain, file_id, filename, subfolder, slide_number, shape, location, status, indexed_at "
+                f"FROM url_index WHERE {condition} ORDER BY filename, slide_number LIMIT ?",
+                params + (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]